@@ -160,6 +160,7 @@ async def get_config_options():
         ],
         "save_options": [
             {"value": "json", "label": "JSON File"},
+            {"value": "jsonl", "label": "JSON Lines File"},
             {"value": "csv", "label": "CSV File"},
             {"value": "excel", "label": "Excel File"},
             {"value": "sqlite", "label": "SQLite Database"},
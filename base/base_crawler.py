@@ -18,7 +18,7 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from playwright.async_api import BrowserContext, BrowserType, Playwright
 
@@ -99,6 +99,19 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    # Batch variants, stores that can write many rows at once (e.g. SQL bulk upsert) override these
+    async def store_contents(self, content_items: List[Dict]):
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
+    async def store_creators(self, creators: List[Dict]):
+        for creator in creators:
+            await self.store_creator(creator)
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
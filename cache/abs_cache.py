@@ -60,3 +60,42 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+
+class AbstractAsyncCache(ABC):
+    """
+    Cache whose operations are coroutines, for backends that do network I/O.
+    Kept apart from AbstractCache so code typed against the synchronous interface never
+    gets a coroutine back instead of a value.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key from the cache.
+        This is an abstract method. Subclasses must implement this method.
+        :param key: The key
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        Set the value of a key in the cache.
+        This is an abstract method. Subclasses must implement this method.
+        :param key: The key
+        :param value: The value
+        :param expire_time: Expiration time
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        Get all keys matching the pattern
+        :param pattern: Matching pattern
+        :return:
+        """
+        raise NotImplementedError
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/cache/async_redis_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Asyncio RedisCache implementation
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.asyncio import ConnectionPool, Redis
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.serializer import CacheSerializer, get_serializer
+from config import db_config
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+    """
+    RedisCache for async code: every method is a coroutine, so a round trip to Redis
+    never blocks the event loop. Clients share one connection pool per Redis server,
+    keys() walks the keyspace with SCAN instead of a blocking KEYS, and get_many /
+    set_many batch their commands into one round trip.
+    """
+
+    # Class-level connection pool management, one pool per (host, port, db)
+    _pools: Dict[Tuple[str, int, int], ConnectionPool] = {}
+
+    # Keys requested per SCAN call
+    SCAN_COUNT = 500
+
+    def __init__(self, serializer: Optional[str] = None, redis_client: Optional[Redis] = None) -> None:
+        """
+        :param serializer: pickle | json | msgpack, defaults to CACHE_SERIALIZER
+        :param redis_client: Use this client instead of the shared pool (tests)
+        """
+        self._serializer: CacheSerializer = get_serializer(serializer or db_config.CACHE_SERIALIZER)
+        self._redis_client = redis_client or Redis(connection_pool=self._get_pool())
+
+    @classmethod
+    def _get_pool(cls) -> ConnectionPool:
+        key = (db_config.REDIS_DB_HOST, int(db_config.REDIS_DB_PORT), int(db_config.REDIS_DB_NUM))
+        if key not in cls._pools:
+            cls._pools[key] = ConnectionPool(
+                host=key[0],
+                port=key[1],
+                db=key[2],
+                password=db_config.REDIS_DB_PWD,
+                max_connections=db_config.REDIS_MAX_CONNECTIONS,
+            )
+        return cls._pools[key]
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Disconnect every pooled connection, should be called at shutdown
+        """
+        for pool in list(cls._pools.values()):
+            await pool.disconnect()
+        cls._pools.clear()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key from the cache and deserialize it
+        :param key:
+        :return:
+        """
+        value = await self._redis_client.get(key)
+        if value is None:
+            return None
+        return self._serializer.loads(value)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        Set the value of a key in the cache and serialize it
+        :param key:
+        :param value:
+        :param expire_time: Expiration time in seconds
+        :return:
+        """
+        await self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time)
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        Get all keys matching the pattern, incrementally with SCAN
+        """
+        return [key.decode() async for key in self._redis_client.scan_iter(match=pattern, count=self.SCAN_COUNT)]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several keys with one MGET, keys that do not exist are left out
+        :param keys:
+        :return: key -> value
+        """
+        if not keys:
+            return {}
+        values = await self._redis_client.mget(keys)
+        return {key: self._serializer.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        Set several keys in one pipelined round trip
+        :param mapping: key -> value
+        :param expire_time: Expiration time in seconds, applied to every key
+        :return:
+        """
+        if not mapping:
+            return
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, self._serializer.dumps(value), ex=expire_time)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> int:
+        """
+        Delete keys
+        :return: Number of deleted keys
+        """
+        if not keys:
+            return 0
+        return await self._redis_client.delete(*keys)
+
+    async def get_by_pattern(self, pattern: str) -> Dict[str, Any]:
+        """
+        Get every key matching the pattern: SCAN, then one MGET per SCAN page
+        :param pattern: Matching pattern
+        :return: key -> value
+        """
+        result: Dict[str, Any] = {}
+        batch: List[str] = []
+        async for key in self._redis_client.scan_iter(match=pattern, count=self.SCAN_COUNT):
+            batch.append(key.decode())
+            if len(batch) >= self.SCAN_COUNT:
+                result.update(await self.get_many(batch))
+                batch = []
+        result.update(await self.get_many(batch))
+        return result
@@ -25,23 +25,40 @@
 # @Desc    : Local cache
 
 import asyncio
+import fnmatch
+import heapq
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
 from cache.abs_cache import AbstractCache
 
 
 class ExpiringLocalCache(AbstractCache):
+    """
+    In-process cache with per-key expiration.
+    Expiration times are kept in a min-heap, so purging expired keys pops only the due
+    entries (O(log n) each) instead of scanning the whole cache. Entries are kept in LRU
+    order and the least recently used one is evicted once max_entries is reached.
+    """
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_entries: int = 0):
         """
         Initialize local cache
         :param cron_interval: Time interval for scheduled cache cleanup
+        :param max_entries: Maximum number of keys, 0 means unbounded
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_entries = max_entries
+        self._cache_container: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # (expire_at, key) entries; a key set again leaves a stale entry behind, skipped when popped
+        self._expire_heap: List[Tuple[float, str]] = []
         self._cron_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Keys dropped by the max_entries bound
+        self.expirations = 0  # Keys dropped because they expired
         # Start scheduled cleanup task
         self._schedule_clear()
 
@@ -53,21 +70,30 @@ class ExpiringLocalCache(AbstractCache):
         if self._cron_task is not None:
             self._cron_task.cancel()
 
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
     def get(self, key: str) -> Optional[Any]:
         """
         Get the value of a key from the cache
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        entry = self._cache_container.get(key)
+        if entry is None:
+            self.misses += 1
             return None
 
+        value, expire_time = entry
         # If the key has expired, delete it and return None
         if expire_time < time.time():
             del self._cache_container[key]
+            self.expirations += 1
+            self.misses += 1
             return None
 
+        self._cache_container.move_to_end(key)
+        self.hits += 1
         return value
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
@@ -78,45 +104,87 @@ class ExpiringLocalCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        now = time.time()
+        self._clear(now)
+        expire_at = now + expire_time
+        self._cache_container[key] = (value, expire_at)
+        self._cache_container.move_to_end(key)
+        heapq.heappush(self._expire_heap, (expire_at, key))
+        if self._max_entries > 0:
+            while len(self._cache_container) > self._max_entries:
+                self._cache_container.popitem(last=False)
+                self.evictions += 1
+        self._compact_heap()
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a key, its heap entry is dropped lazily
+        :param key:
+        :return:
+        """
+        self._cache_container.pop(key, None)
 
     def keys(self, pattern: str) -> List[str]:
         """
         Get all keys matching the pattern
-        :param pattern: Matching pattern
+        :param pattern: Glob pattern like redis KEYS (*, ?, [abc])
         :return:
         """
+        self._clear()
         if pattern == '*':
             return list(self._cache_container.keys())
+        return [key for key in self._cache_container.keys() if fnmatch.fnmatchcase(key, pattern)]
 
-        # For local cache wildcard, temporarily replace * with empty string
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
-
-        return [key for key in self._cache_container.keys() if pattern in key]
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters since the cache was created
+        :return:
+        """
+        return {
+            "size": len(self._cache_container),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
 
     def _schedule_clear(self):
         """
-        Start scheduled cleanup task
+        Start scheduled cleanup task when created inside a running event loop,
+        otherwise expired keys are purged on set/keys
         :return:
         """
-
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
         except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            return
 
         self._cron_task = loop.create_task(self._start_clear_cron())
 
-    def _clear(self):
+    def _clear(self, now: Optional[float] = None):
         """
-        Clean up cache based on expiration time
+        Pop the heap entries that are due and delete the keys that actually expired
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
+        now = time.time() if now is None else now
+        heap = self._expire_heap
+        while heap and heap[0][0] < now:
+            expire_at, key = heapq.heappop(heap)
+            entry = self._cache_container.get(key)
+            # Skip stale entries of keys that were set again or deleted
+            if entry is not None and entry[1] == expire_at:
                 del self._cache_container[key]
+                self.expirations += 1
+
+    def _compact_heap(self):
+        """
+        Rebuild the heap when stale entries (overwritten or evicted keys) dominate it
+        :return:
+        """
+        if len(self._expire_heap) <= 2 * len(self._cache_container) + 64:
+            return
+        self._expire_heap = [(expire_at, key) for key, (_, expire_at) in self._cache_container.items()]
+        heapq.heapify(self._expire_heap)
 
     async def _start_clear_cron(self):
         """
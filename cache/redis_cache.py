@@ -75,9 +75,9 @@ class RedisCache(AbstractCache):
 
     def keys(self, pattern: str) -> List[str]:
         """
-        Get all keys matching the pattern
+        Get all keys matching the pattern, incrementally with SCAN so Redis is not blocked
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=500)]
 
 
 if __name__ == '__main__':
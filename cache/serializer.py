@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/cache/serializer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Value serializers for the Redis caches
+
+import json
+import pickle
+from typing import Any, Dict
+
+
+class CacheSerializer:
+    """Turns cached values into bytes and back"""
+
+    name = ""
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleSerializer(CacheSerializer):
+    """Any python object, only readable by python"""
+
+    name = "pickle"
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class JsonSerializer(CacheSerializer):
+    """JSON compatible values, readable from other languages and redis-cli"""
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackSerializer(CacheSerializer):
+    """JSON compatible values in a smaller binary encoding, requires msgpack"""
+
+    name = "msgpack"
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError(
+                "msgpack is required for the msgpack cache serializer. "
+                "Install it with: pip install msgpack"
+            )
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS: Dict[str, type] = {
+    PickleSerializer.name: PickleSerializer,
+    JsonSerializer.name: JsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+def get_serializer(name: str) -> CacheSerializer:
+    """
+    Create a serializer by name
+    :param name: pickle | json | msgpack
+    :return:
+    """
+    serializer_class = SERIALIZERS.get(name)
+    if not serializer_class:
+        raise ValueError(f"Unknown cache serializer: {name}, supported: {', '.join(SERIALIZERS)}")
+    return serializer_class()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/cache/tiered_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Two-tier cache, in-process L1 in front of Redis L2
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.async_redis_cache import AsyncRedisCache
+from cache.local_cache import ExpiringLocalCache
+from config import db_config
+
+
+class TieredCache(AbstractAsyncCache):
+    """
+    Reads check the local ExpiringLocalCache first and fall back to Redis, a Redis hit
+    warms the local tier. Writes go to both tiers (write-through). The local copy lives
+    at most TIERED_CACHE_L1_TTL_SEC, which bounds how stale a hot key can be on one
+    worker after another worker changed it in Redis.
+
+    get_or_load() coalesces concurrent misses of the same key: one coroutine runs the
+    loader, the others wait for its result.
+    """
+
+    def __init__(
+        self,
+        l1: Optional[ExpiringLocalCache] = None,
+        l2: Optional[AsyncRedisCache] = None,
+        l1_ttl_sec: Optional[int] = None,
+    ) -> None:
+        """
+        :param l1: Local tier, defaults to an ExpiringLocalCache bounded by TIERED_CACHE_L1_MAX_ENTRIES
+        :param l2: Redis tier, defaults to AsyncRedisCache
+        :param l1_ttl_sec: Upper bound of a local entry's lifetime
+        """
+        self.l1 = l1 if l1 is not None else ExpiringLocalCache(max_entries=db_config.TIERED_CACHE_L1_MAX_ENTRIES)
+        self.l2 = l2 if l2 is not None else AsyncRedisCache()
+        self.l1_ttl_sec = l1_ttl_sec or db_config.TIERED_CACHE_L1_TTL_SEC
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key, local tier first
+        :param key:
+        :return:
+        """
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+        value = await self.l2.get(key)
+        if value is not None:
+            self.l1.set(key, value, self.l1_ttl_sec)
+        return value
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        Write the value to Redis and the local tier
+        :param key:
+        :param value:
+        :param expire_time: Expiration time in seconds
+        :return:
+        """
+        await self.l2.set(key, value, expire_time)
+        self.l1.set(key, value, min(expire_time, self.l1_ttl_sec))
+
+    async def delete(self, key: str) -> None:
+        """
+        Remove a key from both tiers
+        :param key:
+        :return:
+        """
+        self.l1.delete(key)
+        await self.l2.delete(key)
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        Get all keys matching the pattern, Redis holds the complete keyspace
+        """
+        return await self.l2.keys(pattern)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], expire_time: int) -> Any:
+        """
+        Get the value of a key, computing and caching it on a miss.
+        Concurrent misses of the same key share a single loader call.
+        :param key:
+        :param loader: Coroutine function producing the value, None results are not cached
+        :param expire_time: Expiration time in seconds
+        :return:
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The coroutine running the loader was cancelled, load again
+                return await self.get_or_load(key, loader, expire_time)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, expire_time)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error; mark it retrieved so an unwaited future does not log it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
@@ -70,6 +70,7 @@ class SaveDataOptionEnum(str, Enum):
     CSV = "csv"
     DB = "db"
     JSON = "json"
+    JSONL = "jsonl"
     SQLITE = "sqlite"
     MONGODB = "mongodb"
     EXCEL = "excel"
@@ -212,7 +213,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             SaveDataOptionEnum,
             typer.Option(
                 "--save_data_option",
-                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database)",
+                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | jsonl=JSON Lines file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database)",
                 rich_help_panel="Storage Configuration",
             ),
         ] = _coerce_enum(
@@ -266,6 +267,14 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="Performance Configuration",
             ),
         ] = config.MAX_CONCURRENCY_NUM,
+        resume: Annotated[
+            bool,
+            typer.Option(
+                "--resume",
+                help="Continue search/creator pagination from the last saved checkpoint instead of starting over",
+                rich_help_panel="Basic Configuration",
+            ),
+        ] = config.RESUME_CRAWL,
     ) -> SimpleNamespace:
         """MediaCrawler 命令行入口"""
 
@@ -292,6 +301,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.COOKIES = cookies
         config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = max_comments_count_singlenotes
         config.MAX_CONCURRENCY_NUM = max_concurrency_num
+        config.RESUME_CRAWL = resume
 
         # Set platform-specific ID lists for detail/creator mode
         if specified_id_list:
@@ -332,6 +342,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             cookies=config.COOKIES,
             specified_id=specified_id,
             creator_id=creator_id,
+            resume=config.RESUME_CRAWL,
         )
 
     command = typer.main.get_command(app)
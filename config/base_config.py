@@ -32,6 +32,85 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"  # kuaidaili | wandouhttp
 
+# 代理可用时间少于该秒数时，在后台提前从提供商拉取并校验新的代理，请求不必等待提供商接口
+IP_PROXY_PREFETCH_SECONDS = 60
+
+# 同一代理连续失败（连接错误或 403/407/429）达到该次数后移出代理池
+IP_PROXY_MAX_CONSECUTIVE_FAILURES = 3
+
+# 代理校验请求的超时时间（秒），候选代理并发校验
+IP_PROXY_VALIDATE_TIMEOUT_SEC = 5
+
+# 代理轮换模式：expire(所有请求共用当前代理，过期后切换) | request(每个请求从代理池中按健康度选取代理)
+IP_PROXY_ROTATION_MODE = "expire"
+
+# request 模式下每隔多少个请求重新选取一次代理，1 表示每个请求都重新选取
+IP_PROXY_ROTATE_EVERY_N_REQUESTS = 1
+
+# request 模式下单个代理 IP 同时进行的最大请求数，0 表示不限制
+# 提高 MAX_CONCURRENCY_NUM 时请求会分散到更多 IP，而不是让单个 IP 更快被封
+IP_PROXY_MAX_CONCURRENCY_PER_IP = 2
+
+# ==================== HTTP 客户端连接池配置 ====================
+# 各平台 API 客户端按（平台, 代理）复用长连接的 httpx.AsyncClient，避免每次请求重新进行 TCP/TLS 握手
+# 单个客户端最大连接数
+HTTPX_MAX_CONNECTIONS = 100
+
+# 单个客户端最多保持的空闲长连接数
+HTTPX_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# 空闲长连接的保持时间（秒）
+HTTPX_KEEPALIVE_EXPIRY = 30
+
+# 是否启用 HTTP/2，需要安装 h2 依赖（pip install h2），未安装时自动回退到 HTTP/1.1
+HTTPX_ENABLE_HTTP2 = False
+
+# ==================== HTTP 响应缓存配置 ====================
+# 是否启用磁盘响应缓存，重复执行 detail / creator 爬取时直接复用已抓取的页面，调试解析和存储逻辑时不必重复请求平台
+ENABLE_RESPONSE_CACHE = False
+
+# 缓存数据库文件路径（SQLite，响应体经 zlib 压缩）
+RESPONSE_CACHE_PATH = "data/.cache/http_response_cache.db"
+
+# 缓存总大小上限（MB），超过后按最近最少读取（LRU）淘汰
+RESPONSE_CACHE_MAX_MB = 512
+
+# 可缓存的接口：URL 正则 -> 缓存时间（秒），只缓存匹配的 GET 请求中状态码为 200 的响应
+RESPONSE_CACHE_TTL_RULES = {
+    r"xiaohongshu\.com/explore/": 7 * 24 * 3600,  # 小红书笔记详情页
+    r"xiaohongshu\.com/user/profile/": 24 * 3600,  # 小红书创作者主页
+    r"zhihu\.com/question/\d+/answer/\d+": 7 * 24 * 3600,  # 知乎回答详情页
+    r"zhuanlan\.zhihu\.com/p/\d+": 7 * 24 * 3600,  # 知乎文章详情页
+    r"zhihu\.com/zvideo/\d+": 7 * 24 * 3600,  # 知乎视频详情页
+    r"zhihu\.com/people/[^/?]+$": 24 * 3600,  # 知乎创作者主页
+    r"tieba\.baidu\.com/p/\d+": 24 * 3600,  # 贴吧帖子详情页
+}
+
+# 页面校验：URL 正则 -> 响应中必须包含的标记，不包含时（验证码、登录页等同样返回 200）不缓存
+RESPONSE_CACHE_REQUIRED_MARKERS = {
+    r"xiaohongshu\.com/explore/": "noteDetailMap",
+    r"xiaohongshu\.com/user/profile/": "window.__INITIAL_STATE__",
+    r"zhihu\.com/": "js-initialData",
+    r"tieba\.baidu\.com/p/\d+": "p_postlist",
+}
+
+# 生成缓存键时忽略的查询参数（每个会话都会变化的签名/令牌参数），缓存键只区分请求是否携带 Cookie，不区分具体登录账号
+RESPONSE_CACHE_IGNORE_PARAMS = ["xsec_token", "xsec_source", "a_bogus", "msToken", "webid", "w_rid", "wts"]
+
+# ==================== 增量爬取配置 ====================
+# 是否启用持久化抓取记录，关键词搜索时跳过最近已抓取过的笔记/视频的详情和评论，已存储的评论也不再重复存储
+ENABLE_CRAWL_FRONTIER = False
+
+# 抓取记录数据库文件路径（SQLite）
+CRAWL_FRONTIER_PATH = "data/.cache/crawl_frontier.db"
+
+# 新鲜度窗口（小时），在此时间内抓取过的内容会被跳过
+CRAWL_FRONTIER_FRESHNESS_HOURS = 24
+
+# 布隆过滤器初始容量和误判率，容量不足时自动扩容
+CRAWL_FRONTIER_BLOOM_CAPACITY = 100000
+CRAWL_FRONTIER_BLOOM_ERROR_RATE = 0.001
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -41,6 +120,14 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
+# ==================== JS 签名进程池配置 ====================
+# 抖音 a_bogus、知乎 x-zse-96 等 JS 签名由常驻的 Node.js 进程计算，避免每次签名都启动新进程并阻塞事件循环
+# 每个签名脚本启动的 Node.js 进程数
+JS_SIGN_WORKER_COUNT = 2
+
+# 单次签名超时时间（秒），超时后会重启对应进程
+JS_SIGN_TIMEOUT_SEC = 5
+
 # ==================== CDP (Chrome DevTools Protocol) 配置 ====================
 # 是否启用CDP模式 - 使用用户现有的Chrome/Edge浏览器进行爬取，提供更好的反检测能力
 # 启用后将自动检测并启动用户的Chrome/Edge浏览器，通过CDP协议进行控制
@@ -70,8 +157,42 @@ BROWSER_LAUNCH_TIMEOUT = 60
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持六种类型：csv、db、json、sqlite、excel、postgres, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json or sqlite or excel or postgres
+# 数据保存类型选项配置,支持七种类型：csv、db、json、jsonl、sqlite、excel、postgres, 最好保存到DB，有排重的功能。
+# jsonl 为追加写入的 JSON Lines 格式，每条数据一行，写入开销不随文件大小增长，适合大批量评论爬取
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite or excel or postgres
+
+# jsonl 模式下，程序退出时是否将 JSONL 文件转换为 JSON 数组文件（data/<平台>/json/<原文件名>.json），兼容旧的数据消费方
+# 如果同名 JSON 文件已存在（同一天 json 模式写入或之前的转换），会合并写入并跳过重复数据
+JSONL_CONVERT_TO_JSON_ON_EXIT = True
+
+# csv 模式下每个文件只打开一次，数据先写入内存缓冲，缓冲达到该大小（字节）或距上次写入超过 CSV_FLUSH_INTERVAL_SEC 秒时写入文件，程序退出时写入剩余数据
+# CSV 表头按平台的数据表结构固定，字段不一致的数据不会错列
+CSV_FLUSH_BYTES = 64 * 1024
+CSV_FLUSH_INTERVAL_SEC = 2
+
+# excel 模式下是否使用流式写入（openpyxl write-only 工作表）：数据逐行写入临时文件，不在内存中保留整个工作簿，适合大批量评论导出
+# 开启后列宽根据每个工作表的前 EXCEL_WIDTH_SAMPLE_ROWS 行计算
+EXCEL_WRITE_ONLY = False
+
+# 流式写入时用于计算列宽的行数
+EXCEL_WIDTH_SAMPLE_ROWS = 500
+
+# 每个工作表最多写入的数据行数，超过后写入新的工作表（如 Comments_2），Excel 单个工作表上限为 1048576 行
+EXCEL_MAX_ROWS_PER_SHEET = 1000000
+
+# 是否开启存储缓冲：数据先进入内存队列，由后台任务批量写入文件/数据库，减少逐条写入的 IO 与数据库往返
+# 注意：进程被强制结束时，队列中尚未写入的数据（最多 STORE_BUFFER_FLUSH_INTERVAL_MS 内的数据）会丢失；
+# 文件/mongodb 的一批写入失败时不会重试（避免重复写入），该批数据只记录日志后丢弃，数据库（db/sqlite/postgres）则逐条重试
+ENABLE_STORE_BUFFER = False
+
+# 每批最多写入的条数，攒够即写入
+STORE_BUFFER_BATCH_SIZE = 100
+
+# 攒批的最长等待时间（毫秒），未满一批也会写入
+STORE_BUFFER_FLUSH_INTERVAL_MS = 1000
+
+# 每类数据（内容/评论/创作者）的缓冲队列上限，队列满时写入方会等待后台写入（背压）
+STORE_BUFFER_QUEUE_SIZE = 1000
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%schrome_user_data"  # %s will be replaced by platform name
@@ -79,6 +200,22 @@ USER_DATA_DIR = "%schrome_user_data"  # %s will be replaced by platform name
 # 爬取开始页数 默认从第一页开始
 START_PAGE = 1
 
+# 断点保存：开启后搜索页码、日期、创作者分页游标以及已完成的帖子会定期保存到断点文件（开启时从头爬取会覆盖旧的断点文件）
+# 关闭时不读写断点文件，RESUME_CRAWL 开启时自动保存
+ENABLE_CRAWL_CHECKPOINT = False
+
+# 断点续爬：设置为True（或命令行 --resume）时从上次保存的位置继续爬取，并跳过上次已完成的帖子
+RESUME_CRAWL = False
+
+# 断点文件目录，每个平台和爬取类型一个文件
+CHECKPOINT_DIR = "data/.checkpoint"
+
+# 断点文件最短保存间隔（秒），程序退出时会再保存一次
+CHECKPOINT_SAVE_INTERVAL_SEC = 10
+
+# 单个帖子最多尝试的次数（跨多次续爬累计），超过后视为永久失败（如帖子已删除）不再重试，所在页码可以继续推进
+CHECKPOINT_MAX_NOTE_ATTEMPTS = 3
+
 # 爬取视频/帖子的数量控制
 CRAWLER_MAX_NOTES_COUNT = 15
 
@@ -88,6 +225,39 @@ MAX_CONCURRENCY_NUM = 1
 # 是否开启爬媒体模式（包含图片或视频资源），默认不开启爬媒体
 ENABLE_GET_MEIDAS = False
 
+# 媒体文件以流式分块写入磁盘（先写入 .part 临时文件，下载完成后重命名），每次读取/写入的块大小（字节）
+MEDIA_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# 是否通过 HTTP Range 请求续传上次中断留下的 .part 文件
+ENABLE_MEDIA_RANGE_RESUME = True
+
+# 支持分段下载的平台（如 B站 视频），文件达到该大小（MB）才并发分段下载
+MEDIA_SEGMENT_MIN_MB = 16
+
+# 所有媒体下载的总带宽上限（KB/s），0 表示不限制
+MEDIA_DOWNLOAD_MAX_KBPS = 0
+
+# 是否使用独立的媒体下载队列：爬取任务只把媒体 URL 加入持久化队列，由后台下载协程下载，不阻塞数据爬取
+# 文件按内容哈希只保存一份（MEDIA_STORE_DIR/objects），原保存路径（如 data/xhs/images/<笔记ID>/0.jpg）为指向它的软链接
+# 注意：软链接为相对路径，单独复制或打包 data/<平台> 目录时链接会失效，需要连同 MEDIA_STORE_DIR 一起复制
+# 关闭（默认）时在爬取任务中直接下载到原保存路径
+ENABLE_MEDIA_DOWNLOAD_POOL = False
+
+# 媒体下载队列数据库路径，未下载完的媒体在下次运行时继续下载
+MEDIA_POOL_DB_PATH = "data/.cache/media_jobs.db"
+
+# 按内容哈希保存媒体文件的目录
+MEDIA_STORE_DIR = "data/media"
+
+# 媒体下载并发数
+MEDIA_DOWNLOAD_CONCURRENCY = 2
+
+# 单个媒体最多下载次数，失败后按指数退避重试
+MEDIA_DOWNLOAD_MAX_ATTEMPTS = 3
+
+# 首次重试前的等待时间（秒），之后每次翻倍
+MEDIA_DOWNLOAD_RETRY_BASE_SEC = 5
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = False
 
@@ -117,6 +287,34 @@ FONT_PATH = "./docs/STZHONGS.TTF"
 # 爬取间隔时间
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# ==================== 请求限速配置 ====================
+# 是否启用令牌桶限速：在客户端请求层按 平台+接口类型 控制请求速率，爬取任务在持有并发信号量时不再休眠 CRAWLER_MAX_SLEEP_SEC
+# 关闭（默认）时保持旧行为：每个任务完成请求后休眠 CRAWLER_MAX_SLEEP_SEC
+ENABLE_RATE_LIMIT = False
+
+# 各接口类型的限速：(每秒请求数, 突发请求数)，每秒请求数为 0 表示不限速
+# 设置为 None 时按 CRAWLER_MAX_SLEEP_SEC 推算：每 CRAWLER_MAX_SLEEP_SEC 秒一个请求、不允许突发，与关闭限速时的节奏一致
+RATE_LIMITS = {
+    "search": None,  # 搜索/列表接口
+    "detail": None,  # 详情及其他接口
+    "comments": None,  # 评论接口
+    "media": (4, 4),  # 图片/视频下载
+}
+
+# 按平台覆盖的限速配置，例如 {"xhs": {"comments": (0.5, 1)}}
+RATE_LIMITS_PER_PLATFORM = {}
+
+# 根据请求 URL 判断接口类型的正则，按顺序匹配，均未匹配时为 detail
+RATE_LIMIT_ENDPOINT_PATTERNS = {
+    "comments": r"comment|/reply|hotflow",
+    "search": r"search",
+}
+
+# ==================== 爬取流水线配置 ====================
+# 关键词搜索按 搜索分页 -> 详情 -> 存储 -> 媒体 -> 评论 分阶段并发执行，每个阶段之间队列的最大长度
+# 下游阶段处理不过来时上游会等待，避免一次性缓存过多数据
+CRAWL_PIPELINE_QUEUE_SIZE = 20
+
 from .bilibili_config import *
 from .dy_config import *
 from .ks_config import *
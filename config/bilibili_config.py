@@ -46,6 +46,9 @@ BILI_CREATOR_ID_LIST = [
 START_DAY = "2024-01-01"
 END_DAY = "2024-01-01"
 
+# WBI 签名密钥缓存时间（秒），密钥约每天轮换一次，过期或签名被拒绝时在后台刷新
+BILI_WBI_KEYS_TTL_SEC = 6 * 3600
+
 # 搜索模式
 BILI_SEARCH_MODE = "normal"
 
@@ -54,6 +57,9 @@ BILI_SEARCH_MODE = "normal"
 # 注意：更高清晰度需要账号/视频本身支持
 BILI_QN = 80
 
+# 下载视频时并发分段请求（HTTP Range）的段数，文件小于 MEDIA_SEGMENT_MIN_MB 时不分段，设为 1 关闭分段下载
+BILI_VIDEO_DOWNLOAD_SEGMENTS = 4
+
 # 是否爬取用户信息
 CREATOR_MODE = True
 
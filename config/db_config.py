@@ -41,17 +41,32 @@ REDIS_DB_HOST = os.getenv("REDIS_DB_HOST", "127.0.0.1")  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))  # max connections of the async redis pool
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
+CACHE_TYPE_REDIS_ASYNC = "redis_async"
 CACHE_TYPE_MEMORY = "memory"
+CACHE_TYPE_TIERED = "tiered"
+
+# redis cache value serializer: pickle | json | msgpack
+# json / msgpack only accept JSON compatible values but are smaller and readable outside python
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "pickle")
+
+# tiered cache: in-process L1 in front of redis L2
+# a local entry lives at most this many seconds, bounding staleness across workers
+TIERED_CACHE_L1_TTL_SEC = int(os.getenv("TIERED_CACHE_L1_TTL_SEC", 30))
+TIERED_CACHE_L1_MAX_ENTRIES = int(os.getenv("TIERED_CACHE_L1_MAX_ENTRIES", 10000))
 
 # sqlite config
 SQLITE_DB_PATH = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db"
 )
 
-sqlite_db_config = {"db_path": SQLITE_DB_PATH}
+# Milliseconds a connection waits for a write lock before raising "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 30000))
+
+sqlite_db_config = {"db_path": SQLITE_DB_PATH, "busy_timeout_ms": SQLITE_BUSY_TIMEOUT_MS}
 
 # mongodb config
 MONGODB_HOST = os.getenv("MONGODB_HOST", "localhost")
@@ -82,3 +97,16 @@ postgres_db_config = {
     "port": POSTGRES_DB_PORT,
     "db_name": POSTGRES_DB_NAME,
 }
+
+# sqlalchemy connection pool config (mysql / postgres)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))  # connections kept open in the pool
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))  # extra connections allowed under load
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds before a connection is replaced, keep below the server's wait_timeout
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # test connections on checkout
+
+db_pool_config = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
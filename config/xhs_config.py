@@ -23,6 +23,12 @@
 # 排序方式，具体的枚举值在media_platform/xhs/field.py中
 SORT_TYPE = "popularity_descending"
 
+# 签名页面数量：每个页面独立执行 window.mnsv2 签名，多个页面并行签名，MAX_CONCURRENCY_NUM 较大时可适当调高
+XHS_SIGN_PAGE_COUNT = 1
+
+# 单次 page.evaluate 最多批量签名的请求数，并发请求会合并到一次浏览器调用中签名
+XHS_SIGN_BATCH_SIZE = 16
+
 # 指定笔记URL列表, 必须要携带xsec_token参数
 XHS_SPECIFIED_NOTE_URL_LIST = [
     "https://www.xiaohongshu.com/explore/64b95d01000000000c034587?xsec_token=AB0EFqJvINCkj6xOCKCQgfNNh8GdnBC_6XecG4QOddo3Q=&xsec_source=pc_cfeed"
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/database/bulk_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Dialect-aware bulk upsert for the SQL stores (MySQL / PostgreSQL / SQLite)
+
+Rows are matched on the model's natural key, i.e. the unique index declared in
+database/models.py (note_id, comment_id, aweme_id, video_id, user_id, ...):
+
+- MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+- PostgreSQL / SQLite: INSERT ... ON CONFLICT (key) DO UPDATE
+
+Databases created before the unique indexes were declared cannot be used as a
+conflict target, for those tables the upsert falls back to one SELECT ... IN for
+the whole batch followed by a bulk INSERT and an executemany UPDATE.
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, inspect, select, tuple_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import Table, UniqueConstraint
+
+# Columns written on insert only, never overwritten by an update
+INSERT_ONLY_COLUMNS = ("add_ts",)
+
+# Upper bound of bind parameters per statement for each dialect
+_MAX_BIND_PARAMS = {
+    "sqlite": 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999,
+    "mysql": 65535,
+    "postgresql": 32767,
+}
+
+# (database url, table name) -> whether the natural key has a unique index in the actual database
+_conflict_target_cache: Dict[Tuple[str, str], bool] = {}
+
+
+def get_natural_key(model) -> Tuple[str, ...]:
+    """
+    Natural key of a model: the columns of its first unique index / constraint other than the primary key
+    """
+    table: Table = model.__table__
+    for column in table.columns:
+        if column.unique and not column.primary_key:
+            return (column.name,)
+    for index in table.indexes:
+        if index.unique:
+            return tuple(column.name for column in index.columns)
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            return tuple(column.name for column in constraint.columns)
+    raise ValueError(f"[bulk_upsert] Model {model.__name__} has no unique natural key")
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    model,
+    rows: Iterable[Dict],
+    update_columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Insert or update many rows of one model, keyed on its natural key
+
+    Args:
+        session: database session, the caller commits
+        model: ORM model class from database/models.py
+        rows: row dicts, keys that are not columns of the model are ignored
+        update_columns: columns to overwrite when the row already exists,
+            defaults to every given column except the key and INSERT_ONLY_COLUMNS
+
+    Returns:
+        number of rows written after de-duplication
+    """
+    table: Table = model.__table__
+    key_columns = get_natural_key(model)
+    rows = _dedupe_rows(table, key_columns, rows)
+    if not rows:
+        return 0
+
+    if await _has_conflict_target(session, table, key_columns):
+        for group in _group_by_columns(rows):
+            for chunk in _chunks(group, _chunk_size(session, len(group[0]))):
+                await session.execute(_build_upsert(session, table, key_columns, chunk, update_columns))
+    else:
+        await _select_then_write(session, table, key_columns, rows, update_columns)
+    return len(rows)
+
+
+def _dedupe_rows(table: Table, key_columns: Sequence[str], rows: Iterable[Dict]) -> List[Dict]:
+    """
+    Drop unknown columns and keep the last row per key, PostgreSQL rejects a
+    statement that would update the same row twice
+    """
+    column_names = set(table.columns.keys())
+    deduped: Dict[Tuple, Dict] = {}
+    for row in rows:
+        clean = {k: v for k, v in row.items() if k in column_names and k != "id"}
+        for k in key_columns:
+            clean[k] = _coerce_key(table.c[k], clean.get(k))
+        key = tuple(clean[k] for k in key_columns)
+        if any(v is None for v in key):
+            continue
+        deduped.pop(key, None)
+        deduped[key] = clean
+    return list(deduped.values())
+
+
+def _coerce_key(column, value):
+    """Key values arrive as str or int depending on the platform API, match the column type"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type):
+        return value
+    try:
+        return python_type(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _group_by_columns(rows: List[Dict]) -> List[List[Dict]]:
+    """A multi-row VALUES clause needs the same columns in every row"""
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return list(groups.values())
+
+
+def _chunk_size(session: AsyncSession, column_count: int) -> int:
+    max_params = _MAX_BIND_PARAMS.get(session.bind.dialect.name, 999)
+    return max(1, max_params // max(1, column_count))
+
+
+def _chunks(rows: List[Dict], size: int) -> Iterable[List[Dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _resolve_update_columns(
+    row_columns: Iterable[str], key_columns: Sequence[str], update_columns: Optional[Sequence[str]]
+) -> List[str]:
+    row_columns = list(row_columns)
+    if update_columns is not None:
+        return [c for c in update_columns if c in row_columns]
+    return [c for c in row_columns if c not in key_columns and c not in INSERT_ONLY_COLUMNS]
+
+
+def _build_upsert(
+    session: AsyncSession,
+    table: Table,
+    key_columns: Sequence[str],
+    rows: List[Dict],
+    update_columns: Optional[Sequence[str]],
+):
+    dialect = session.bind.dialect.name
+    columns = _resolve_update_columns(rows[0].keys(), key_columns, update_columns)
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(rows)
+        # ON DUPLICATE KEY UPDATE needs at least one assignment, a self assignment is a no-op
+        assignments = {c: stmt.inserted[c] for c in columns} or {key_columns[0]: stmt.inserted[key_columns[0]]}
+        return stmt.on_duplicate_key_update(assignments)
+
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table).values(rows)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table).values(rows)
+    else:
+        raise ValueError(f"[bulk_upsert] Unsupported dialect: {dialect}")
+
+    if not columns:
+        return stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+    return stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={c: stmt.excluded[c] for c in columns},
+    )
+
+
+async def _has_conflict_target(session: AsyncSession, table: Table, key_columns: Sequence[str]) -> bool:
+    """Whether the actual database has a unique index / constraint on exactly the key columns"""
+    cache_key = (str(session.bind.url), table.name)
+    if cache_key not in _conflict_target_cache:
+
+        def _inspect(sync_session) -> bool:
+            inspector = inspect(sync_session.connection())
+            wanted = set(key_columns)
+            for index in inspector.get_indexes(table.name):
+                if index.get("unique") and set(index["column_names"]) == wanted:
+                    return True
+            for constraint in inspector.get_unique_constraints(table.name):
+                if set(constraint["column_names"]) == wanted:
+                    return True
+            pk = inspector.get_pk_constraint(table.name)
+            return set(pk.get("constrained_columns") or []) == wanted
+
+        _conflict_target_cache[cache_key] = await session.run_sync(_inspect)
+    return _conflict_target_cache[cache_key]
+
+
+async def _select_then_write(
+    session: AsyncSession,
+    table: Table,
+    key_columns: Sequence[str],
+    rows: List[Dict],
+    update_columns: Optional[Sequence[str]],
+):
+    """Fallback for tables without a unique natural key: one existence query per chunk instead of per row"""
+    key_cols = [table.c[k] for k in key_columns]
+    key_expr = key_cols[0] if len(key_cols) == 1 else tuple_(*key_cols)
+    chunk_size = _chunk_size(session, len(key_columns))
+
+    existing = set()
+    for chunk in _chunks(rows, chunk_size):
+        keys = [tuple(row[k] for k in key_columns) for row in chunk]
+        in_values = [k[0] for k in keys] if len(key_cols) == 1 else keys
+        result = await session.execute(select(*key_cols).where(key_expr.in_(in_values)))
+        existing.update(tuple(r) for r in result.all())
+
+    new_rows = [row for row in rows if tuple(row[k] for k in key_columns) not in existing]
+    old_rows = [row for row in rows if tuple(row[k] for k in key_columns) in existing]
+
+    for group in _group_by_columns(new_rows):
+        for chunk in _chunks(group, _chunk_size(session, len(group[0]))):
+            await session.execute(table.insert().values(chunk))
+
+    for group in _group_by_columns(old_rows):
+        columns = _resolve_update_columns(group[0].keys(), key_columns, update_columns)
+        if not columns:
+            continue
+        stmt = (
+            update(table)
+            .where(*[table.c[k] == bindparam(f"_key_{k}") for k in key_columns])
+            .values({c: bindparam(f"_val_{c}") for c in columns})
+        )
+        params = [
+            {**{f"_key_{k}": row[k] for k in key_columns}, **{f"_val_{c}": row[c] for c in columns}}
+            for row in group
+        ]
+        await session.execute(stmt, params)
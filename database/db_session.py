@@ -16,17 +16,24 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
 from .models import Base
 import config
-from config.db_config import mysql_db_config, sqlite_db_config, postgres_db_config
+from config.db_config import mysql_db_config, sqlite_db_config, postgres_db_config, db_pool_config
 
 # Keep a cache of engines
 _engines = {}
 
+# One session factory per engine, keyed like _engines
+_session_factories = {}
+
+# Session shared by every get_session() call inside batch_session()
+_batch_session: ContextVar[Optional[AsyncSession]] = ContextVar("batch_session", default=None)
+
 
 async def create_database_if_not_exists(db_type: str):
     if db_type == "mysql" or db_type == "db":
@@ -57,7 +64,7 @@ def get_async_engine(db_type: str = None):
     if db_type in _engines:
         return _engines[db_type]
 
-    if db_type in ["json", "csv"]:
+    if db_type in ["json", "jsonl", "csv"]:
         return None
 
     if db_type == "sqlite":
@@ -69,11 +76,53 @@ def get_async_engine(db_type: str = None):
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
-    engine = create_async_engine(db_url, echo=False)
+    if db_type == "sqlite":
+        engine = create_async_engine(db_url, echo=False)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_async_engine(db_url, echo=False, **db_pool_config)
     _engines[db_type] = engine
     return engine
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the writer, synchronous=NORMAL is safe under WAL and
+    skips an fsync per commit, busy_timeout makes concurrent writers wait instead of
+    failing with "database is locked"
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(sqlite_db_config['busy_timeout_ms'])}")
+    cursor.close()
+
+
+def get_session_factory(db_type: str = None) -> Optional[async_sessionmaker]:
+    if db_type is None:
+        db_type = config.SAVE_DATA_OPTION
+
+    if db_type in _session_factories:
+        return _session_factories[db_type]
+
+    engine = get_async_engine(db_type)
+    if not engine:
+        return None
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    _session_factories[db_type] = factory
+    return factory
+
+
+async def close_engines():
+    """
+    Dispose every cached engine and its connection pool
+    """
+    _session_factories.clear()
+    while _engines:
+        _, engine = _engines.popitem()
+        await engine.dispose()
+
+
 async def create_tables(db_type: str = None):
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
@@ -86,12 +135,16 @@ async def create_tables(db_type: str = None):
 
 @asynccontextmanager
 async def get_session() -> AsyncSession:
-    engine = get_async_engine(config.SAVE_DATA_OPTION)
-    if not engine:
+    batch = _batch_session.get()
+    if batch is not None:
+        # Inside batch_session(): reuse its session, commit happens when the batch ends
+        yield batch
+        return
+    session_factory = get_session_factory(config.SAVE_DATA_OPTION)
+    if not session_factory:
         yield None
         return
-    AsyncSessionFactory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    session = AsyncSessionFactory()
+    session = session_factory()
     try:
         yield session
         await session.commit()
@@ -100,3 +153,22 @@ async def get_session() -> AsyncSession:
         raise e
     finally:
         await session.close()
+
+
+@asynccontextmanager
+async def batch_session() -> AsyncSession:
+    """
+    Run every get_session() call inside the block on one session and commit once at the end,
+    so storing N rows costs one connection checkout and one commit instead of N.
+    Any error rolls back the whole batch.
+    """
+    batch = _batch_session.get()
+    if batch is not None:
+        yield batch
+        return
+    async with get_session() as session:
+        token = _batch_session.set(session)
+        try:
+            yield session
+        finally:
+            _batch_session.reset(token)
@@ -18,7 +18,10 @@
 
 """MongoDB storage base class: Provides connection management and common storage methods"""
 import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Dict, List, Optional
+from pymongo import UpdateOne
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
 from config import db_config
 from tools import utils
@@ -88,6 +91,29 @@ class MongoDBConnection:
 class MongoDBStoreBase:
     """MongoDB storage base class: Provides common CRUD operations"""
 
+    # Deferred upserts per collection name while inside batch_write()
+    _batch_ops: ContextVar[Optional[Dict[str, List[UpdateOne]]]] = ContextVar("mongodb_batch_ops", default=None)
+
+    @classmethod
+    @asynccontextmanager
+    async def batch_write(cls):
+        """Defer save_or_update calls in the block and send them as one bulk_write per collection"""
+        if cls._batch_ops.get() is not None:
+            yield
+            return
+        pending: Dict[str, List[UpdateOne]] = {}
+        token = cls._batch_ops.set(pending)
+        try:
+            yield
+        finally:
+            cls._batch_ops.reset(token)
+        if not pending:
+            return
+        db = await MongoDBConnection().get_db()
+        for collection_name, ops in pending.items():
+            # ordered=True keeps "last write wins" when one batch touches the same document twice
+            await db[collection_name].bulk_write(ops, ordered=True)
+
     def __init__(self, collection_prefix: str):
         """Initialize storage base class
         Args:
@@ -104,6 +130,11 @@ class MongoDBStoreBase:
 
     async def save_or_update(self, collection_suffix: str, query: Dict, data: Dict) -> bool:
         """Save or update data (upsert)"""
+        pending = self._batch_ops.get()
+        if pending is not None:
+            collection_name = f"{self.collection_prefix}_{collection_suffix}"
+            pending.setdefault(collection_name, []).append(UpdateOne(query, {"$set": data}, upsert=True))
+            return True
         try:
             collection = await self.get_collection(collection_suffix)
             await collection.update_one(query, {"$set": data}, upsert=True)
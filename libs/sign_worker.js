@@ -0,0 +1,49 @@
+// Long-lived signing worker used by tools/js_sign_pool.py
+// 仅供学习交流使用，严禁用于商业用途
+//
+// Usage: node sign_worker.js <script.js>
+// Loads the signing script once, then answers newline-delimited JSON requests on stdin:
+//   request:  {"id": 1, "fn": "sign_datail", "args": ["a=1", "Mozilla/5.0 ..."]}
+//   response: {"id": 1, "result": "..."} or {"id": 1, "error": "..."}
+
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+// stdout carries the protocol, route script logging to stderr
+const write = process.stdout.write.bind(process.stdout);
+console.log = console.info = console.warn = console.error;
+
+function send(message) {
+    write(JSON.stringify(message) + '\n');
+}
+
+// Signing scripts use require() and declare their functions at the top level, like PyExecJS runs them
+globalThis.require = require;
+const source = fs.readFileSync(process.argv[2], 'utf-8').replace(/^﻿/, '');
+vm.runInThisContext(source, {filename: process.argv[2]});
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', (line) => {
+    if (!line.trim()) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+    try {
+        const fn = globalThis[request.fn];
+        if (typeof fn !== 'function') {
+            throw new Error(`function ${request.fn} not found`);
+        }
+        send({id: request.id, result: fn.apply(null, request.args || [])});
+    } catch (e) {
+        send({id: request.id, error: String(e && e.stack || e)});
+    }
+});
+rl.on('close', () => process.exit(0));
+
+send({ready: true});
@@ -43,7 +43,17 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from cache.async_redis_cache import AsyncRedisCache
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
+from tools.http_client_pool import HttpClientPool
+from tools.js_sign_pool import JsSignPool
+from tools.response_cache import HttpResponseCache
+from tools.crawl_frontier import CrawlFrontier
+from tools.crawl_checkpoint import CrawlCheckpoint
+from tools.media_download_pool import MediaDownloadPool
 from tools.async_file_writer import AsyncFileWriter
+from tools.csv_sink import CsvSink
 from var import crawler_type_var
 
 
@@ -83,12 +93,24 @@ def _flush_excel_if_needed() -> None:
         print(f"[Main] Error flushing Excel data: {e}")
 
 
+def _convert_jsonl_if_needed() -> None:
+    if config.SAVE_DATA_OPTION != "jsonl" or not config.JSONL_CONVERT_TO_JSON_ON_EXIT:
+        return
+
+    try:
+        converted = AsyncFileWriter.convert_jsonl_to_json()
+        if converted:
+            print(f"[Main] Converted {len(converted)} JSONL file(s) to JSON")
+    except Exception as e:
+        print(f"[Main] Error converting JSONL files: {e}")
+
+
 async def _generate_wordcloud_if_needed() -> None:
-    if config.SAVE_DATA_OPTION != "json" or not config.ENABLE_GET_WORDCLOUD:
+    if config.SAVE_DATA_OPTION not in ("json", "jsonl") or not config.ENABLE_GET_WORDCLOUD:
         return
 
     try:
-        file_writer = AsyncFileWriter(
+        file_writer = AsyncFileWriter.get_instance(
             platform=config.PLATFORM,
             crawler_type=crawler_type_var.get(),
         )
@@ -109,10 +131,13 @@ async def main() -> None:
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
     await crawler.start()
 
+    # Buffered items must reach the stores before the Excel flush and wordcloud below
+    await BufferedStore.flush_all()
+
     _flush_excel_if_needed()
 
     # Generate wordcloud after crawling is complete
-    # Only for JSON save mode
+    # Only for JSON / JSONL save mode
     await _generate_wordcloud_if_needed()
 
 
@@ -135,7 +160,29 @@ async def async_cleanup() -> None:
                 if "closed" not in error_msg and "disconnected" not in error_msg:
                     print(f"[Main] Error closing browser context: {e}")
 
-    if config.SAVE_DATA_OPTION in ("db", "sqlite"):
+    await MediaDownloadPool.close_all()
+
+    await BufferedStore.close_all()
+
+    await StoreRegistry.close_all()
+
+    CsvSink.close_all()
+
+    await HttpClientPool.close_all()
+
+    await JsSignPool.close_all()
+
+    await AsyncRedisCache.close_all()
+
+    await HttpResponseCache.close_all()
+
+    await CrawlFrontier.close_all()
+
+    CrawlCheckpoint.close_all()
+
+    _convert_jsonl_if_needed()
+
+    if config.SAVE_DATA_OPTION in ("db", "sqlite", "postgres"):
         await db.close()
 
 if __name__ == "__main__":
@@ -27,12 +27,11 @@ import random
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
 
 if TYPE_CHECKING:
@@ -40,7 +39,10 @@ if TYPE_CHECKING:
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
-from .help import BilibiliSign
+from .help import BilibiliWbiKeyCache
+
+# WBI signature rejected, the cached keys are refreshed
+WBI_REJECT_CODES = (-403, -352)
 
 
 class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
@@ -61,20 +63,19 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self._wbi_keys = BilibiliWbiKeyCache(self.get_wbi_keys, config.BILI_WBI_KEYS_TTL_SEC)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
     async def request(self, method, url, **kwargs) -> Any:
-        # Check if proxy has expired before each request
-        await self._refresh_proxy_if_expired()
-
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self._send_request(method, url, timeout=self.timeout, **kwargs)
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
             utils.logger.error(f"[BilibiliClient.request] Failed to decode JSON from response. status_code: {response.status_code}, response_text: {response.text}")
             raise DataFetchError(f"Failed to decode JSON, content: {response.text}")
+        if data.get("code") in WBI_REJECT_CODES:
+            self._wbi_keys.invalidate()
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -90,16 +91,24 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        signer = await self._wbi_keys.get_signer()
+        return signer.sign(req_data)
 
-    async def get_wbi_keys(self) -> Tuple[str, str]:
+    async def get_wbi_keys(self, from_server: bool = False) -> Tuple[str, str]:
         """
         Get the latest img_key and sub_key
+        :param from_server: Skip the copy cached in the page's localStorage and ask /x/web-interface/nav,
+            used when the cached keys expired or a signature was rejected
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        wbi_img_urls = local_storage.get("wbi_img_urls", "")
+        if from_server:
+            img_url, sub_url = await self._get_nav_wbi_urls()
+            return img_url.rsplit('/', 1)[1].split('.')[0], sub_url.rsplit('/', 1)[1].split('.')[0]
+        local_storage = await self.playwright_page.evaluate(
+            "() => ({wbi_img_urls: localStorage.getItem('wbi_img_urls'), "
+            "wbi_img_url: localStorage.getItem('wbi_img_url'), wbi_sub_url: localStorage.getItem('wbi_sub_url')})"
+        )
+        wbi_img_urls = local_storage.get("wbi_img_urls") or ""
         if not wbi_img_urls:
             img_url_from_storage = local_storage.get("wbi_img_url")
             sub_url_from_storage = local_storage.get("wbi_sub_url")
@@ -108,13 +117,24 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
         else:
-            resp = await self.request(method="GET", url=self._host + "/x/web-interface/nav")
-            img_url: str = resp['wbi_img']['img_url']
-            sub_url: str = resp['wbi_img']['sub_url']
+            img_url, sub_url = await self._get_nav_wbi_urls()
         img_key = img_url.rsplit('/', 1)[1].split('.')[0]
         sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
         return img_key, sub_key
 
+    async def _get_nav_wbi_urls(self) -> Tuple[str, str]:
+        """
+        Current WBI key image URLs from /x/web-interface/nav. The endpoint answers -101 when
+        not logged in but still carries wbi_img, so the code is not checked.
+        :return: (img_url, sub_url)
+        """
+        response = await self._send_request("GET", self._host + "/x/web-interface/nav", timeout=self.timeout, headers=self.headers)
+        try:
+            wbi_img = response.json()["data"]["wbi_img"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            raise DataFetchError(f"No wbi_img in nav response: {response.text}")
+        return wbi_img["img_url"], wbi_img["sub_url"]
+
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
         final_uri = uri
         if enable_params_sign:
@@ -220,21 +240,25 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
 
         return await self.get(uri, params, enable_params_sign=True)
 
-    async def get_video_media(self, url: str) -> Union[bytes, None]:
-        # Follow CDN 302 redirects and treat any 2xx as success (some endpoints return 206)
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-                response.raise_for_status()
-                if 200 <= response.status_code < 300:
-                    return response.content
-                utils.logger.error(
-                    f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
-                )
-                return None
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # Keep original exception type name for developer debugging
-                return None
+    async def download_video_media(self, url: str, file_path: str, total_size: Optional[int] = None) -> bool:
+        """
+        Stream a video to file_path, large files are fetched as BILI_VIDEO_DOWNLOAD_SEGMENTS parallel ranges
+        Args:
+            url: Video URL from durl
+            file_path: Destination file
+            total_size: File size from durl, saves a probe request
+
+        Returns:
+            Whether the file was downloaded
+        """
+        return await self._stream_media(
+            url,
+            file_path,
+            follow_redirects=True,
+            headers=self.headers,
+            segments=config.BILI_VIDEO_DOWNLOAD_SEGMENTS,
+            total_size=total_size,
+        )
 
     async def get_video_comments(
         self,
@@ -252,6 +276,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         post_data = {"oid": video_id, "mode": order_mode.value, "type": 1, "ps": 20, "next": next}
         return await self.get(uri, post_data)
 
+    @sticky_proxy("video_id")
     async def get_video_all_comments(
         self,
         video_id: str,
@@ -26,7 +26,7 @@ import asyncio
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple, Union
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import pandas as pd
 
@@ -45,6 +45,11 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import CrawlCheckpoint, SearchProgress
+from tools.crawl_frontier import get_crawl_frontier
+from tools.crawl_pipeline import CrawlPipeline
+from tools.media_download_pool import MediaDownloadPool, start_media_download_pool
+from tools.rate_limiter import get_crawl_interval
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -65,6 +70,8 @@ class BilibiliCrawler(AbstractCrawler):
         self.user_agent = utils.get_user_agent()
         self.cdp_manager = None
         self.ip_proxy_pool = None  # Proxy IP pool for automatic proxy refresh
+        self.frontier = get_crawl_frontier("bili")  # Seen videos / comments for incremental runs
+        self.media_pool: Optional[MediaDownloadPool] = None  # Background media downloads
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -96,6 +103,7 @@ class BilibiliCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
+            self.media_pool = await start_media_download_pool("bili", self.bili_client.download_video_media)
             if not await self.bili_client.pong():
                 login_obj = BilibiliLogin(
                     login_type=config.LOGIN_TYPE,
@@ -127,6 +135,8 @@ class BilibiliCrawler(AbstractCrawler):
                     await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
             else:
                 pass
+            if self.media_pool:
+                await self.media_pool.join()
             utils.logger.info("[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
     async def search(self):
@@ -178,18 +188,33 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def search_by_keywords(self):
         """
-        search bilibili video with keywords in normal mode
+        search bilibili video with keywords in normal mode, as a pipeline (search pages -> detail -> persist ->
+        media -> comments) so the next search page is fetched while the videos of the current one are processed
         :return:
         """
         utils.logger.info("[BilibiliCrawler.search_by_keywords] Begin search bilibli keywords")
+        checkpoint = CrawlCheckpoint.get_instance("bili", "search")
+        progress: Dict[str, SearchProgress] = {}
+        await self._run_search_pipeline(self._search_video_items(checkpoint, progress), progress)
+
+    async def _search_video_items(self, checkpoint: CrawlCheckpoint, progress: Dict[str, SearchProgress]) -> AsyncIterator[Dict]:
+        """
+        Page through the search results of every keyword and yield their video items
+        """
         bili_limit_count = 20  # bilibili limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
         start_page = config.START_PAGE  # start page number
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
+            scope = f"keyword:{keyword}"
+            if checkpoint.is_done(scope):
+                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Keyword {keyword} already finished, skip")
+                continue
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
-            page = 1
+            keyword_progress = progress[scope] = SearchProgress(checkpoint, scope)
+            page = checkpoint.get_cursor(scope).get("page", 1)
+            finished = True
             while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
@@ -197,82 +222,94 @@ class BilibiliCrawler(AbstractCrawler):
                     continue
 
                 utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
-                videos_res = await self.bili_client.search_video_by_keyword(
-                    keyword=keyword,
-                    page=page,
-                    page_size=bili_limit_count,
-                    order=SearchOrderType.DEFAULT,
-                    pubtime_begin_s=0,  # Publish date start timestamp
-                    pubtime_end_s=0,  # Publish date end timestamp
-                )
+                try:
+                    videos_res = await self.bili_client.search_video_by_keyword(
+                        keyword=keyword,
+                        page=page,
+                        page_size=bili_limit_count,
+                        order=SearchOrderType.DEFAULT,
+                        pubtime_begin_s=0,  # Publish date start timestamp
+                        pubtime_end_s=0,  # Publish date end timestamp
+                    )
+                except DataFetchError as e:
+                    utils.logger.error(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword} failed: {e}")
+                    finished = False
+                    break
                 video_list: List[Dict] = videos_res.get("result")
 
                 if not video_list:
                     utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
                     break
-
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = []
-                try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                except Exception as e:
-                    utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
+                video_list = [video_item for video_item in video_list if not checkpoint.is_completed(video_item.get("aid"))]
+                if self.frontier:
+                    video_list = await self.frontier.filter_unseen(self.frontier.note_kind(), video_list, key=lambda item: item.get("aid"))
+                keyword_progress.page_fetched(page, len(video_list))
+                for video_item in video_list:
+                    yield {"scope": scope, "page": page, "aid": video_item.get("aid")}
                 page += 1
 
                 # Sleep after page navigation
                 await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-
-                await self.batch_get_video_comments(video_id_list)
+            keyword_progress.source_finished(finished)
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
         Search bilibili video with keywords in a given time range.
+        Video details are fetched page by page so the per day and total limits only count videos that exist,
+        storage, media and comments run as a pipeline behind the search.
         :param daily_limit: if True, strictly limit the number of notes per day and total.
         """
         utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Begin search with daily_limit={daily_limit}")
+        checkpoint = CrawlCheckpoint.get_instance("bili", "search")
+        progress: Dict[str, SearchProgress] = {}
+        await self._run_search_pipeline(self._search_video_items_in_time_range(checkpoint, progress, daily_limit), progress)
+
+    async def _search_video_items_in_time_range(
+        self,
+        checkpoint: CrawlCheckpoint,
+        progress: Dict[str, SearchProgress],
+        daily_limit: bool,
+    ) -> AsyncIterator[Dict]:
+        """
+        Page through the search results of every keyword and day and yield their video details
+        """
         bili_limit_count = 20
-        start_page = config.START_PAGE
+        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
 
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
+            keyword_scope = f"keyword:{keyword}:{config.START_DAY}~{config.END_DAY}"
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
-            total_notes_crawled_for_keyword = 0
+            total_notes_crawled_for_keyword = checkpoint.get_cursor(keyword_scope).get("total", 0)
 
             for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
-                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                    utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
-                    break
+                day_scope = f"keyword:{keyword}:day:{day.strftime('%Y-%m-%d')}"
+                if checkpoint.is_done(day_scope):
+                    continue
 
-                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                if total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT:
                     utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
                     break
 
                 pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime("%Y-%m-%d"), end=day.strftime("%Y-%m-%d"))
-                page = 1
-                notes_count_this_day = 0
+                day_progress = progress[day_scope] = SearchProgress(checkpoint, day_scope)
+                day_cursor = checkpoint.get_cursor(day_scope)
+                page = day_cursor.get("page", 1)
+                notes_count_this_day = day_cursor.get("count", 0)
+                day_finished = True
 
                 while True:
                     if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
                         utils.logger.info(f"[BilibiliCrawler.search] Reached MAX_NOTES_PER_DAY limit for {day.ctime()}.")
                         break
-                    if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                        utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}'.")
-                        break
-                    if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                    if total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT:
+                        if daily_limit:
+                            utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}'.")
                         break
 
                     try:
                         utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
-                        video_id_list: List[str] = []
                         videos_res = await self.bili_client.search_video_by_keyword(
                             keyword=keyword,
                             page=page,
@@ -286,38 +323,79 @@ class BilibiliCrawler(AbstractCrawler):
                         if not video_list:
                             utils.logger.info(f"[BilibiliCrawler.search] No more videos for '{keyword}' on {day.ctime()}, moving to next day.")
                             break
+                        video_list = [video_item for video_item in video_list if not checkpoint.is_completed(video_item.get("aid"))]
 
-                        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
                         task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
                         video_items = await asyncio.gather(*task_list)
-
-                        for video_item in video_items:
-                            if video_item:
-                                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                                    break
-                                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                                    break
-                                if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
-                                    break
-                                notes_count_this_day += 1
-                                total_notes_crawled_for_keyword += 1
-                                video_id_list.append(video_item.get("View").get("aid"))
-                                await bilibili_store.update_bilibili_video(video_item)
-                                await bilibili_store.update_up_info(video_item)
-                                await self.get_bilibili_video(video_item, semaphore)
-
-                        page += 1
-
-                        # Sleep after page navigation
-                        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-
-                        await self.batch_get_video_comments(video_id_list)
-
                     except Exception as e:
                         utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
+                        day_finished = False
                         break
 
+                    video_details: List[Dict] = []
+                    for video_item in video_items:
+                        if video_item:
+                            if total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT:
+                                break
+                            if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
+                                break
+                            notes_count_this_day += 1
+                            total_notes_crawled_for_keyword += 1
+                            video_details.append(video_item)
+                    day_progress.page_fetched(page, len(video_details), count=notes_count_this_day)
+                    checkpoint.set_cursor(keyword_scope, total=total_notes_crawled_for_keyword)
+                    for video_detail in video_details:
+                        yield {"scope": day_scope, "page": page, "aid": video_detail.get("View").get("aid"), "video_detail": video_detail}
+                    page += 1
+
+                    # Sleep after page navigation
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                day_progress.source_finished(day_finished)
+
+    async def _run_search_pipeline(self, source: AsyncIterator[Dict], progress: Dict[str, SearchProgress]):
+        """
+        Run the search items of source through detail -> persist -> media -> comments
+        :param source: Yields {"scope", "page", "aid"} items, with "video_detail" when the detail is already fetched
+        :param progress: SearchProgress per scope, filled by source
+        """
+        detail_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        media_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+
+        async def fetch_detail(item: Dict) -> Optional[Dict]:
+            if "video_detail" not in item:
+                item["video_detail"] = await self.get_video_info_task(aid=item["aid"], bvid="", semaphore=detail_semaphore)
+            return item if item["video_detail"] else None
+
+        async def persist(item: Dict) -> Dict:
+            await bilibili_store.update_bilibili_video(item["video_detail"])
+            await bilibili_store.update_up_info(item["video_detail"])
+            return item
+
+        async def fetch_media(item: Dict) -> Dict:
+            await self.get_bilibili_video(item["video_detail"], media_semaphore)
+            return item
+
+        async def fetch_comments(item: Dict) -> Dict:
+            if config.ENABLE_GET_COMMENTS:
+                await self.get_comments(item["video_detail"].get("View").get("aid"), comment_semaphore)
+            return item
+
+        async def on_exit(item: Dict, completed: bool):
+            if completed and self.frontier:
+                await self.frontier.mark_notes_seen([item["aid"]])
+            progress[item["scope"]].item_finished(item["page"], item["aid"], completed)
+
+        pipeline = (
+            CrawlPipeline("bili_search")
+            .add_stage("detail", fetch_detail, concurrency=config.MAX_CONCURRENCY_NUM)
+            .add_stage("persist", persist)
+            .add_stage("media", fetch_media, concurrency=config.MAX_CONCURRENCY_NUM)
+            .add_stage("comments", fetch_comments, concurrency=config.MAX_CONCURRENCY_NUM)
+        )
+        await pipeline.run(source, on_exit=on_exit)
+
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
         batch get video comments
@@ -346,13 +424,17 @@ class BilibiliCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
+                callback = bilibili_store.batch_update_bilibili_video_comments
+                if self.frontier:
+                    callback = self.frontier.comment_callback(callback, id_field="rpid")
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=get_crawl_interval(),
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=bilibili_store.batch_update_bilibili_video_comments,
+                    callback=callback,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
 
@@ -425,8 +507,9 @@ class BilibiliCrawler(AbstractCrawler):
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
 
                 # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {bvid or aid}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[BilibiliCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {bvid or aid}")
 
                 return result
             except DataFetchError as ex:
@@ -592,13 +675,15 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
+        file_path = bilibili_store.get_video_path(aid, "video.mp4")
+        if self.media_pool:
+            await self.media_pool.enqueue(video_url, file_path)
+            return
+        downloaded = await self.bili_client.download_video_media(video_url, file_path, total_size=max_size if max_size > 0 else None)
         await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
         utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video {aid}")
-        if content is None:
-            return
-        extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+        if downloaded:
+            utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] save video {file_path} success ...")
 
     async def get_all_creator_details(self, creator_url_list: List[str]):
         """
@@ -662,7 +747,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_fans] begin get creator_id: {creator_id} fans ...")
                 await self.bili_client.get_creator_all_fans(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=get_crawl_interval(),
                     callback=bilibili_store.batch_update_bilibili_creator_fans,
                     max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
                 )
@@ -685,7 +770,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_followings] begin get creator_id: {creator_id} followings ...")
                 await self.bili_client.get_creator_all_followings(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=get_crawl_interval(),
                     callback=bilibili_store.batch_update_bilibili_creator_followings,
                     max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
                 )
@@ -708,7 +793,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_dynamics] begin get creator_id: {creator_id} dynamics ...")
                 await self.bili_client.get_creator_all_dynamics(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=get_crawl_interval(),
                     callback=bilibili_store.batch_update_bilibili_creator_dynamics,
                     max_count=config.CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES,
                 )
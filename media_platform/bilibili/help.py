@@ -23,10 +23,12 @@
 # @Time    : 2023/12/2 23:26
 # @Desc    : bilibili request parameter signing
 # Reverse engineering implementation reference: https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
+import asyncio
 import re
+import time
 import urllib.parse
 from hashlib import md5
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from model.m_bilibili import VideoUrlInfo, CreatorUrlInfo
 from tools import utils
@@ -42,6 +44,8 @@ class BilibiliSign:
             61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
             36, 20, 34, 44, 52
         ]
+        # The mixin key only depends on the two keys, compute it once
+        self.salt = self.get_salt()
 
     def get_salt(self) -> str:
         """
@@ -71,12 +75,83 @@ class BilibiliSign:
             in req_data.items()
         }
         query = urllib.parse.urlencode(req_data)
-        salt = self.get_salt()
-        wbi_sign = md5((query + salt).encode()).hexdigest()  # Calculate w_rid
+        wbi_sign = md5((query + self.salt).encode()).hexdigest()  # Calculate w_rid
         req_data['w_rid'] = wbi_sign
         return req_data
 
 
+class BilibiliWbiKeyCache:
+    """
+    TTL cache of the WBI keys and their BilibiliSign
+
+    The keys rotate about once a day, reading them for every request costs a browser
+    round trip. Expired keys keep signing while a background task fetches new ones;
+    invalidate() does the same when the server rejects a signature.
+
+    fetch_keys(from_server) is called with from_server=False for the first load, which
+    may read the keys the page cached in localStorage, and with True for every refresh,
+    which must ask the server since the page's copy is just as stale as ours.
+    """
+
+    def __init__(self, fetch_keys: Callable[[bool], Awaitable[Tuple[str, str]]], ttl_sec: int):
+        self._fetch_keys = fetch_keys
+        self._ttl_sec = ttl_sec
+        self._signer: Optional[BilibiliSign] = None
+        self._expire_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_signer(self) -> BilibiliSign:
+        """
+        Signer for the cached keys, only the first call waits for the keys
+        :return:
+        """
+        if self._signer is None:
+            await self.refresh()
+        elif time.monotonic() >= self._expire_at:
+            self._start_refresh()
+        return self._signer
+
+    async def refresh(self) -> BilibiliSign:
+        """
+        Fetch the keys now, concurrent callers share one fetch
+        :return:
+        """
+        self._start_refresh()
+        await asyncio.shield(self._refresh_task)
+        return self._signer
+
+    def invalidate(self):
+        """
+        The server rejected a signature, fetch new keys in the background
+        :return:
+        """
+        self._expire_at = 0.0
+        self._start_refresh()
+
+    def _start_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_failure)
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task):
+        # Retrieves the error, so a background refresh nobody awaits does not end as an unretrieved task exception
+        if not task.cancelled() and task.exception() is not None:
+            utils.logger.error(f"[BilibiliWbiKeyCache._refresh] Fetch WBI keys failed: {task.exception()}")
+
+    async def _refresh(self):
+        try:
+            img_key, sub_key = await self._fetch_keys(self._signer is not None)
+        except Exception as e:
+            if self._signer is None:
+                raise
+            utils.logger.error(f"[BilibiliWbiKeyCache._refresh] Refresh WBI keys failed, keep using the old keys: {e}")
+            return
+        if self._signer is None or (self._signer.img_key, self._signer.sub_key) != (img_key, sub_key):
+            self._signer = BilibiliSign(img_key, sub_key)
+        self._expire_at = time.monotonic() + self._ttl_sec
+
+
 def parse_video_info_from_url(url: str) -> VideoUrlInfo:
     """
     Parse video ID from Bilibili video URL
@@ -21,13 +21,12 @@ import asyncio
 import copy
 import json
 import urllib.parse
-from typing import TYPE_CHECKING, Any, Callable, Dict, Union, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 
-import httpx
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
 from var import request_keyword_var
 
@@ -39,6 +38,36 @@ from .field import *
 from .help import *
 
 
+# 与会话无关的公共请求参数，query string 只在导入时编码一次
+COMMON_PARAMS = {
+    "device_platform": "webapp",
+    "aid": "6383",
+    "channel": "channel_pc_web",
+    "version_code": "190600",
+    "version_name": "19.6.0",
+    "update_version_code": "170400",
+    "pc_client_type": "1",
+    "cookie_enabled": "true",
+    "browser_language": "zh-CN",
+    "browser_platform": "MacIntel",
+    "browser_name": "Chrome",
+    "browser_version": "125.0.0.0",
+    "browser_online": "true",
+    "engine_name": "Blink",
+    "os_name": "Mac OS",
+    "os_version": "10.15.7",
+    "cpu_core_num": "8",
+    "device_memory": "8",
+    "engine_version": "109.0",
+    "platform": "PC",
+    "screen_width": "2560",
+    "screen_height": "1440",
+    'effective_type': '4g',
+    "round_trip_time": "50",
+}
+COMMON_QUERY_STRING = urllib.parse.urlencode(COMMON_PARAMS)
+
+
 class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
 
     def __init__(
@@ -57,9 +86,23 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         self._host = "https://www.douyin.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # 同一会话内复用 webid 与 msToken，msToken 仅在响应提示失效后重新从 localStorage 读取
+        self._web_id = get_web_id()
+        self._ms_token: Optional[str] = None
+        self._ms_token_stale = True
         # 初始化代理池（来自 ProxyRefreshMixin）
         self.init_proxy_pool(proxy_ip_pool)
 
+    async def _get_ms_token(self) -> Optional[str]:
+        """
+        读取缓存的 msToken，失效时才通过 page.evaluate 读取 localStorage 中的 xmst
+        """
+        if self._ms_token_stale:
+            self._ms_token = await self.playwright_page.evaluate("() => window.localStorage.getItem('xmst')")  # type: ignore
+            # localStorage 中可能还没有 xmst，读取到之前每次请求都重新读取
+            self._ms_token_stale = not self._ms_token
+        return self._ms_token
+
     async def __process_req_params(
         self,
         uri: str,
@@ -71,37 +114,19 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         if not params:
             return
         headers = headers or self.headers
-        local_storage: Dict = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
-        common_params = {
-            "device_platform": "webapp",
-            "aid": "6383",
-            "channel": "channel_pc_web",
-            "version_code": "190600",
-            "version_name": "19.6.0",
-            "update_version_code": "170400",
-            "pc_client_type": "1",
-            "cookie_enabled": "true",
-            "browser_language": "zh-CN",
-            "browser_platform": "MacIntel",
-            "browser_name": "Chrome",
-            "browser_version": "125.0.0.0",
-            "browser_online": "true",
-            "engine_name": "Blink",
-            "os_name": "Mac OS",
-            "os_version": "10.15.7",
-            "cpu_core_num": "8",
-            "device_memory": "8",
-            "engine_version": "109.0",
-            "platform": "PC",
-            "screen_width": "2560",
-            "screen_height": "1440",
-            'effective_type': '4g',
-            "round_trip_time": "50",
-            "webid": get_web_id(),
-            "msToken": local_storage.get("xmst"),
+        session_params = {
+            "webid": self._web_id,
+            "msToken": await self._get_ms_token(),
         }
-        params.update(common_params)
-        query_string = urllib.parse.urlencode(params)
+        if COMMON_PARAMS.keys().isdisjoint(params) and session_params.keys().isdisjoint(params):
+            # 公共参数块已预先编码，这里只编码请求自身的参数，结果与对合并后的 params 整体编码一致
+            query_string = "&".join((urllib.parse.urlencode(params), COMMON_QUERY_STRING, urllib.parse.urlencode(session_params)))
+            params.update(COMMON_PARAMS)
+            params.update(session_params)
+        else:
+            params.update(COMMON_PARAMS)
+            params.update(session_params)
+            query_string = urllib.parse.urlencode(params)
 
         # 20240927 a-bogus更新（JS版本）
         post_data = {}
@@ -113,14 +138,12 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
             params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        # 每次请求前检测代理是否过期
-        await self._refresh_proxy_if_expired()
-
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self._send_request(method, url, timeout=self.timeout, **kwargs)
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
+                # 空响应通常是 msToken 过期导致，下次请求前重新读取
+                self._ms_token_stale = True
                 raise Exception("account blocked")
             return response.json()
         except Exception as e:
@@ -151,6 +174,8 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # 登录后 msToken 会轮换
+        self._ms_token_stale = True
 
     async def search_info_by_keyword(
         self,
@@ -236,6 +261,7 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         headers["Referer"] = urllib.parse.quote(referer_url, safe=':/')
         return await self.get(uri, params)
 
+    @sticky_proxy("aweme_id")
     async def get_aweme_all_comments(
         self,
         aweme_id: str,
@@ -332,19 +358,17 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
             result.extend(aweme_list)
         return result
 
-    async def get_aweme_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
-                return None
+    async def download_aweme_media(self, url: str, file_path: str) -> bool:
+        """
+        将作品图片或视频以流式写入 file_path，不在内存中保存完整文件
+        Args:
+            url: 媒体 URL
+            file_path: 保存路径
+
+        Returns:
+            是否下载成功
+        """
+        return await self._stream_media(url, file_path, follow_redirects=True)
 
     async def resolve_short_url(self, short_url: str) -> str:
         """
@@ -354,19 +378,19 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         Returns:
             重定向后的完整URL
         """
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=False) as client:
-            try:
-                utils.logger.info(f"[DouYinClient.resolve_short_url] Resolving short URL: {short_url}")
-                response = await client.get(short_url, timeout=10)
-
-                # 短链接通常返回302重定向
-                if response.status_code in [301, 302, 303, 307, 308]:
-                    redirect_url = response.headers.get("Location", "")
-                    utils.logger.info(f"[DouYinClient.resolve_short_url] Resolved to: {redirect_url}")
-                    return redirect_url
-                else:
-                    utils.logger.warning(f"[DouYinClient.resolve_short_url] Unexpected status code: {response.status_code}")
-                    return ""
-            except Exception as e:
-                utils.logger.error(f"[DouYinClient.resolve_short_url] Failed to resolve short URL: {e}")
+        client = self.get_http_client()
+        try:
+            utils.logger.info(f"[DouYinClient.resolve_short_url] Resolving short URL: {short_url}")
+            response = await client.get(short_url, timeout=10)
+
+            # 短链接通常返回302重定向
+            if response.status_code in [301, 302, 303, 307, 308]:
+                redirect_url = response.headers.get("Location", "")
+                utils.logger.info(f"[DouYinClient.resolve_short_url] Resolved to: {redirect_url}")
+                return redirect_url
+            else:
+                utils.logger.warning(f"[DouYinClient.resolve_short_url] Unexpected status code: {response.status_code}")
                 return ""
+        except Exception as e:
+            utils.logger.error(f"[DouYinClient.resolve_short_url] Failed to resolve short URL: {e}")
+            return ""
@@ -21,7 +21,7 @@ import asyncio
 import os
 import random
 from asyncio import Task
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from playwright.async_api import (
     BrowserContext,
@@ -37,6 +37,11 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import CrawlCheckpoint, SearchProgress
+from tools.crawl_frontier import get_crawl_frontier
+from tools.crawl_pipeline import CrawlPipeline
+from tools.media_download_pool import MediaDownloadPool, start_media_download_pool
+from tools.rate_limiter import get_crawl_interval
 from var import crawler_type_var, source_keyword_var
 
 from .client import DouYinClient
@@ -56,6 +61,8 @@ class DouYinCrawler(AbstractCrawler):
         self.index_url = "https://www.douyin.com"
         self.cdp_manager = None
         self.ip_proxy_pool = None  # 代理IP池，用于代理自动刷新
+        self.frontier = get_crawl_frontier("dy")  # 已抓取的视频/评论记录，用于增量爬取
+        self.media_pool: Optional[MediaDownloadPool] = None  # 后台媒体下载队列
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -91,6 +98,7 @@ class DouYinCrawler(AbstractCrawler):
             await self.context_page.goto(self.index_url)
 
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
+            self.media_pool = await start_media_download_pool("dy", self.dy_client.download_aweme_media)
             if not await self.dy_client.pong(browser_context=self.browser_context):
                 login_obj = DouYinLogin(
                     login_type=config.LOGIN_TYPE,
@@ -112,20 +120,67 @@ class DouYinCrawler(AbstractCrawler):
                 # Get the information and comments of the specified creator
                 await self.get_creators_and_videos()
 
+            if self.media_pool:
+                await self.media_pool.join()
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
     async def search(self) -> None:
+        """
+        关键词搜索，以流水线方式运行（搜索分页 -> 存储 -> 媒体 -> 评论），当前页的评论仍在抓取时即可继续请求下一页
+        """
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
+        checkpoint = CrawlCheckpoint.get_instance("dy", "search")
+        progress: Dict[str, SearchProgress] = {}
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+
+        async def persist(item: Dict) -> Dict:
+            await douyin_store.update_douyin_aweme(aweme_item=item["aweme_info"])
+            return item
+
+        async def fetch_media(item: Dict) -> Dict:
+            await self.get_aweme_media(aweme_item=item["aweme_info"])
+            return item
+
+        async def fetch_comments(item: Dict) -> Dict:
+            if config.ENABLE_GET_COMMENTS:
+                await self.get_comments(item["aweme_info"].get("aweme_id", ""), comment_semaphore)
+            return item
+
+        async def on_exit(item: Dict, completed: bool):
+            aweme_id = item["aweme_info"].get("aweme_id", "")
+            if completed and self.frontier:
+                await self.frontier.mark_notes_seen([aweme_id])
+            progress[item["keyword"]].item_finished(item["page"], aweme_id, completed)
+
+        pipeline = (
+            CrawlPipeline("dy_search")
+            .add_stage("persist", persist)
+            .add_stage("media", fetch_media, concurrency=config.MAX_CONCURRENCY_NUM)
+            .add_stage("comments", fetch_comments, concurrency=config.MAX_CONCURRENCY_NUM)
+        )
+        await pipeline.run(self._search_aweme_items(checkpoint, progress), on_exit=on_exit)
+
+    async def _search_aweme_items(self, checkpoint: CrawlCheckpoint, progress: Dict[str, SearchProgress]) -> AsyncIterator[Dict]:
+        """
+        逐页获取每个关键词的搜索结果，并逐条产出作品信息
+        """
         dy_limit_count = 10  # douyin limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
         start_page = config.START_PAGE  # start page number
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
+            scope = f"keyword:{keyword}"
+            if checkpoint.is_done(scope):
+                utils.logger.info(f"[DouYinCrawler.search] Keyword {keyword} already finished, skip")
+                continue
             utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
+            keyword_progress = progress[keyword] = SearchProgress(checkpoint, scope)
             aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
+            cursor = checkpoint.get_cursor(scope)
+            page = cursor.get("page", 0)
+            dy_search_id = cursor.get("search_id", "")
+            finished = True
             while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
@@ -144,30 +199,34 @@ class DouYinCrawler(AbstractCrawler):
                         break
                 except DataFetchError:
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
+                    finished = False
                     break
 
-                page += 1
+                fetched_page, page = page, page + 1
                 if "data" not in posts_res:
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                    finished = False
                     break
-                dy_search_id = posts_res.get("extra", {}).get("logid", "")
-                page_aweme_list = []
+                fetched_search_id, dy_search_id = dy_search_id, posts_res.get("extra", {}).get("logid", "")
+                aweme_infos: List[Dict] = []
                 for post_item in posts_res.get("data"):
                     try:
-                        aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
+                        aweme_infos.append(post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
                     except TypeError:
                         continue
+                aweme_infos = [aweme_info for aweme_info in aweme_infos if not checkpoint.is_completed(aweme_info.get("aweme_id"))]
+                if self.frontier:
+                    aweme_infos = await self.frontier.filter_unseen(self.frontier.note_kind(), aweme_infos, key=lambda item: item.get("aweme_id", ""))
+                keyword_progress.page_fetched(fetched_page, len(aweme_infos), search_id=fetched_search_id)
+                for aweme_info in aweme_infos:
                     aweme_list.append(aweme_info.get("aweme_id", ""))
-                    page_aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-                    await self.get_aweme_media(aweme_item=aweme_info)
-                
-                # Batch get note comments for the current page
-                await self.batch_get_note_comments(page_aweme_list)
+                    yield {"keyword": keyword, "page": fetched_page, "aweme_info": aweme_info}
 
                 # Sleep after each page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+            keyword_progress.source_finished(finished)
             utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
 
     async def get_specified_awemes(self):
@@ -211,8 +270,9 @@ class DouYinCrawler(AbstractCrawler):
             try:
                 result = await self.dy_client.get_video_by_id(aweme_id)
                 # Sleep after fetching aweme detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.get_aweme_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching aweme {aweme_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[DouYinCrawler.get_aweme_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching aweme {aweme_id}")
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
@@ -242,17 +302,21 @@ class DouYinCrawler(AbstractCrawler):
             try:
                 # 将关键词列表传递给 get_aweme_all_comments 方法
                 # Use fixed crawling interval
-                crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+                crawl_interval = get_crawl_interval()
+                callback = douyin_store.batch_update_dy_aweme_comments
+                if self.frontier:
+                    callback = self.frontier.comment_callback(callback, id_field="cid")
                 await self.dy_client.get_aweme_all_comments(
                     aweme_id=aweme_id,
                     crawl_interval=crawl_interval,
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=douyin_store.batch_update_dy_aweme_comments,
+                    callback=callback,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
                 # Sleep after fetching comments
-                await asyncio.sleep(crawl_interval)
-                utils.logger.info(f"[DouYinCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for aweme {aweme_id}")
+                if crawl_interval:
+                    await asyncio.sleep(crawl_interval)
+                    utils.logger.info(f"[DouYinCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for aweme {aweme_id}")
                 utils.logger.info(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
             except DataFetchError as e:
                 utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
@@ -421,17 +485,18 @@ class DouYinCrawler(AbstractCrawler):
 
         if not note_download_url:
             return
-        picNum = 0
-        for url in note_download_url:
+        # 按图片位置命名，续传的 .part 文件总是对应同一个 URL
+        for picNum, url in enumerate(note_download_url):
             if not url:
                 continue
-            content = await self.dy_client.get_aweme_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
+            file_path = douyin_store.get_dy_aweme_image_path(aweme_id, f"{picNum:>03d}.jpeg")
+            if self.media_pool:
+                await self.media_pool.enqueue(url, file_path)
                 continue
-            extension_file_name = f"{picNum:>03d}.jpeg"
-            picNum += 1
-            await douyin_store.update_dy_aweme_image(aweme_id, content, extension_file_name)
+            downloaded = await self.dy_client.download_aweme_media(url, file_path)
+            await asyncio.sleep(random.random())
+            if downloaded:
+                utils.logger.info(f"[DouYinCrawler.get_aweme_images] save image {file_path} success ...")
 
     async def get_aweme_video(self, aweme_item: Dict):
         """
@@ -449,9 +514,11 @@ class DouYinCrawler(AbstractCrawler):
 
         if not video_download_url:
             return
-        content = await self.dy_client.get_aweme_media(video_download_url)
-        await asyncio.sleep(random.random())
-        if content is None:
+        file_path = douyin_store.get_dy_aweme_video_path(aweme_id, "video.mp4")
+        if self.media_pool:
+            await self.media_pool.enqueue(video_download_url, file_path)
             return
-        extension_file_name = f"video.mp4"
-        await douyin_store.update_dy_aweme_video(aweme_id, content, extension_file_name)
+        downloaded = await self.dy_client.download_aweme_media(video_download_url, file_path)
+        await asyncio.sleep(random.random())
+        if downloaded:
+            utils.logger.info(f"[DouYinCrawler.get_aweme_video] save video {file_path} success ...")
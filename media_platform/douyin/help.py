@@ -28,13 +28,13 @@ import random
 import re
 from typing import Optional
 
-import execjs
 from playwright.async_api import Page
 
 from model.m_douyin import VideoUrlInfo, CreatorUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
+from tools.js_sign_pool import JsSignPool
 
-douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
+DOUYIN_SIGN_JS = "libs/douyin.js"
 
 def get_web_id():
     """
@@ -62,9 +62,9 @@ async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, p
     """
     Get a_bogus parameter, currently does not support POST request type signature
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    return await get_a_bogus_from_js(url, params, user_agent)
 
-def get_a_bogus_from_js(url: str, params: str, user_agent: str):
+async def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
     Get a_bogus parameter through js
     Args:
@@ -78,7 +78,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     sign_js_name = "sign_datail"
     if "/reply" in url:
         sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return await JsSignPool.get_instance(DOUYIN_SIGN_JS).call(sign_js_name, params, user_agent)
 
 
 
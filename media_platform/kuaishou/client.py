@@ -24,13 +24,13 @@ import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
+from tools.rate_limiter import ENDPOINT_SEARCH
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -62,17 +62,19 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         self.init_proxy_pool(proxy_ip_pool)
 
     async def request(self, method, url, **kwargs) -> Any:
-        # Check if proxy is expired before each request
-        await self._refresh_proxy_if_expired()
-
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self._send_request(method, url, timeout=self.timeout, **kwargs)
         data: Dict = response.json()
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
             return data.get("data", {})
 
+    def _rate_limit_endpoint(self, url: str, **kwargs) -> str:
+        # All GraphQL queries share one URL, the operation name tells search from detail
+        if '"operationName":"visionSearchPhoto"' in (kwargs.get("data") or ""):
+            return ENDPOINT_SEARCH
+        return super()._rate_limit_endpoint(url, **kwargs)
+
     async def get(self, uri: str, params=None) -> Dict:
         final_uri = uri
         if isinstance(params, dict):
@@ -94,17 +96,14 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         :param data: request body
         :return: response data
         """
-        await self._refresh_proxy_if_expired()
-
         json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(
-                method="POST",
-                url=f"{self._rest_host}{uri}",
-                data=json_str,
-                timeout=self.timeout,
-                headers=self.headers,
-            )
+        response = await self._send_request(
+            method="POST",
+            url=f"{self._rest_host}{uri}",
+            data=json_str,
+            timeout=self.timeout,
+            headers=self.headers,
+        )
         result: Dict = response.json()
         if result.get("result") != 1:
             raise DataFetchError(f"REST API V2 error: {result}")
@@ -216,6 +215,7 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         }
         return await self.post("", post_data)
 
+    @sticky_proxy("photo_id")
     async def get_video_all_comments(
         self,
         photo_id: str,
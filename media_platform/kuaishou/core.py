@@ -23,7 +23,7 @@ import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 import time
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from playwright.async_api import (
     BrowserContext,
@@ -40,6 +40,8 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_pipeline import CrawlPipeline
+from tools.rate_limiter import get_crawl_interval
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
@@ -126,7 +128,33 @@ class KuaishouCrawler(AbstractCrawler):
             utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
     async def search(self):
+        """
+        Search videos by keywords, as a pipeline (search pages -> persist -> comments) so the next
+        search page is fetched while the comments of the current one are still being crawled
+        """
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+
+        async def persist(video_detail: Dict) -> Dict:
+            await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+            return video_detail
+
+        async def fetch_comments(video_detail: Dict) -> Dict:
+            if config.ENABLE_GET_COMMENTS:
+                await self.get_comments(video_detail.get("photo", {}).get("id"), comment_semaphore)
+            return video_detail
+
+        pipeline = (
+            CrawlPipeline("ks_search")
+            .add_stage("persist", persist)
+            .add_stage("comments", fetch_comments, concurrency=config.MAX_CONCURRENCY_NUM)
+        )
+        await pipeline.run(self._search_video_items())
+
+    async def _search_video_items(self) -> AsyncIterator[Dict]:
+        """
+        Page through the search results of every keyword and yield their videos
+        """
         ks_limit_count = 20  # kuaishou limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
@@ -148,7 +176,6 @@ class KuaishouCrawler(AbstractCrawler):
                 utils.logger.info(
                     f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
                 )
-                video_id_list: List[str] = []
                 videos_res = await self.ks_client.search_info_by_keyword(
                     keyword=keyword,
                     pcursor=str(page),
@@ -168,18 +195,14 @@ class KuaishouCrawler(AbstractCrawler):
                     continue
                 search_session_id = vision_search_photo.get("searchSessionId", "")
                 for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
-                    await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+                    yield video_detail
 
-                # batch fetch video comments
                 page += 1
 
                 # Sleep after page navigation
                 await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 utils.logger.info(f"[KuaishouCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
 
-                await self.batch_get_video_comments(video_id_list)
-
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
         utils.logger.info("[KuaishouCrawler.get_specified_videos] Parsing video URLs...")
@@ -213,8 +236,9 @@ class KuaishouCrawler(AbstractCrawler):
                 result = await self.ks_client.get_video_info(video_id)
 
                 # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {video_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[KuaishouCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {video_id}")
 
                 utils.logger.info(
                     f"[KuaishouCrawler.get_video_info_task] Get video_id:{video_id} info result: {result} ..."
@@ -271,12 +295,13 @@ class KuaishouCrawler(AbstractCrawler):
                 )
 
                 # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for video {video_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[KuaishouCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for video {video_id}")
 
                 await self.ks_client.get_video_all_comments(
                     photo_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=get_crawl_interval(),
                     callback=kuaishou_store.batch_update_ks_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
@@ -22,7 +22,7 @@ import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode, quote
 
-import requests
+import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
@@ -30,7 +30,12 @@ import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.rate_limiter import RateLimiter
+from tools.response_cache import get_response_cache, invalidate_cached_response
+from var import proxy_sticky_key_var
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -58,36 +63,27 @@ class BaiduTieBaClient(AbstractApiClient):
         self.default_ip_proxy = default_ip_proxy
         self.playwright_page = playwright_page  # Playwright page object
 
-    def _sync_request(self, method, url, proxy=None, **kwargs):
+    def _get_http_client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
         """
-        Synchronous requests method
+        Shared keep-alive client for the given proxy, redirects are followed like requests did
         Args:
-            method: Request method
-            url: Request URL
             proxy: Proxy IP
-            **kwargs: Other request parameters
 
         Returns:
-            Response object
-        """
-        # Construct proxy dictionary
-        proxies = None
-        if proxy:
-            proxies = {
-                "http": proxy,
-                "https": proxy,
-            }
-
-        # Send request
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=self.headers,
-            proxies=proxies,
-            timeout=self.timeout,
-            **kwargs
-        )
-        return response
+            httpx.AsyncClient
+        """
+        return HttpClientPool.get_client(self.__class__.__name__, proxy, follow_redirects=True)
+
+    def _switch_default_proxy(self, proxy: Optional[str]) -> None:
+        """
+        Replace the default proxy and retire the clients of the previous one
+        Args:
+            proxy: New proxy IP
+        """
+        old_proxy = self.default_ip_proxy
+        self.default_ip_proxy = proxy
+        if old_proxy != proxy:
+            HttpClientPool.retire_clients(self.__class__.__name__, old_proxy)
 
     async def _refresh_proxy_if_expired(self) -> None:
         """
@@ -96,21 +92,48 @@ class BaiduTieBaClient(AbstractApiClient):
         if self.ip_pool is None:
             return
 
-        if self.ip_pool.is_current_proxy_expired():
-            utils.logger.info(
-                "[BaiduTieBaClient._refresh_proxy_if_expired] Proxy expired, refreshing..."
-            )
-            new_proxy = await self.ip_pool.get_or_refresh_proxy()
-            # Update proxy URL
-            _, self.default_ip_proxy = utils.format_proxy_info(new_proxy)
+        # The pool may have switched its current proxy or dropped an unhealthy one
+        new_proxy = await self.ip_pool.get_or_refresh_proxy()
+        _, proxy = utils.format_proxy_info(new_proxy)
+        if proxy != self.default_ip_proxy:
+            self._switch_default_proxy(proxy)
             utils.logger.info(
                 f"[BaiduTieBaClient._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
 
+    async def _send_request(self, method, url, proxy=None, **kwargs) -> httpx.Response:
+        """
+        Send the request through the leased, the given or the default proxy
+        """
+        await RateLimiter.acquire(RateLimiter.classify(url))
+        if proxy is None and self.ip_pool is not None and config.IP_PROXY_ROTATION_MODE == "request":
+            # Rotation mode: every request leases a proxy from the pool
+            async with self.ip_pool.lease(proxy_sticky_key_var.get() or None) as proxy_info:
+                _, leased_proxy = utils.format_proxy_info(proxy_info)
+                try:
+                    response = await self._get_http_client(leased_proxy).request(
+                        method, url, headers=self.headers, timeout=self.timeout, **kwargs
+                    )
+                except httpx.TransportError:
+                    self.ip_pool.record_result(proxy_info, False)
+                    raise
+                self.ip_pool.record_result(
+                    proxy_info, response.status_code not in ProxyRefreshMixin.PROXY_FAILURE_STATUS_CODES
+                )
+        else:
+            # Check if proxy is expired before each request
+            await self._refresh_proxy_if_expired()
+
+            actual_proxy = proxy if proxy else self.default_ip_proxy
+
+            client = self._get_http_client(actual_proxy)
+            response = await client.request(method, url, headers=self.headers, timeout=self.timeout, **kwargs)
+        return response
+
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, return_ori_content=False, proxy=None, **kwargs) -> Union[str, Any]:
         """
-        Common request method wrapper for requests, handles request responses
+        Common request method wrapper for httpx, handles request responses
         Args:
             method: Request method
             url: Request URL
@@ -121,19 +144,12 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
-        # Check if proxy is expired before each request
-        await self._refresh_proxy_if_expired()
-
-        actual_proxy = proxy if proxy else self.default_ip_proxy
-
-        # Execute synchronous requests in thread pool
-        response = await asyncio.to_thread(
-            self._sync_request,
-            method,
-            url,
-            actual_proxy,
-            **kwargs
-        )
+        cache = get_response_cache(method, url) if proxy is None else None
+        response = await cache.get(method, url, kwargs.get("params"), self.headers) if cache else None
+        if response is None:
+            response = await self._send_request(method, url, proxy, **kwargs)
+            if cache:
+                await cache.set(method, url, kwargs.get("params"), response, self.headers)
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -169,10 +185,11 @@ class BaiduTieBaClient(AbstractApiClient):
             return res
         except RetryError as e:
             if self.ip_pool:
+                self.ip_pool.record_result(self.ip_pool.current_proxy, False)
                 proxie_model = await self.ip_pool.get_proxy()
                 _, proxy = utils.format_proxy_info(proxie_model)
                 res = await self.request(method="GET", url=f"{self._host}{final_uri}", return_ori_content=return_ori_content, proxy=proxy, **kwargs)
-                self.default_ip_proxy = proxy
+                self._switch_default_proxy(proxy)
                 return res
 
             utils.logger.error(f"[BaiduTieBaClient.get] Reached maximum retry attempts, IP is blocked, please try a new IP proxy: {e}")
@@ -189,7 +206,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-        return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, **kwargs)
+        return await self.request(method="POST", url=f"{self._host}{uri}", content=json_str, **kwargs)
 
     async def pong(self, browser_context: BrowserContext = None) -> bool:
         """
@@ -317,24 +334,35 @@ class BaiduTieBaClient(AbstractApiClient):
         utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Accessing post detail page: {note_url}")
 
         try:
-            # Use Playwright to access post detail page
-            await self.playwright_page.goto(note_url, wait_until="domcontentloaded")
+            cache = get_response_cache("GET", note_url)
+            cached = await cache.get("GET", note_url) if cache else None
+            if cached is not None:
+                page_content = cached.text
+                utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Post detail HTML served from response cache: {note_url}")
+            else:
+                # Use Playwright to access post detail page
+                await self.playwright_page.goto(note_url, wait_until="domcontentloaded")
 
-            # Wait for page loading, using delay setting from config file
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                # Wait for page loading, using delay setting from config file
+                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
 
-            # Get page HTML content
-            page_content = await self.playwright_page.content()
-            utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Successfully retrieved post detail HTML, length: {len(page_content)}")
+                # Get page HTML content
+                page_content = await self.playwright_page.content()
+                utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Successfully retrieved post detail HTML, length: {len(page_content)}")
+                if cache:
+                    await cache.set("GET", note_url, None, httpx.Response(200, text=page_content))
 
             # Extract post details
             note_detail = self._page_extractor.extract_note_detail(page_content)
+            if cached is not None and not note_detail.note_id:
+                await invalidate_cached_response("GET", note_url)
             return note_detail
 
         except Exception as e:
             utils.logger.error(f"[BaiduTieBaClient.get_note_by_id] Failed to get post details: {e}")
             raise
 
+    @sticky_proxy("note_detail.note_id")
     async def get_note_all_comments(
         self,
         note_detail: TiebaNote,
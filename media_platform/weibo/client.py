@@ -29,13 +29,12 @@ import re
 from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
-from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
 
 if TYPE_CHECKING:
@@ -69,12 +68,8 @@ class WeiboClient(ProxyRefreshMixin):
 
     @retry(stop=stop_after_attempt(5), wait=wait_fixed(3))
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
-        # Check if proxy is expired before each request
-        await self._refresh_proxy_if_expired()
-
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self._send_request(method, url, timeout=self.timeout, **kwargs)
 
         if enable_return_response:
             return response
@@ -196,6 +191,7 @@ class WeiboClient(ProxyRefreshMixin):
 
         return await self.get(uri, params, headers=headers)
 
+    @sticky_proxy("note_id")
     async def get_note_all_comments(
         self,
         note_id: str,
@@ -266,22 +262,21 @@ class WeiboClient(ProxyRefreshMixin):
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {"mblog": note_detail}
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] $render_data value not found")
-                return dict()
+        response = await self._send_request("GET", url, timeout=self.timeout, headers=self.headers)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {"mblog": note_detail}
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] $render_data value not found")
+            return dict()
 
-    async def get_note_image(self, image_url: str) -> bytes:
+    def _image_agent_url(self, image_url: str) -> str:
         image_url = image_url[8:]  # Remove https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -294,20 +289,20 @@ class WeiboClient(ProxyRefreshMixin):
                 image_url += sub_url[i] + "/"
         # Weibo image hosting has anti-hotlinking, so proxy access is needed
         # Since Weibo images are accessed through i1.wp.com, we need to concatenate the URL
-        final_uri = (f"{self._image_agent_host}"
-                     f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", final_uri, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # Keep original exception type name for developer debugging
-                return None
+        return (f"{self._image_agent_host}"
+                f"{image_url}")
+
+    async def download_note_image(self, image_url: str, file_path: str) -> bool:
+        """
+        Stream a high-resolution note image to file_path through the image agent
+        Args:
+            image_url: Image URL from the note
+            file_path: Destination file
+
+        Returns:
+            Whether the file was downloaded
+        """
+        return await self._stream_media(self._image_agent_url(image_url), file_path)
 
     async def get_creator_container_info(self, creator_id: str) -> Dict:
         """
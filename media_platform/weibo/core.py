@@ -26,7 +26,7 @@ import asyncio
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from playwright.async_api import (
     BrowserContext,
@@ -42,6 +42,9 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_pipeline import CrawlPipeline
+from tools.media_download_pool import MediaDownloadPool, start_media_download_pool
+from tools.rate_limiter import get_crawl_interval
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
@@ -64,6 +67,7 @@ class WeiboCrawler(AbstractCrawler):
         self.mobile_user_agent = utils.get_mobile_user_agent()
         self.cdp_manager = None
         self.ip_proxy_pool = None  # Proxy IP pool for automatic proxy refresh
+        self.media_pool: Optional[MediaDownloadPool] = None  # Background media downloads
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -99,6 +103,7 @@ class WeiboCrawler(AbstractCrawler):
 
             # Create a client to interact with the xiaohongshu website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
+            self.media_pool = await start_media_download_pool("wb", self.wb_client.download_note_image)
             if not await self.wb_client.pong():
                 login_obj = WeiboLogin(
                     login_type=config.LOGIN_TYPE,
@@ -131,6 +136,8 @@ class WeiboCrawler(AbstractCrawler):
                 await self.get_creators_and_notes()
             else:
                 pass
+            if self.media_pool:
+                await self.media_pool.join()
             utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
     async def search(self):
@@ -157,6 +164,36 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+
+        async def persist(note_item: Dict) -> Dict:
+            await weibo_store.update_weibo_note(note_item)
+            return note_item
+
+        async def fetch_images(note_item: Dict) -> Dict:
+            await self.get_note_images(note_item.get("mblog"))
+            return note_item
+
+        async def fetch_comments(note_item: Dict) -> Dict:
+            if config.ENABLE_GET_COMMENTS:
+                await self.get_note_comments(note_item.get("mblog").get("id"), comment_semaphore)
+            return note_item
+
+        # Runs as a pipeline (search pages -> full text -> persist -> images -> comments) so the next
+        # search page is fetched while the notes of the current one are still being processed
+        pipeline = (
+            CrawlPipeline("wb_search")
+            .add_stage("full_text", self.get_note_full_text)
+            .add_stage("persist", persist)
+            .add_stage("images", fetch_images)
+            .add_stage("comments", fetch_comments, concurrency=config.MAX_CONCURRENCY_NUM)
+        )
+        await pipeline.run(self._search_note_items(search_type, weibo_limit_count, start_page))
+
+    async def _search_note_items(self, search_type: SearchType, weibo_limit_count: int, start_page: int) -> AsyncIterator[Dict]:
+        """
+        Page through the search results of every keyword and yield their notes
+        """
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
@@ -168,17 +205,9 @@ class WeiboCrawler(AbstractCrawler):
                     continue
                 utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
                 search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                # If full text fetching is enabled, batch get full text of posts
-                note_list = await self.batch_get_notes_full_text(note_list)
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
+                for note_item in filter_search_result_card(search_res.get("cards")):
+                    if note_item and note_item.get("mblog"):
+                        yield note_item
 
                 page += 1
 
@@ -186,8 +215,6 @@ class WeiboCrawler(AbstractCrawler):
                 await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
 
-                await self.batch_get_notes_comments(note_id_list)
-
     async def get_specified_notes(self):
         """
         get specified notes info
@@ -213,8 +240,9 @@ class WeiboCrawler(AbstractCrawler):
                 result = await self.wb_client.get_note_info_by_id(note_id)
 
                 # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[WeiboCrawler.get_note_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
 
                 return result
             except DataFetchError as ex:
@@ -254,12 +282,13 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
 
                 # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[WeiboCrawler.get_note_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_id}")
 
                 await self.wb_client.get_note_all_comments(
                     note_id=note_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,  # Use fixed interval instead of random
+                    crawl_interval=get_crawl_interval(),  # Use fixed interval instead of random
                     callback=weibo_store.batch_update_weibo_note_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
@@ -292,12 +321,15 @@ class WeiboCrawler(AbstractCrawler):
                 continue
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
+            file_path = weibo_store.get_weibo_note_image_path(pid, url.split(".")[-1])
+            if self.media_pool:
+                await self.media_pool.enqueue(url, file_path)
+                continue
+            downloaded = await self.wb_client.download_note_image(url, file_path)
             await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
             utils.logger.info(f"[WeiboCrawler.get_note_images] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching image")
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pid, content, extension_file_name)
+            if downloaded:
+                utils.logger.info(f"[WeiboCrawler.get_note_images] save image {file_path} success ...")
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -22,14 +22,14 @@ import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
+from tools.response_cache import invalidate_cached_response
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -38,7 +38,7 @@ from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id
 from .extractor import XiaoHongShuExtractor
-from .playwright_sign import sign_with_playwright
+from .playwright_sign import XhsPlaywrightSigner
 
 
 class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
@@ -52,6 +52,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         playwright_page: Page,
         cookie_dict: Dict[str, str],
         proxy_ip_pool: Optional["ProxyIpPool"] = None,
+        sign_pages: Optional[List[Page]] = None,
     ):
         self.proxy = proxy
         self.timeout = timeout
@@ -65,9 +66,22 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._extractor = XiaoHongShuExtractor()
+        # playwright_page plus the extra pages opened for signing (XHS_SIGN_PAGE_COUNT)
+        self._sign_pages = sign_pages or []
+        self._signer = XhsPlaywrightSigner([playwright_page] + self._sign_pages)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
+    async def close(self):
+        """Stop the signing workers and close the extra sign pages, playwright_page is left to the crawler"""
+        await self._signer.close()
+        for page in self._sign_pages:
+            try:
+                await page.close()
+            except Exception as e:
+                utils.logger.warning(f"[XiaoHongShuClient.close] Close sign page failed: {e}")
+        self._sign_pages = []
+
     async def _pre_headers(self, url: str, params: Optional[Dict] = None, payload: Optional[Dict] = None) -> Dict:
         """Request header parameter signing (using playwright injection method)
 
@@ -91,9 +105,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         else:
             raise ValueError("params or payload is required")
 
-        # Generate signature using playwright injection method
-        signs = await sign_with_playwright(
-            page=self.playwright_page,
+        # Generate signature using playwright injection method, batched across concurrent requests
+        signs = await self._signer.sign(
             uri=url,
             data=data,
             a1=a1_value,
@@ -106,8 +119,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        # A copy per request, concurrent requests must not overwrite each other's signature
+        return {**self.headers, **headers}
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -121,13 +134,9 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         Returns:
 
         """
-        # Check if proxy is expired before each request
-        await self._refresh_proxy_if_expired()
-
         # return response.text
         return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self._send_request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -185,28 +194,17 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             **kwargs,
         )
 
-    async def get_note_media(self, url: str) -> Union[bytes, None]:
-        # Check if proxy is expired before request
-        await self._refresh_proxy_if_expired()
+    async def download_note_media(self, url: str, file_path: str) -> bool:
+        """
+        Stream a note image or video to file_path instead of loading it into memory
+        Args:
+            url: Media URL
+            file_path: Destination file
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(
-                        f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                    )
-                    return None
-                else:
-                    return response.content
-            except (
-                httpx.HTTPError
-            ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(
-                    f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
-                )  # Keep original exception type name for developer debugging
-                return None
+        Returns:
+            Whether the file was downloaded
+        """
+        return await self._stream_media(url, file_path)
 
     async def pong(self) -> bool:
         """
@@ -368,6 +366,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         }
         return await self.get(uri, params)
 
+    @sticky_proxy("note_id")
     async def get_note_all_comments(
         self,
         note_id: str,
@@ -506,7 +505,10 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         html_content = await self.request(
             "GET", self._domain + uri, return_response=True, headers=self.headers
         )
-        return self._extractor.extract_creator_info_from_html(html_content)
+        creator_info = self._extractor.extract_creator_info_from_html(html_content)
+        if not creator_info:
+            await invalidate_cached_response("GET", self._domain + uri, headers=self.headers)
+        return creator_info
 
     async def get_notes_by_creator(
         self,
@@ -545,6 +547,9 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         callback: Optional[Callable] = None,
         xsec_token: str = "",
         xsec_source: str = "pc_feed",
+        notes_cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
+        collected_count: int = 0,
     ) -> List[Dict]:
         """
         Get all posts published by specified user, this method will continuously find all post information under a user
@@ -554,14 +559,17 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             callback: Update callback function after one pagination crawl ends
             xsec_token: Verification token
             xsec_source: Channel source
+            notes_cursor: Cursor to continue from, e.g. one saved by a checkpoint
+            cursor_callback: Called with the next page's cursor and the page's notes once callback has finished
+            collected_count: Notes collected before notes_cursor, they count towards CRAWLER_MAX_NOTES_COUNT
 
         Returns:
 
         """
         result = []
+        max_notes_count = config.CRAWLER_MAX_NOTES_COUNT - collected_count
         notes_has_more = True
-        notes_cursor = ""
-        while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
+        while notes_has_more and len(result) < max_notes_count:
             notes_res = await self.get_notes_by_creator(
                 user_id, notes_cursor, xsec_token=xsec_token, xsec_source=xsec_source
             )
@@ -584,13 +592,15 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
                 f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
             )
 
-            remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
+            remaining = max_notes_count - len(result)
             if remaining <= 0:
                 break
 
             notes_to_add = notes[:remaining]
             if callback:
                 await callback(notes_to_add)
+            if cursor_callback:
+                cursor_callback(notes_cursor, notes_to_add)
 
             result.extend(notes_to_add)
             await asyncio.sleep(crawl_interval)
@@ -647,4 +657,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             method="GET", url=url, return_response=True, headers=copy_headers
         )
 
-        return self._extractor.extract_note_detail_from_html(note_id, html)
+        note_detail = self._extractor.extract_note_detail_from_html(note_id, html)
+        if note_detail is None:
+            await invalidate_cached_response("GET", url, headers=copy_headers)
+        return note_detail
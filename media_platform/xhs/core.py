@@ -21,7 +21,7 @@ import asyncio
 import os
 import random
 from asyncio import Task
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from playwright.async_api import (
     BrowserContext,
@@ -39,6 +39,11 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import CrawlCheckpoint, SearchProgress
+from tools.crawl_frontier import get_crawl_frontier
+from tools.crawl_pipeline import CrawlPipeline
+from tools.media_download_pool import MediaDownloadPool, start_media_download_pool
+from tools.rate_limiter import get_crawl_interval
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -60,6 +65,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
         self.user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
         self.cdp_manager = None
         self.ip_proxy_pool = None  # Proxy IP pool for automatic proxy refresh
+        self.frontier = get_crawl_frontier("xhs")  # Seen notes / comments for incremental runs
+        self.media_pool: Optional[MediaDownloadPool] = None  # Background media downloads
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -96,6 +103,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
             # Create a client to interact with the Xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
+            self.media_pool = await start_media_download_pool("xhs", self.xhs_client.download_note_media)
             if not await self.xhs_client.pong():
                 login_obj = XiaoHongShuLogin(
                     login_type=config.LOGIN_TYPE,
@@ -120,20 +128,79 @@ class XiaoHongShuCrawler(AbstractCrawler):
             else:
                 pass
 
+            if self.media_pool:
+                await self.media_pool.join()
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
     async def search(self) -> None:
-        """Search for notes and retrieve their comment information."""
+        """Search for notes and retrieve their comment information.
+
+        Runs as a pipeline (search pages -> detail -> persist -> media -> comments) so the next
+        search page is fetched while the notes of the current one are still being processed.
+        """
         utils.logger.info("[XiaoHongShuCrawler.search] Begin search Xiaohongshu keywords")
+        checkpoint = CrawlCheckpoint.get_instance("xhs", "search")
+        progress: Dict[str, SearchProgress] = {}
+        detail_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        comment_semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+
+        async def fetch_detail(item: Dict) -> Optional[Dict]:
+            post_item = item["post_item"]
+            item["note_detail"] = await self.get_note_detail_async_task(
+                note_id=post_item.get("id"),
+                xsec_source=post_item.get("xsec_source"),
+                xsec_token=post_item.get("xsec_token"),
+                semaphore=detail_semaphore,
+            )
+            return item if item["note_detail"] else None
+
+        async def persist(item: Dict) -> Dict:
+            await xhs_store.update_xhs_note(item["note_detail"])
+            return item
+
+        async def fetch_media(item: Dict) -> Dict:
+            await self.get_notice_media(item["note_detail"])
+            return item
+
+        async def fetch_comments(item: Dict) -> Dict:
+            if config.ENABLE_GET_COMMENTS:
+                note_detail = item["note_detail"]
+                await self.get_comments(note_detail.get("note_id"), note_detail.get("xsec_token"), comment_semaphore)
+            return item
+
+        async def on_exit(item: Dict, completed: bool):
+            note_id = item["post_item"].get("id")
+            if completed and self.frontier:
+                await self.frontier.mark_notes_seen([note_id])
+            progress[item["keyword"]].item_finished(item["page"], note_id, completed)
+
+        pipeline = (
+            CrawlPipeline("xhs_search")
+            .add_stage("detail", fetch_detail, concurrency=config.MAX_CONCURRENCY_NUM)
+            .add_stage("persist", persist)
+            .add_stage("media", fetch_media, concurrency=config.MAX_CONCURRENCY_NUM)
+            .add_stage("comments", fetch_comments, concurrency=config.MAX_CONCURRENCY_NUM)
+        )
+        await pipeline.run(self._search_post_items(checkpoint, progress), on_exit=on_exit)
+
+    async def _search_post_items(self, checkpoint: CrawlCheckpoint, progress: Dict[str, SearchProgress]) -> AsyncIterator[Dict]:
+        """Page through the search results of every keyword and yield their note items"""
         xhs_limit_count = 20  # Xiaohongshu limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
+            scope = f"keyword:{keyword}"
+            if checkpoint.is_done(scope):
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Keyword {keyword} already finished, skip")
+                continue
             utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            search_id = get_search_id()
+            keyword_progress = progress[keyword] = SearchProgress(checkpoint, scope)
+            cursor = checkpoint.get_cursor(scope)
+            page = cursor.get("page", 1)
+            search_id = cursor.get("search_id") or get_search_id()
+            finished = True
             while (page - start_page + 1) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
@@ -142,54 +209,52 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
                 try:
                     utils.logger.info(f"[XiaoHongShuCrawler.search] search Xiaohongshu keyword: {keyword}, page: {page}")
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
                     notes_res = await self.xhs_client.get_note_by_keyword(
                         keyword=keyword,
                         search_id=search_id,
                         page=page,
                         sort=(SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL),
                     )
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
-                    if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
-                        break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        ) for post_item in notes_res.get("items", {}) if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
-                    page += 1
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Note details: {note_details}")
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
-
-                    # Sleep after each page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                 except DataFetchError:
-                    utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
+                    utils.logger.error("[XiaoHongShuCrawler.search] Search notes error")
+                    finished = False
                     break
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
+                if not notes_res or not notes_res.get("has_more", False):
+                    utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
+                    break
+                post_items = [
+                    post_item for post_item in notes_res.get("items", {})
+                    if post_item.get("model_type") not in ("rec_query", "hot_query")
+                    and not checkpoint.is_completed(post_item.get("id"))
+                ]
+                if self.frontier:
+                    post_items = await self.frontier.filter_unseen(self.frontier.note_kind(), post_items, key=lambda item: item.get("id"))
+                keyword_progress.page_fetched(page, len(post_items), search_id=search_id)
+                for post_item in post_items:
+                    yield {"keyword": keyword, "page": page, "post_item": post_item}
+                page += 1
+
+                # Sleep after each page navigation
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+            keyword_progress.source_finished(finished)
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
         utils.logger.info("[XiaoHongShuCrawler.get_creators_and_notes] Begin get Xiaohongshu creators")
+        checkpoint = CrawlCheckpoint.get_instance("xhs", "creator")
         for creator_url in config.XHS_CREATOR_ID_LIST:
             try:
                 # Parse creator URL to get user_id and security tokens
                 creator_info: CreatorUrlInfo = parse_creator_info_from_url(creator_url)
                 utils.logger.info(f"[XiaoHongShuCrawler.get_creators_and_notes] Parse creator URL info: {creator_info}")
                 user_id = creator_info.user_id
+                scope = f"creator:{user_id}"
+                if checkpoint.is_done(scope):
+                    utils.logger.info(f"[XiaoHongShuCrawler.get_creators_and_notes] Creator {user_id} already finished, skip")
+                    continue
 
                 # get creator detail info from web html content
                 createor_info: Dict = await self.xhs_client.get_creator_info(
@@ -203,23 +268,34 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 utils.logger.error(f"[XiaoHongShuCrawler.get_creators_and_notes] Failed to parse creator URL: {e}")
                 continue
 
+            # Notes of the pages finished before an interruption, their details are already stored
+            cursor = checkpoint.get_cursor(scope)
+            saved_notes: List[List[str]] = cursor.get("notes", [])
+
+            def save_cursor(next_cursor: str, page_notes: List[Dict]):
+                saved_notes.extend([note.get("note_id"), note.get("xsec_token")] for note in page_notes)
+                checkpoint.set_cursor(scope, cursor=next_cursor, notes=saved_notes, count=len(saved_notes))
+
             # Use fixed crawling interval
             crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
             # Get all note information of the creator
-            all_notes_list = await self.xhs_client.get_all_notes_by_creator(
+            await self.xhs_client.get_all_notes_by_creator(
                 user_id=user_id,
                 crawl_interval=crawl_interval,
                 callback=self.fetch_creator_notes_detail,
                 xsec_token=creator_info.xsec_token,
                 xsec_source=creator_info.xsec_source,
+                notes_cursor=cursor.get("cursor", ""),
+                cursor_callback=save_cursor,
+                collected_count=cursor.get("count", 0),
             )
 
-            note_ids = []
-            xsec_tokens = []
-            for note_item in all_notes_list:
-                note_ids.append(note_item.get("note_id"))
-                xsec_tokens.append(note_item.get("xsec_token"))
+            pending_notes = [(note_id, token) for note_id, token in saved_notes if not checkpoint.is_completed(note_id)]
+            note_ids = [note_id for note_id, _ in pending_notes]
+            xsec_tokens = [token for _, token in pending_notes]
             await self.batch_get_note_comments(note_ids, xsec_tokens)
+            checkpoint.add_completed(note_ids)
+            checkpoint.mark_done(scope)
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """Concurrently obtain the specified post list and save the data"""
@@ -303,8 +379,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
 
                 # Sleep after fetching note detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
+                if not config.ENABLE_RATE_LIMIT:
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
 
                 return note_detail
 
@@ -337,23 +414,33 @@ class XiaoHongShuCrawler(AbstractCrawler):
         async with semaphore:
             utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
             # Use fixed crawling interval
-            crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+            crawl_interval = get_crawl_interval()
+            callback = xhs_store.batch_update_xhs_note_comments
+            if self.frontier:
+                callback = self.frontier.comment_callback(callback, id_field="id")
             await self.xhs_client.get_note_all_comments(
                 note_id=note_id,
                 xsec_token=xsec_token,
                 crawl_interval=crawl_interval,
-                callback=xhs_store.batch_update_xhs_note_comments,
+                callback=callback,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
             )
 
             # Sleep after fetching comments
-            await asyncio.sleep(crawl_interval)
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
+            if crawl_interval:
+                await asyncio.sleep(crawl_interval)
+                utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
 
     async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
         """Create Xiaohongshu client"""
         utils.logger.info("[XiaoHongShuCrawler.create_xhs_client] Begin create Xiaohongshu API client ...")
         cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        # Extra pages for parallel signing, each needs the index page loaded for window.mnsv2
+        sign_pages = []
+        for _ in range(config.XHS_SIGN_PAGE_COUNT - 1):
+            sign_page = await self.browser_context.new_page()
+            await sign_page.goto(self.index_url)
+            sign_pages.append(sign_page)
         xhs_client_obj = XiaoHongShuClient(
             proxy=httpx_proxy,
             headers={
@@ -377,6 +464,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
+            sign_pages=sign_pages,
         )
         return xhs_client_obj
 
@@ -441,6 +529,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # The client only exists once start() got past the browser launch
+        if getattr(self, "xhs_client", None) is not None:
+            await self.xhs_client.close()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -473,18 +564,19 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not image_list:
             return
-        picNum = 0
-        for pic in image_list:
+        # Files are named by position, so a resumed .part file always belongs to the same URL
+        for picNum, pic in enumerate(image_list):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
+            file_path = xhs_store.get_xhs_note_image_path(note_id, f"{picNum}.jpg")
+            if self.media_pool:
+                await self.media_pool.enqueue(url, file_path)
                 continue
-            extension_file_name = f"{picNum}.jpg"
-            picNum += 1
-            await xhs_store.update_xhs_note_image(note_id, content, extension_file_name)
+            downloaded = await self.xhs_client.download_note_media(url, file_path)
+            await asyncio.sleep(random.random())
+            if downloaded:
+                utils.logger.info(f"[XiaoHongShuCrawler.get_note_images] save image {file_path} success ...")
 
     async def get_notice_video(self, note_item: Dict):
         """Get note videos. Please use get_notice_media
@@ -500,12 +592,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         if not videos:
             return
-        videoNum = 0
-        for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
+        for videoNum, url in enumerate(videos):
+            file_path = xhs_store.get_xhs_note_video_path(note_id, f"{videoNum}.mp4")
+            if self.media_pool:
+                await self.media_pool.enqueue(url, file_path)
                 continue
-            extension_file_name = f"{videoNum}.mp4"
-            videoNum += 1
-            await xhs_store.update_xhs_note_video(note_id, content, extension_file_name)
+            downloaded = await self.xhs_client.download_note_media(url, file_path)
+            await asyncio.sleep(random.random())
+            if downloaded:
+                utils.logger.info(f"[XiaoHongShuCrawler.get_notice_video] save video {file_path} success ...")
@@ -18,14 +18,18 @@
 
 # Generate Xiaohongshu signature by calling window.mnsv2 via Playwright injection
 
+import asyncio
 import hashlib
 import json
 import time
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse, quote
 
 from playwright.async_api import Page
 
+import config
+from tools import utils
+
 from .xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
 
 
@@ -200,6 +204,110 @@ async def sign_with_playwright(
     }
 
 
+# Signs a batch of [sign_str, md5_str] pairs and reads b1 in the same round trip
+_BATCH_SIGN_JS = """
+(items) => ({
+    b1: window.localStorage.getItem("b1") || "",
+    x3: items.map(([signStr, md5Str]) => {
+        try {
+            return window.mnsv2(signStr, md5Str) || "";
+        } catch (e) {
+            return "";
+        }
+    }),
+})
+"""
+
+
+class XhsPlaywrightSigner:
+    """
+    Batched x-s signing over one or more Xiaohongshu pages
+
+    sign_with_playwright() costs two page.evaluate round trips per request (localStorage
+    for b1, then window.mnsv2), so every request is serialized through one page. Here
+    pending requests are queued and each page worker signs everything queued so far in
+    a single evaluate that also returns the current b1. b1 is cached between batches
+    and picked up whenever the page changes it. Several pages sign in parallel.
+    """
+
+    def __init__(self, pages: List[Page], max_batch_size: Optional[int] = None):
+        self.pages = pages
+        self.max_batch_size = max(1, max_batch_size or config.XHS_SIGN_BATCH_SIZE)
+        self.b1 = ""
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Generate the signature headers, same result as sign_with_playwright()
+
+        Args:
+            uri: API path
+            data: Request data
+            a1: a1 value from cookie
+            method: Request method (GET or POST)
+
+        Returns:
+            Dictionary containing x-s, x-t, x-s-common, x-b3-traceid
+        """
+        sign_str = _build_sign_string(uri, data, method)
+        future = asyncio.get_running_loop().create_future()
+        self._ensure_workers()
+        await self._queue.put((sign_str, _md5_hex(sign_str), future))
+        x3_value = await future
+
+        data_type = "object" if isinstance(data, (dict, list)) else "string"
+        x_s = _build_xs_payload(x3_value, data_type)
+        x_t = str(int(time.time() * 1000))
+        return {
+            "x-s": x_s,
+            "x-t": x_t,
+            "x-s-common": _build_xs_common(a1, self.b1, x_s, x_t),
+            "x-b3-traceid": get_trace_id(),
+        }
+
+    async def close(self):
+        """
+        Stop the page workers
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._sign_loop(page)) for page in self.pages]
+
+    async def _sign_loop(self, page: Page):
+        while True:
+            batch: List[Tuple[str, str, asyncio.Future]] = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            x3_values = [""] * len(batch)
+            try:
+                result = await page.evaluate(_BATCH_SIGN_JS, [[sign_str, md5_str] for sign_str, md5_str, _ in batch])
+                self.b1 = result.get("b1") or self.b1
+                x3_values = result.get("x3") or x3_values
+            except Exception as e:
+                # Same as call_mnsv2: an empty x3 lets the request fail and be retried upstream
+                utils.logger.error(f"[XhsPlaywrightSigner._sign_loop] Batch sign of {len(batch)} requests failed: {e}")
+
+            for (_, _, future), x3_value in zip(batch, x3_values):
+                if not future.done():
+                    future.set_result(x3_value)
+
+
 async def pre_headers_with_playwright(
     page: Page,
     url: str,
@@ -23,7 +23,6 @@ import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -32,8 +31,9 @@ import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
-from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
 from tools import utils
+from tools.response_cache import invalidate_cached_response
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -74,7 +74,7 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
@@ -92,14 +92,10 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         Returns:
 
         """
-        # Check if proxy is expired before each request
-        await self._refresh_proxy_if_expired()
-
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self._send_request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
@@ -139,6 +135,15 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         base_url = (zhihu_constant.ZHIHU_URL if "/p/" not in uri else zhihu_constant.ZHIHU_ZHUANLAN_URL)
         return await self.request(method="GET", url=base_url + final_uri, headers=headers, **kwargs)
 
+    async def _invalidate_cached_page(self, uri: str):
+        """
+        Drop the cached HTML of a page that could not be parsed, so it is fetched again next time
+        Args:
+            uri: Request URI as passed to get()
+        """
+        base_url = (zhihu_constant.ZHIHU_URL if "/p/" not in uri else zhihu_constant.ZHIHU_ZHUANLAN_URL)
+        await invalidate_cached_response("GET", base_url + uri, headers=self.default_headers)
+
     async def pong(self) -> bool:
         """
         Check if login status is still valid
@@ -280,6 +285,7 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         }
         return await self.get(uri, params)
 
+    @sticky_proxy("content.content_id")
     async def get_note_all_comments(
         self,
         content: ZhihuContent,
@@ -379,7 +385,10 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         uri = f"/people/{url_token}"
         html_content: str = await self.get(uri, return_response=True)
-        return self._extractor.extract_creator(url_token, html_content)
+        creator = self._extractor.extract_creator(url_token, html_content)
+        if creator is None:
+            await self._invalidate_cached_page(uri)
+        return creator
 
     async def get_creator_answers(self, url_token: str, offset: int = 0, limit: int = 20) -> Dict:
         """
@@ -558,7 +567,10 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         uri = f"/question/{question_id}/answer/{answer_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_answer_content_from_html(response_html)
+        content = self._extractor.extract_answer_content_from_html(response_html)
+        if content is None:
+            await self._invalidate_cached_page(uri)
+        return content
 
     async def get_article_info(self, article_id: str) -> Optional[ZhihuContent]:
         """
@@ -571,7 +583,10 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         uri = f"/p/{article_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_article_content_from_html(response_html)
+        content = self._extractor.extract_article_content_from_html(response_html)
+        if content is None:
+            await self._invalidate_cached_page(uri)
+        return content
 
     async def get_video_info(self, video_id: str) -> Optional[ZhihuContent]:
         """
@@ -584,4 +599,7 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         uri = f"/zvideo/{video_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_zvideo_content_from_html(response_html)
+        content = self._extractor.extract_zvideo_content_from_html(response_html)
+        if content is None:
+            await self._invalidate_cached_page(uri)
+        return content
@@ -23,18 +23,18 @@ import json
 from typing import Dict, List, Optional
 from urllib.parse import parse_qs, urlparse
 
-import execjs
 from parsel import Selector
 
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
 from tools.crawler_util import extract_text_from_html
+from tools.js_sign_pool import JsSignPool
 
-ZHIHU_SGIN_JS = None
+ZHIHU_SIGN_JS = "libs/zhihu.js"
 
 
-def sign(url: str, cookies: str) -> Dict:
+async def sign(url: str, cookies: str) -> Dict:
     """
     zhihu sign algorithm
     Args:
@@ -44,12 +44,7 @@ def sign(url: str, cookies: str) -> Dict:
     Returns:
 
     """
-    global ZHIHU_SGIN_JS
-    if not ZHIHU_SGIN_JS:
-        with open("libs/zhihu.js", mode="r", encoding="utf-8-sig") as f:
-            ZHIHU_SGIN_JS = execjs.compile(f.read())
-
-    return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
+    return await JsSignPool.get_instance(ZHIHU_SIGN_JS).call("get_sign", url, cookies)
 
 
 class ZhihuExtractor:
@@ -25,10 +25,10 @@
 # @Url     : KuaiDaili HTTP implementation, official documentation: https://www.kuaidaili.com/?ref=ldwkjqipvz6c
 import json
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Set
 
 import config
-from cache.abs_cache import AbstractCache
+from cache.async_redis_cache import AsyncRedisCache
 from cache.cache_factory import CacheFactory
 from tools.utils import utils
 
@@ -41,21 +41,33 @@ class IpGetError(Exception):
 
 class ProxyProvider(ABC):
     @abstractmethod
-    async def get_proxy(self, num: int) -> List[IpInfoModel]:
+    async def get_proxy(self, num: int, exclude: Optional[Set[str]] = None, valid_for_sec: int = 0) -> List[IpInfoModel]:
         """
         Abstract method to get IP, different HTTP proxy providers need to implement this method
         :param num: Number of IPs to extract
+        :param exclude: "ip:port" of proxies the caller already holds, cached ones are not handed out again
+        :param valid_for_sec: Cached IPs expiring within this many seconds are not handed out
         :return:
         """
         raise NotImplementedError
 
+    @staticmethod
+    def usable_cached_ips(
+        ip_list: List[IpInfoModel], exclude: Optional[Set[str]] = None, valid_for_sec: int = 0
+    ) -> List[IpInfoModel]:
+        """
+        Cached IPs a get_proxy call may return: not held by the caller and valid for long enough
+        """
+        exclude = exclude or set()
+        return [ip for ip in ip_list if f"{ip.ip}:{ip.port}" not in exclude and not ip.is_expired(valid_for_sec)]
+
 
 
 class IpCache:
     def __init__(self):
-        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_REDIS)
+        self.cache_client: AsyncRedisCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_REDIS_ASYNC)
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    async def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
         """
         Set IP with expiration time, Redis is responsible for deletion after expiration
         :param ip_key:
@@ -63,22 +75,19 @@ class IpCache:
         :param ex:
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        await self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
-        Load all unexpired IP information from Redis
+        Load all unexpired IP information from Redis (SCAN + MGET instead of KEYS + one GET per key)
         :param proxy_brand_name: Proxy provider name
         :return:
         """
         all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
-                if not ip_value:
-                    continue
+            ip_values = await self.cache_client.get_by_pattern(f"{proxy_brand_name}_*")
+            for ip_value in ip_values.values():
                 all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
         except Exception as e:
-            utils.logger.error("[IpCache.load_all_ip] get ip err from redis db", e)
+            utils.logger.error(f"[IpCache.load_all_ip] get ip err from redis db: {e}")
         return all_ip_list
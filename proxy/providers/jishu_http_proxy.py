@@ -22,7 +22,7 @@
 # @Time    : 2024/4/5 09:32
 # @Desc    : Deprecated!!!!! Shut down!!! JiSu HTTP proxy IP implementation. Please use KuaiDaili implementation (proxy/providers/kuaidl_proxy.py)
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 from urllib.parse import urlencode
 
 import httpx
@@ -53,14 +53,17 @@ class JiSuHttpProxy(ProxyProvider):
         }
         self.ip_cache = IpCache()
 
-    async def get_proxy(self, num: int) -> List[IpInfoModel]:
+    async def get_proxy(self, num: int, exclude: Optional[Set[str]] = None, valid_for_sec: int = 0) -> List[IpInfoModel]:
         """
         :param num:
+        :param exclude: "ip:port" of proxies the pool already holds
+        :param valid_for_sec: Skip cached IPs expiring within this many seconds
         :return:
         """
 
         # Prioritize getting IP from cache
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = self.usable_cached_ips(ip_cache_list, exclude, valid_for_sec)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -89,7 +92,7 @@ class JiSuHttpProxy(ProxyProvider):
                     ip_key = f"JISUHTTP_{ip_info_model.ip}_{ip_info_model.port}_{ip_info_model.user}_{ip_info_model.password}"
                     ip_value = ip_info_model.json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts)
+                    await self.ip_cache.set_ip(ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts)
             else:
                 raise IpGetError(res_dict.get("msg", "unkown err"))
         return ip_cache_list + ip_infos
@@ -24,7 +24,7 @@
 # @Desc    : KuaiDaili HTTP implementation, official documentation: https://www.kuaidaili.com/?ref=ldwkjqipvz6c
 import os
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
 import httpx
 from pydantic import BaseModel, Field
@@ -92,11 +92,13 @@ class KuaiDaiLiProxy(ProxyProvider):
             "f_et": 1,
         }
 
-    async def get_proxy(self, num: int) -> List[IpInfoModel]:
+    async def get_proxy(self, num: int, exclude: Optional[Set[str]] = None, valid_for_sec: int = 0) -> List[IpInfoModel]:
         """
         KuaiDaili implementation
         Args:
             num:
+            exclude: "ip:port" of proxies the pool already holds
+            valid_for_sec: Skip cached IPs expiring within this many seconds
 
         Returns:
 
@@ -104,7 +106,8 @@ class KuaiDaiLiProxy(ProxyProvider):
         uri = "/api/getdps/"
 
         # Prioritize getting IP from cache
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = self.usable_cached_ips(ip_cache_list, exclude, valid_for_sec)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -140,7 +143,7 @@ class KuaiDaiLiProxy(ProxyProvider):
                 )
                 ip_key = f"{self.proxy_brand_name}_{ip_info_model.ip}_{ip_info_model.port}"
                 # Cache expiration time uses relative time (seconds), also needs to subtract buffer time
-                self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=proxy_model.expire_ts - DELTA_EXPIRED_SECOND)
+                await self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=proxy_model.expire_ts - DELTA_EXPIRED_SECOND)
                 ip_infos.append(ip_info_model)
 
         return ip_cache_list + ip_infos
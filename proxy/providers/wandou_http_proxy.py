@@ -22,7 +22,7 @@
 # @Time    : 2025/7/31
 # @Desc    : WanDou HTTP proxy IP implementation
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 from urllib.parse import urlencode
 
 import httpx
@@ -48,16 +48,19 @@ class WanDouHttpProxy(ProxyProvider):
         }
         self.ip_cache = IpCache()
 
-    async def get_proxy(self, num: int) -> List[IpInfoModel]:
+    async def get_proxy(self, num: int, exclude: Optional[Set[str]] = None, valid_for_sec: int = 0) -> List[IpInfoModel]:
         """
         :param num:
+        :param exclude: "ip:port" of proxies the pool already holds
+        :param valid_for_sec: Skip cached IPs expiring within this many seconds
         :return:
         """
 
         # Prioritize getting IP from cache
-        ip_cache_list = self.ip_cache.load_all_ip(
+        ip_cache_list = await self.ip_cache.load_all_ip(
             proxy_brand_name=self.proxy_brand_name
         )
+        ip_cache_list = self.usable_cached_ips(ip_cache_list, exclude, valid_for_sec)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -91,7 +94,7 @@ class WanDouHttpProxy(ProxyProvider):
                     ip_key = f"WANDOUHTTP_{ip_info_model.ip}_{ip_info_model.port}"
                     ip_value = ip_info_model.model_dump_json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(
+                    await self.ip_cache.set_ip(
                         ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts
                     )
             else:
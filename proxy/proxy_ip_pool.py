@@ -21,11 +21,12 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : IP proxy pool implementation
+import asyncio
 import random
-from typing import Dict, List
-
-import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
 
 import config
 from proxy.providers import (
@@ -33,12 +34,56 @@ from proxy.providers import (
     new_wandou_http_proxy,
 )
 from tools import utils
+from tools.http_client_pool import HttpClientPool
 
 from .base_proxy import ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
 
+class ProxyStats:
+    """Request outcomes and latency of one proxy, fed by validation and by the clients' requests"""
+
+    # Weight of the newest latency sample in the moving average
+    EWMA_ALPHA = 0.3
+    # Assumed latency of a proxy that has no sample yet (validation disabled)
+    DEFAULT_LATENCY_SEC = 1.0
+    # Latencies below this count as equal, so one fast proxy does not take every weighted draw
+    MIN_LATENCY_SEC = 0.05
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency: Optional[float] = None
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+        if latency is not None:
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * self.ewma_latency
+
+    @property
+    def success_rate(self) -> float:
+        # Laplace smoothing, a new proxy starts at 0.5 instead of 0 or 1
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def score(self) -> float:
+        return self.success_rate / max(self.ewma_latency or self.DEFAULT_LATENCY_SEC, self.MIN_LATENCY_SEC)
+
+
 class ProxyIpPool:
+    # Minimum seconds between two prefetches, keeps a provider with short-lived IPs from being polled per request
+    PREFETCH_MIN_INTERVAL_SEC = 10
+    # Sticky keys (note / comment thread) remembered at most, oldest assignments are forgotten first
+    MAX_STICKY_KEYS = 4096
 
     def __init__(
         self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider
@@ -46,70 +91,216 @@ class ProxyIpPool:
         """
 
         Args:
-            ip_pool_count:
-            enable_validate_ip:
+            ip_pool_count: Number of usable proxies the pool keeps ready
+            enable_validate_ip: Validate proxies before they join the pool
             ip_provider:
         """
         self.valid_ip_url = "https://echo.apifox.cn/"  # URL to validate if IP is valid
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
-        self.proxy_list: List[IpInfoModel] = []
+        self.proxy_list: List[IpInfoModel] = []  # Validated proxies, shared by all requests
+        self.stats: Dict[str, ProxyStats] = {}
         self.ip_provider: ProxyProvider = ip_provider
         self.current_proxy: IpInfoModel | None = None  # Currently used proxy
+        self.prefetch_seconds = config.IP_PROXY_PREFETCH_SECONDS
+        self.max_failures = config.IP_PROXY_MAX_CONSECUTIVE_FAILURES
+        self._load_lock = asyncio.Lock()
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._next_prefetch_ts = 0.0
+        # Per request rotation (IP_PROXY_ROTATION_MODE = "request")
+        self.rotate_every = max(1, config.IP_PROXY_ROTATE_EVERY_N_REQUESTS)
+        self.max_concurrency_per_ip = config.IP_PROXY_MAX_CONCURRENCY_PER_IP
+        self._in_flight: Dict[str, int] = {}
+        self._slot_released = asyncio.Condition()
+        self._sticky: "OrderedDict[str, str]" = OrderedDict()
+        self._last_drawn: Optional[str] = None
+        self._draw_uses = 0
+
+    @staticmethod
+    def proxy_key(proxy: IpInfoModel) -> str:
+        return f"{proxy.ip}:{proxy.port}"
 
-    async def load_proxies(self) -> None:
+    async def load_proxies(self) -> int:
         """
-        Load IP proxies
+        Fetch ip_pool_count proxies from the provider, validate them concurrently
+        and add the usable ones to the pool
         Returns:
-
+            Number of proxies added
         """
-        self.proxy_list = await self.ip_provider.get_proxy(self.ip_pool_count)
+        known = {self.proxy_key(p) for p in self.proxy_list}
+        # Cached provider IPs the pool already holds or that would expire within the prefetch
+        # window are skipped, otherwise a prefetch gets the proxies it is meant to replace back
+        proxies = await self.ip_provider.get_proxy(
+            self.ip_pool_count, exclude=known, valid_for_sec=self.prefetch_seconds
+        )
+        candidates = [p for p in proxies if self.proxy_key(p) not in known and not p.is_expired()]
+        if self.enable_validate_ip:
+            latencies = await asyncio.gather(*[self._check_proxy(p) for p in candidates])
+        else:
+            latencies = [None] * len(candidates)
 
-    async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
+        added = 0
+        for proxy, latency in zip(candidates, latencies):
+            if self.enable_validate_ip and latency is None:
+                continue
+            stats = self.stats.setdefault(self.proxy_key(proxy), ProxyStats())
+            if latency is not None:
+                stats.record(True, latency)
+            self.proxy_list.append(proxy)
+            added += 1
+        utils.logger.info(
+            f"[ProxyIpPool.load_proxies] {added}/{len(proxies)} proxies added, pool size: {len(self.proxy_list)}"
+        )
+        return added
+
+    async def _check_proxy(self, proxy: IpInfoModel) -> Optional[float]:
         """
         Validate if proxy IP is valid
         :param proxy:
-        :return:
+        :return: Latency of the check in seconds, None if the proxy is unusable
         """
         utils.logger.info(
-            f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid "
+            f"[ProxyIpPool._check_proxy] testing {proxy.ip} is it valid "
         )
+        _, proxy_url = utils.format_proxy_info(proxy)
+        # A pooled keep-alive client per proxy, a proxy that passes keeps its connection warm
+        # and the client is retired together with the proxy
+        client = HttpClientPool.get_client(self.__class__.__name__, proxy_url)
+        start = time.monotonic()
         try:
-            # httpx 0.28.1 requires passing proxy URL string directly, not a dictionary
-            if proxy.user and proxy.password:
-                proxy_url = f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            else:
-                proxy_url = f"http://{proxy.ip}:{proxy.port}"
-
-            async with httpx.AsyncClient(proxy=proxy_url) as client:
-                response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
+            response = await client.get(self.valid_ip_url, timeout=config.IP_PROXY_VALIDATE_TIMEOUT_SEC)
         except Exception as e:
             utils.logger.info(
-                f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}"
+                f"[ProxyIpPool._check_proxy] testing {proxy.ip} err: {e}"
             )
-            raise e
+            HttpClientPool.retire_clients(self.__class__.__name__, proxy_url)
+            return None
+        if response.status_code != 200:
+            HttpClientPool.retire_clients(self.__class__.__name__, proxy_url)
+            return None
+        return time.monotonic() - start
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_proxy(self) -> IpInfoModel:
         """
-        Randomly extract a proxy IP from the proxy pool
+        Take the healthiest proxy of the pool (success rate / latency) as the current proxy,
+        only waits on the provider when the pool has no usable proxy left
         :return:
         """
-        if len(self.proxy_list) == 0:
-            await self._reload_proxies()
-
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy)  # Remove an IP once extracted
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception(
-                    "[ProxyIpPool.get_proxy] current ip invalid and again get it"
-                )
+        proxy = self._pick_proxy()
+        if proxy is None:
+            await self._wait_for_proxies()
+            proxy = self._pick_proxy()
+        if proxy is None:
+            raise Exception("[ProxyIpPool.get_proxy] No valid proxy available")
         self.current_proxy = proxy  # Save currently used proxy
+        self._schedule_prefetch()
+        return proxy
+
+    def record_result(self, proxy: Optional[IpInfoModel], success: bool, latency: Optional[float] = None) -> None:
+        """
+        Feed the outcome of a request sent through a proxy back into its health score,
+        a proxy failing IP_PROXY_MAX_CONSECUTIVE_FAILURES times in a row leaves the pool
+        Args:
+            proxy: Proxy the request went through
+            success: False for connection errors or responses that indicate a blocked IP
+            latency: Request duration in seconds
+        """
+        if proxy is None:
+            return
+        key = self.proxy_key(proxy)
+        stats = self.stats.get(key)
+        if stats is None:
+            return
+        stats.record(success, latency)
+        if stats.consecutive_failures < self.max_failures:
+            return
+        utils.logger.warning(
+            f"[ProxyIpPool.record_result] Proxy {key} failed {stats.consecutive_failures} times in a row, removed"
+        )
+        self._remove(key)
+        self._schedule_prefetch()
+
+    @asynccontextmanager
+    async def lease(self, sticky_key: Optional[str] = None) -> AsyncIterator[IpInfoModel]:
+        """
+        Reserve a proxy for one request in rotation mode. A new proxy is drawn every
+        IP_PROXY_ROTATE_EVERY_N_REQUESTS requests, weighted by health score, and a proxy
+        never carries more than IP_PROXY_MAX_CONCURRENCY_PER_IP requests at once;
+        when every proxy is busy the caller waits for a free slot.
+        Args:
+            sticky_key: Requests with the same key (e.g. one note's comment pages) keep
+                using the same proxy while it stays in the pool
+        Returns:
+            Async context manager yielding the proxy
+        """
+        proxy = await self._acquire(sticky_key)
+        try:
+            yield proxy
+        finally:
+            await self._release(proxy)
+
+    async def _acquire(self, sticky_key: Optional[str]) -> IpInfoModel:
+        while True:
+            self._schedule_prefetch()
+            if self._pick_proxy() is None:
+                await self._wait_for_proxies()
+                if self._pick_proxy() is None:
+                    raise Exception("[ProxyIpPool.lease] No valid proxy available")
+            async with self._slot_released:
+                proxy = self._pick_for_request(sticky_key)
+                if proxy is not None:
+                    key = self.proxy_key(proxy)
+                    self._in_flight[key] = self._in_flight.get(key, 0) + 1
+                    return proxy
+                try:
+                    # The timeout also picks up proxies added by a prefetch
+                    await asyncio.wait_for(self._slot_released.wait(), 1)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self, proxy: IpInfoModel) -> None:
+        key = self.proxy_key(proxy)
+        count = self._in_flight.get(key, 0) - 1
+        if count > 0:
+            self._in_flight[key] = count
+        else:
+            self._in_flight.pop(key, None)
+        async with self._slot_released:
+            self._slot_released.notify()
+
+    def _has_free_slot(self, proxy: IpInfoModel) -> bool:
+        if self.max_concurrency_per_ip <= 0:
+            return True
+        return self._in_flight.get(self.proxy_key(proxy), 0) < self.max_concurrency_per_ip
+
+    def _pick_for_request(self, sticky_key: Optional[str]) -> Optional[IpInfoModel]:
+        """
+        Proxy for the next request, None when the proxy to use has no free slot
+        """
+        proxies = {self.proxy_key(p): p for p in self.proxy_list if not p.is_expired()}
+        if sticky_key:
+            assigned = proxies.get(self._sticky.get(sticky_key, ""))
+            if assigned is not None:
+                self._sticky.move_to_end(sticky_key)
+                return assigned if self._has_free_slot(assigned) else None
+
+        last = proxies.get(self._last_drawn or "")
+        if last is not None and self._draw_uses < self.rotate_every and self._has_free_slot(last):
+            proxy = last
+            self._draw_uses += 1
+        else:
+            candidates = [p for p in proxies.values() if self._has_free_slot(p)]
+            if not candidates:
+                return None
+            weights = [self.stats[self.proxy_key(p)].score for p in candidates]
+            proxy = random.choices(candidates, weights=weights)[0]
+            self._last_drawn = self.proxy_key(proxy)
+            self._draw_uses = 1
+
+        if sticky_key:
+            self._sticky[sticky_key] = self.proxy_key(proxy)
+            if len(self._sticky) > self.MAX_STICKY_KEYS:
+                self._sticky.popitem(last=False)
         return proxy
 
     def is_current_proxy_expired(self, buffer_seconds: int = 30) -> bool:
@@ -133,6 +324,7 @@ class ProxyIpPool:
         Returns:
             IpInfoModel: Valid proxy IP information
         """
+        self._schedule_prefetch()
         if self.is_current_proxy_expired(buffer_seconds):
             utils.logger.info(
                 f"[ProxyIpPool.get_or_refresh_proxy] Current proxy expired or not set, getting new proxy..."
@@ -140,13 +332,57 @@ class ProxyIpPool:
             return await self.get_proxy()
         return self.current_proxy
 
-    async def _reload_proxies(self):
+    def _pick_proxy(self) -> Optional[IpInfoModel]:
+        for proxy in [p for p in self.proxy_list if p.is_expired()]:
+            self._remove(self.proxy_key(proxy))
+        if not self.proxy_list:
+            return None
+        return max(self.proxy_list, key=lambda p: self.stats[self.proxy_key(p)].score)
+
+    def _remove(self, key: str) -> None:
+        for proxy in [p for p in self.proxy_list if self.proxy_key(p) == key]:
+            # Pooled keep-alive clients of a dropped proxy are closed after their grace period
+            HttpClientPool.retire_clients(None, utils.format_proxy_info(proxy)[1])
+        self.proxy_list = [p for p in self.proxy_list if self.proxy_key(p) != key]
+        self.stats.pop(key, None)
+        if self.current_proxy is not None and self.proxy_key(self.current_proxy) == key:
+            self.current_proxy = None
+
+    def _schedule_prefetch(self) -> None:
         """
-        Reload proxy pool
-        :return:
+        Start fetching replacements in the background once fewer than ip_pool_count
+        proxies stay valid for more than IP_PROXY_PREFETCH_SECONDS
+        """
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            return
+        fresh = [p for p in self.proxy_list if not p.is_expired(self.prefetch_seconds)]
+        if len(fresh) >= self.ip_pool_count or time.monotonic() < self._next_prefetch_ts:
+            return
+        self._prefetch_task = asyncio.create_task(self._prefetch())
+
+    async def _prefetch(self) -> None:
+        self._next_prefetch_ts = time.monotonic() + self.PREFETCH_MIN_INTERVAL_SEC
+        try:
+            async with self._load_lock:
+                await self.load_proxies()
+        except Exception as e:
+            utils.logger.error(f"[ProxyIpPool._prefetch] Prefetch proxies failed: {e}")
+
+    async def _wait_for_proxies(self, max_attempts: int = 3) -> None:
+        """
+        Block until the pool has a usable proxy, joining a running prefetch instead of
+        calling the provider again
         """
-        self.proxy_list = []
-        await self.load_proxies()
+        for attempt in range(max_attempts):
+            async with self._load_lock:
+                if self.proxy_list:
+                    return
+                try:
+                    if await self.load_proxies():
+                        return
+                except Exception as e:
+                    utils.logger.error(f"[ProxyIpPool._wait_for_proxies] Load proxies failed: {e}")
+            await asyncio.sleep(0.2 * 2 ** attempt)
 
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
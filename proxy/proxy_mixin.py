@@ -23,9 +23,20 @@
 # @Time    : 2025/11/25
 # @Desc    : Auto-refresh proxy Mixin class for use by various platform clients
 
+import functools
+import inspect
+import time
 from typing import TYPE_CHECKING, Optional
 
+import httpx
+
+import config
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.media_downloader import MediaDownloadError, stream_download
+from tools.rate_limiter import ENDPOINT_MEDIA, RateLimiter
+from tools.response_cache import get_response_cache
+from var import proxy_sticky_key_var
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -38,13 +49,18 @@ class ProxyRefreshMixin:
     Usage:
     1. Let client class inherit this Mixin
     2. Call init_proxy_pool(proxy_ip_pool) in client's __init__
-    3. Call await _refresh_proxy_if_expired() before each request method call
+    3. Send requests through _send_request(), which picks the proxy (current one or, in
+       rotation mode, one leased per request), uses its shared keep-alive client and
+       reports the outcome to the proxy pool, or answers from the response cache
+    4. Wrap calls that must keep one IP (e.g. paging through one note's comments) with @sticky_proxy
 
     Requirements:
     - client class must have self.proxy attribute to store current proxy URL
     """
 
     _proxy_ip_pool: Optional["ProxyIpPool"] = None
+    # Responses that suggest the proxy IP is rejected rather than the request being wrong
+    PROXY_FAILURE_STATUS_CODES = (403, 407, 429)
 
     def init_proxy_pool(self, proxy_ip_pool: Optional["ProxyIpPool"]) -> None:
         """
@@ -57,21 +73,150 @@ class ProxyRefreshMixin:
     async def _refresh_proxy_if_expired(self) -> None:
         """
         Check if proxy has expired, automatically refresh if so
-        Call this method before each request to ensure proxy is valid
+        Call this method before each request to ensure proxy is valid. While the client
+        still uses the pool's current proxy and it stays valid past the prefetch window,
+        this only compares the proxy; otherwise the pool is asked for its current proxy,
+        which also schedules a prefetch of replacements
         """
-        if self._proxy_ip_pool is None:
+        pool = self._proxy_ip_pool
+        if pool is None:
             return
 
-        if self._proxy_ip_pool.is_current_proxy_expired():
-            utils.logger.info(
-                f"[{self.__class__.__name__}._refresh_proxy_if_expired] Proxy expired, refreshing..."
-            )
-            new_proxy = await self._proxy_ip_pool.get_or_refresh_proxy()
-            # Update httpx proxy URL
-            if new_proxy.user and new_proxy.password:
-                self.proxy = f"http://{new_proxy.user}:{new_proxy.password}@{new_proxy.ip}:{new_proxy.port}"
-            else:
-                self.proxy = f"http://{new_proxy.ip}:{new_proxy.port}"
+        current = pool.current_proxy
+        if current is not None and not current.is_expired(pool.prefetch_seconds) and utils.format_proxy_info(current)[1] == self.proxy:
+            return
+
+        # The pool may have switched its current proxy for another client or dropped an unhealthy one
+        new_proxy = await pool.get_or_refresh_proxy()
+        _, proxy_url = utils.format_proxy_info(new_proxy)
+        if proxy_url != self.proxy:
+            old_proxy, self.proxy = self.proxy, proxy_url
+            HttpClientPool.retire_clients(self.__class__.__name__, old_proxy)
             utils.logger.info(
                 f"[{self.__class__.__name__}._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
+
+    async def _send_request(self, method: str, url: str, follow_redirects: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send a request through a pooled keep-alive client and record its outcome and
+        latency in the proxy pool. With IP_PROXY_ROTATION_MODE = "request" every request
+        leases a proxy from the pool (sticky per proxy_sticky_key_var), otherwise the
+        client's current proxy is used until it expires. Requests are paced by the
+        RateLimiter bucket of their endpoint class. Endpoints listed in
+        RESPONSE_CACHE_TTL_RULES are answered from the on-disk response cache when it is enabled.
+        Args:
+            method: Request method
+            url: Request URL
+            follow_redirects: Whether the client follows redirects
+            **kwargs: Passed to httpx.AsyncClient.request
+
+        Returns:
+            httpx.Response
+        """
+        cache = get_response_cache(method, url)
+        if cache is None:
+            return await self._dispatch_request(method, url, follow_redirects, **kwargs)
+        params, headers = kwargs.get("params"), kwargs.get("headers")
+        response = await cache.get(method, url, params, headers)
+        if response is None:
+            response = await self._dispatch_request(method, url, follow_redirects, **kwargs)
+            await cache.set(method, url, params, response, headers)
+        return response
+
+    async def _dispatch_request(self, method: str, url: str, follow_redirects: bool, **kwargs) -> httpx.Response:
+        await RateLimiter.acquire(self._rate_limit_endpoint(url, **kwargs))
+        if self._proxy_ip_pool is not None and config.IP_PROXY_ROTATION_MODE == "request":
+            async with self._proxy_ip_pool.lease(proxy_sticky_key_var.get() or None) as proxy_info:
+                _, proxy_url = utils.format_proxy_info(proxy_info)
+                client = HttpClientPool.get_client(self.__class__.__name__, proxy_url, follow_redirects)
+                return await self._timed_request(client, proxy_info, method, url, **kwargs)
+
+        await self._refresh_proxy_if_expired()
+        proxy_info = self._proxy_ip_pool.current_proxy if self._proxy_ip_pool else None
+        return await self._timed_request(self.get_http_client(follow_redirects), proxy_info, method, url, **kwargs)
+
+    async def _timed_request(self, client: httpx.AsyncClient, proxy_info, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if self._proxy_ip_pool:
+                self._proxy_ip_pool.record_result(proxy_info, False)
+            raise
+        if self._proxy_ip_pool:
+            success = response.status_code not in self.PROXY_FAILURE_STATUS_CODES
+            self._proxy_ip_pool.record_result(proxy_info, success, time.monotonic() - start)
+        return response
+
+    async def _stream_media(self, url: str, file_path: str, follow_redirects: bool = False, **kwargs) -> bool:
+        """
+        Stream a media file to disk through the media token bucket, see tools.media_downloader.stream_download
+        Args:
+            url: Media URL
+            file_path: Destination file, its directory must exist
+            follow_redirects: Whether the client follows redirects
+            **kwargs: Passed to stream_download, e.g. headers or segments
+
+        Returns:
+            Whether the file was downloaded
+        """
+        await RateLimiter.acquire(ENDPOINT_MEDIA)
+        await self._refresh_proxy_if_expired()
+        client = self.get_http_client(follow_redirects)
+        try:
+            await stream_download(client, url, file_path, timeout=self.timeout, **kwargs)
+            return True
+        except (httpx.HTTPError, MediaDownloadError) as exc:
+            utils.logger.error(
+                f"[{self.__class__.__name__}._stream_media] {exc.__class__.__name__} for {url} - {exc}"
+            )  # Keep original exception type name for developer debugging
+            return False
+
+    def _rate_limit_endpoint(self, url: str, **kwargs) -> str:
+        """
+        Endpoint class (search | detail | comments) whose token bucket paces this request,
+        clients whose endpoints can not be told apart by URL override it
+        """
+        return RateLimiter.classify(url)
+
+    def get_http_client(self, follow_redirects: bool = False) -> httpx.AsyncClient:
+        """
+        Shared long-lived httpx client for this platform client and its current proxy
+        Args:
+            follow_redirects: Whether the client follows redirects
+
+        Returns:
+            httpx.AsyncClient, owned by HttpClientPool and closed at shutdown
+        """
+        return HttpClientPool.get_client(self.__class__.__name__, self.proxy, follow_redirects)
+
+
+def sticky_proxy(arg_name: str):
+    """
+    Decorator for client methods whose requests must leave through one IP in rotation mode,
+    e.g. paging one note's comments with a cursor. Requests made inside the call share the
+    sticky key "<arg_name>=<value>"; an already active key of an outer call is kept.
+    Args:
+        arg_name: Argument identifying the note / thread, e.g. "note_id" or "content.content_id"
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if proxy_sticky_key_var.get():
+                return await func(*args, **kwargs)
+            name, *attrs = arg_name.split(".")
+            value = signature.bind_partial(*args, **kwargs).arguments.get(name)
+            for attr in attrs:
+                value = getattr(value, attr, None)
+            token = proxy_sticky_key_var.set(f"{arg_name}={value}")
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                proxy_sticky_key_var.reset(token)
+
+        return wrapper
+
+    return decorator
@@ -25,6 +25,8 @@
 from typing import List
 
 import config
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -37,6 +39,7 @@ class BiliStoreFactory:
         "db": BiliDbStoreImplement,
         "postgres": BiliDbStoreImplement,
         "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonlStoreImplement,
         "sqlite": BiliSqliteStoreImplement,
         "mongodb": BiliMongoStoreImplement,
         "excel": BiliExcelStoreImplement,
@@ -46,8 +49,14 @@ class BiliStoreFactory:
     def create_store() -> AbstractStore:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("bili", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("bili", BiliStoreFactory.create_store)
+        return BiliStoreFactory.create_store()
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -78,7 +87,7 @@ async def update_bilibili_video(video_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
-    await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
+    await BiliStoreFactory.get_store().store_content(content_item=save_content_item)
 
 
 async def update_up_info(video_item: Dict):
@@ -97,7 +106,7 @@ async def update_up_info(video_item: Dict):
         "is_official": video_item_card.get("official_verify").get("type"),
     }
     utils.logger.info(f"[store.bilibili.update_up_info] bilibili user_id:{video_item_card.get('mid')}")
-    await BiliStoreFactory.create_store().store_creator(creator=saver_up_info)
+    await BiliStoreFactory.get_store().store_creator(creator=saver_up_info)
 
 
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
@@ -129,7 +138,7 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await BiliStoreFactory.get_store().store_comment(comment_item=save_comment_item)
 
 
 async def store_video(aid, video_content, extension_file_name):
@@ -147,6 +156,16 @@ async def store_video(aid, video_content, extension_file_name):
     })
 
 
+def get_video_path(aid, extension_file_name) -> str:
+    """
+    video local path for streaming straight to disk
+    Args:
+        aid:
+        extension_file_name:
+    """
+    return BilibiliVideo().prepare_save_file_name(aid, extension_file_name)
+
+
 async def batch_update_bilibili_creator_fans(creator_info: Dict, fans_list: List[Dict]):
     if not fans_list:
         return
@@ -212,7 +231,7 @@ async def update_bilibili_creator_contact(creator_info: Dict, fan_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
 
-    await BiliStoreFactory.create_store().store_contact(contact_item=save_contact_item)
+    await BiliStoreFactory.get_store().store_contact(contact_item=save_contact_item)
 
 
 async def update_bilibili_creator_dynamic(creator_info: Dict, dynamic_info: Dict):
@@ -229,4 +248,4 @@ async def update_bilibili_creator_dynamic(creator_info: Dict, dynamic_info: Dict
         "last_modify_ts": utils.get_current_timestamp(),
     }
 
-    await BiliStoreFactory.create_store().store_dynamic(dynamic_item=save_dynamic_item)
+    await BiliStoreFactory.get_store().store_dynamic(dynamic_item=save_dynamic_item)
@@ -27,14 +27,14 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import BilibiliVideoComment, BilibiliVideo, BilibiliUpInfo, BilibiliUpDynamic, BilibiliContactInfo
 from tools.async_file_writer import AsyncFileWriter
@@ -45,10 +45,7 @@ from database.mongodb_store_base import MongoDBStoreBase
 
 class BiliCsvStoreImplement(AbstractStore):
     def __init__(self):
-        self.file_writer = AsyncFileWriter(
-            crawler_type=crawler_type_var.get(),
-            platform="bili"
-        )
+        self.file_writer = AsyncFileWriter.get_instance(platform="bili", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -128,26 +125,24 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = int(content_item.get("video_id"))
-        content_item["video_id"] = video_id
-        content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
-        content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
-        content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
-        
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Bilibili content DB bulk storage implementation
+        Args:
+            content_items: content item dict list
+        """
+        rows = []
+        for content_item in content_items:
+            content_item["video_id"] = int(content_item.get("video_id"))
+            content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
+            content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
+            content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
+            rows.append(self._with_timestamps(content_item))
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideo).where(BilibiliVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_content = BilibiliVideo(**content_item)
-                session.add(new_content)
-            else:
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    setattr(video_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliVideo, rows)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -155,28 +150,26 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["like_count"] = str(comment_item.get("like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
-        
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Bilibili comment DB bulk storage implementation
+        Args:
+            comment_items: comment item dict list
+        """
+        rows = []
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
+            comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            comment_item["like_count"] = str(comment_item.get("like_count", "0"))
+            comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            rows.append(self._with_timestamps(comment_item))
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideoComment).where(BilibiliVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
-
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_comment = BilibiliVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliVideoComment, rows)
 
     async def store_creator(self, creator: Dict):
         """
@@ -184,27 +177,25 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             creator: creator item dict
         """
-        creator_id = int(creator.get("user_id"))
-        creator["user_id"] = creator_id
-        creator["total_fans"] = int(creator.get("total_fans", 0) or 0)
-        creator["total_liked"] = int(creator.get("total_liked", 0) or 0)
-        creator["user_rank"] = int(creator.get("user_rank", 0) or 0)
-        creator["is_official"] = int(creator.get("is_official", 0) or 0)
+        await self.store_creators([creator])
+
+    async def store_creators(self, creators: List[Dict]):
+        """
+        Bilibili creator DB bulk storage implementation
+        Args:
+            creators: creator item dict list
+        """
+        rows = []
+        for creator in creators:
+            creator["user_id"] = int(creator.get("user_id"))
+            creator["total_fans"] = int(creator.get("total_fans", 0) or 0)
+            creator["total_liked"] = int(creator.get("total_liked", 0) or 0)
+            creator["user_rank"] = int(creator.get("user_rank", 0) or 0)
+            creator["is_official"] = int(creator.get("is_official", 0) or 0)
+            rows.append(self._with_timestamps(creator))
 
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpInfo).where(BilibiliUpInfo.user_id == creator_id))
-            creator_detail = result.scalar_one_or_none()
-
-            if not creator_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                new_creator = BilibiliUpInfo(**creator)
-                session.add(new_creator)
-            else:
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    setattr(creator_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliUpInfo, rows)
 
     async def store_contact(self, contact_item: Dict):
         """
@@ -212,27 +203,22 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             contact_item: contact item dict
         """
-        up_id = int(contact_item.get("up_id"))
-        fan_id = int(contact_item.get("fan_id"))
-        contact_item["up_id"] = up_id
-        contact_item["fan_id"] = fan_id
+        await self.store_contacts([contact_item])
+
+    async def store_contacts(self, contact_items: List[Dict]):
+        """
+        Bilibili contact DB bulk storage implementation, keyed on (up_id, fan_id)
+        Args:
+            contact_items: contact item dict list
+        """
+        rows = []
+        for contact_item in contact_items:
+            contact_item["up_id"] = int(contact_item.get("up_id"))
+            contact_item["fan_id"] = int(contact_item.get("fan_id"))
+            rows.append(self._with_timestamps(contact_item))
 
         async with get_session() as session:
-            result = await session.execute(
-                select(BilibiliContactInfo).where(BilibiliContactInfo.up_id == up_id, BilibiliContactInfo.fan_id == fan_id)
-            )
-            contact_detail = result.scalar_one_or_none()
-
-            if not contact_detail:
-                contact_item["add_ts"] = utils.get_current_timestamp()
-                contact_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_contact = BilibiliContactInfo(**contact_item)
-                session.add(new_contact)
-            else:
-                contact_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in contact_item.items():
-                    setattr(contact_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliContactInfo, rows)
 
     async def store_dynamic(self, dynamic_item):
         """
@@ -240,31 +226,32 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             dynamic_item: dynamic item dict
         """
-        dynamic_id = int(dynamic_item.get("dynamic_id"))
-        dynamic_item["dynamic_id"] = dynamic_id
-        
+        await self.store_dynamics([dynamic_item])
+
+    async def store_dynamics(self, dynamic_items: List[Dict]):
+        """
+        Bilibili dynamic DB bulk storage implementation
+        Args:
+            dynamic_items: dynamic item dict list
+        """
+        rows = []
+        for dynamic_item in dynamic_items:
+            dynamic_item["dynamic_id"] = int(dynamic_item.get("dynamic_id"))
+            rows.append(self._with_timestamps(dynamic_item))
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpDynamic).where(BilibiliUpDynamic.dynamic_id == dynamic_id))
-            dynamic_detail = result.scalar_one_or_none()
+            await bulk_upsert(session, BilibiliUpDynamic, rows)
 
-            if not dynamic_detail:
-                dynamic_item["add_ts"] = utils.get_current_timestamp()
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_dynamic = BilibiliUpDynamic(**dynamic_item)
-                session.add(new_dynamic)
-            else:
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in dynamic_item.items():
-                    setattr(dynamic_detail, key, value)
-            await session.commit()
+    @staticmethod
+    def _with_timestamps(item: Dict) -> Dict:
+        # add_ts is only written on insert, see database.bulk_upsert.INSERT_ONLY_COLUMNS
+        now = utils.get_current_timestamp()
+        return {**item, "add_ts": now, "last_modify_ts": now}
 
 
 class BiliJsonStoreImplement(AbstractStore):
     def __init__(self):
-        self.file_writer = AsyncFileWriter(
-            crawler_type=crawler_type_var.get(),
-            platform="bili"
-        )
+        self.file_writer = AsyncFileWriter.get_instance(platform="bili", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -337,6 +324,80 @@ class BiliJsonStoreImplement(AbstractStore):
         )
 
 
+class BiliJsonlStoreImplement(AbstractStore):
+    def __init__(self):
+        self.file_writer = AsyncFileWriter.get_instance(platform="bili", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=content_item,
+            item_type="contents"
+        )
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=comment_item,
+            item_type="comments"
+        )
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSONL storage implementation
+        Args:
+            creator:
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=creator,
+            item_type="creators"
+        )
+
+    async def store_contact(self, contact_item: Dict):
+        """
+        creator contact JSONL storage implementation
+        Args:
+            contact_item: creator's contact item dict
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=contact_item,
+            item_type="contacts"
+        )
+
+    async def store_dynamic(self, dynamic_item: Dict):
+        """
+        creator dynamic JSONL storage implementation
+        Args:
+            dynamic_item: creator's contact item dict
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=dynamic_item,
+            item_type="dynamics"
+        )
+
 
 class BiliSqliteStoreImplement(BiliDbStoreImplement):
     pass
@@ -58,6 +58,20 @@ class BilibiliVideo(AbstractStoreVideo):
         """
         return f"{self.video_store_path}/{aid}/{extension_file_name}"
 
+    def prepare_save_file_name(self, aid: str, extension_file_name: str) -> str:
+        """
+        make save file name and create its directory, for videos streamed straight to disk
+
+        Args:
+            aid: aid
+            extension_file_name: video filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.video_store_path + "/" + str(aid)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(aid), extension_file_name)
+
     async def save_video(self, aid: int, video_content: str, extension_file_name="mp4"):
         """
         save video to local
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/buffered_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Buffered store: queues items in memory and writes them in batches from a background task
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+import config
+from base.base_crawler import AbstractStore
+from database.db_session import batch_session
+from database.mongodb_store_base import MongoDBStoreBase
+from tools import utils
+from tools.async_file_writer import AsyncFileWriter
+
+
+class BufferedStore(AbstractStore):
+    """
+    Wraps a platform store with one bounded asyncio queue per store method (store_content,
+    store_comment, store_creator, ...). A background flusher per queue writes a batch when
+    STORE_BUFFER_BATCH_SIZE items are queued or STORE_BUFFER_FLUSH_INTERVAL_MS has passed.
+    When a queue is full, store_xxx() waits until the flusher catches up (backpressure).
+
+    Each batch is written through a single store instance inside a batch scope of the
+    current save option, so csv/json/jsonl open each file once per batch, db/sqlite/postgres
+    share one session and commit, and mongodb sends one bulk_write per collection.
+
+    A failed SQL batch was rolled back, so it is retried item by item. File and mongodb
+    batches may have been partly written when they fail, so they are not retried (that
+    would duplicate rows); their items are logged as dropped instead.
+    """
+
+    # Class-level instance management, one buffered store per platform and save option
+    _instances: Dict[str, "BufferedStore"] = {}
+
+    @classmethod
+    def get_instance(cls, platform: str, store_factory: Callable[[], AbstractStore]) -> "BufferedStore":
+        """
+        Get or create the buffered store for the given platform and current save option
+
+        Args:
+            platform: Platform name (xhs, dy, ks, etc.)
+            store_factory: Creates the underlying store, e.g. XhsStoreFactory.create_store
+
+        Returns:
+            BufferedStore instance
+        """
+        key = f"{platform}_{config.SAVE_DATA_OPTION}"
+        if key not in cls._instances:
+            cls._instances[key] = cls(store_factory)
+        return cls._instances[key]
+
+    @classmethod
+    async def flush_all(cls):
+        """
+        Wait until every queued item of every buffered store has been written
+        """
+        for key, instance in list(cls._instances.items()):
+            try:
+                await instance.flush()
+            except Exception as e:
+                utils.logger.error(f"[BufferedStore.flush_all] Error flushing {key}: {e}")
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Flush and stop every buffered store, should be called at shutdown
+        """
+        for key, instance in list(cls._instances.items()):
+            try:
+                await instance.close()
+            except Exception as e:
+                utils.logger.error(f"[BufferedStore.close_all] Error closing {key}: {e}")
+        cls._instances.clear()
+
+    def __init__(
+        self,
+        store_factory: Callable[[], AbstractStore],
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.store_factory = store_factory
+        self.batch_size = max(1, batch_size or config.STORE_BUFFER_BATCH_SIZE)
+        self.flush_interval = (flush_interval_ms or config.STORE_BUFFER_FLUSH_INTERVAL_MS) / 1000
+        self.queue_size = queue_size or config.STORE_BUFFER_QUEUE_SIZE
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._flushers: Dict[str, asyncio.Task] = {}
+
+    async def store_content(self, content_item: Dict):
+        await self._enqueue("store_content", content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        await self._enqueue("store_comment", comment_item)
+
+    async def store_creator(self, creator: Dict):
+        await self._enqueue("store_creator", creator)
+
+    def __getattr__(self, name: str):
+        # Platform specific methods such as Bilibili's store_contact / store_dynamic
+        if not name.startswith("store_"):
+            raise AttributeError(name)
+
+        async def _store(item: Dict):
+            await self._enqueue(name, item)
+
+        return _store
+
+    async def flush(self):
+        """
+        Wait until every queued item has been written
+        """
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    async def close(self):
+        """
+        Flush remaining items and stop the background flushers
+        """
+        await self.flush()
+        for task in self._flushers.values():
+            task.cancel()
+        await asyncio.gather(*self._flushers.values(), return_exceptions=True)
+        self._flushers.clear()
+        self._queues.clear()
+
+    async def _enqueue(self, method_name: str, item: Dict):
+        queue = self._queues.get(method_name)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queues[method_name] = queue
+            self._flushers[method_name] = asyncio.create_task(self._flush_loop(method_name, queue))
+        await queue.put(item)
+
+    async def _flush_loop(self, method_name: str, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Dict] = [await queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write_batch(method_name, batch)
+            except Exception as e:
+                utils.logger.error(f"[BufferedStore._flush_loop] Dropped {len(batch)} {method_name} items: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _write_batch(self, method_name: str, batch: List[Dict]):
+        store = self.store_factory()
+        store_method = getattr(store, method_name)
+        # store_content -> store_contents etc., lets SQL stores write the batch as one bulk upsert
+        batch_method = getattr(store, f"{method_name}s", None)
+        transactional = config.SAVE_DATA_OPTION in ("db", "sqlite", "postgres")
+        try:
+            async with self._batch_scope():
+                if transactional and batch_method is not None:
+                    await batch_method(batch)
+                elif transactional:
+                    for item in batch:
+                        await store_method(item)
+                else:
+                    # Files and mongodb are only written when the scope exits, a bad item only loses itself
+                    for item in batch:
+                        try:
+                            await store_method(item)
+                        except Exception as e:
+                            utils.logger.error(f"[BufferedStore._write_batch] {method_name} failed: {e}, item: {item}")
+            return
+        except Exception as e:
+            if not transactional:
+                # Part of the batch may already be on disk / in mongodb, retrying would duplicate it
+                raise
+            utils.logger.error(
+                f"[BufferedStore._write_batch] Batch {method_name} of {len(batch)} items failed: {e}, retrying one by one"
+            )
+
+        for item in batch:
+            try:
+                await store_method(item)
+            except Exception as e:
+                utils.logger.error(f"[BufferedStore._write_batch] {method_name} failed: {e}, item: {item}")
+
+    @staticmethod
+    @asynccontextmanager
+    async def _batch_scope():
+        save_option = config.SAVE_DATA_OPTION
+        if save_option in ("csv", "json", "jsonl"):
+            async with AsyncFileWriter.batch_write():
+                yield
+        elif save_option in ("db", "sqlite", "postgres"):
+            async with batch_session():
+                yield
+        elif save_option == "mongodb":
+            async with MongoDBStoreBase.batch_write():
+                yield
+        else:
+            yield
@@ -24,6 +24,8 @@
 from typing import List
 
 import config
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -36,6 +38,7 @@ class DouyinStoreFactory:
         "db": DouyinDbStoreImplement,
         "postgres": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonlStoreImplement,
         "sqlite": DouyinSqliteStoreImplement,
         "mongodb": DouyinMongoStoreImplement,
         "excel": DouyinExcelStoreImplement,
@@ -45,8 +48,14 @@ class DouyinStoreFactory:
     def create_store() -> AbstractStore:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("douyin", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("douyin", DouyinStoreFactory.create_store)
+        return DouyinStoreFactory.create_store()
 
 
 def _extract_note_image_list(aweme_detail: Dict) -> List[str]:
@@ -184,7 +193,7 @@ async def update_douyin_aweme(aweme_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}")
-    await DouyinStoreFactory.create_store().store_content(content_item=save_content_item)
+    await DouyinStoreFactory.get_store().store_content(content_item=save_content_item)
 
 
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
@@ -224,7 +233,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
     }
     utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
 
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await DouyinStoreFactory.get_store().store_comment(comment_item=save_comment_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -245,7 +254,7 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.douyin.save_creator] creator:{local_db_item}")
-    await DouyinStoreFactory.create_store().store_creator(local_db_item)
+    await DouyinStoreFactory.get_store().store_creator(local_db_item)
 
 
 async def update_dy_aweme_image(aweme_id, pic_content, extension_file_name):
@@ -276,3 +285,29 @@ async def update_dy_aweme_video(aweme_id, video_content, extension_file_name):
     """
 
     await DouYinVideo().store_video({"aweme_id": aweme_id, "video_content": video_content, "extension_file_name": extension_file_name})
+
+
+def get_dy_aweme_image_path(aweme_id, extension_file_name) -> str:
+    """
+    Local path for a Douyin note image streamed straight to disk
+    Args:
+        aweme_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return DouYinImage().prepare_save_file_name(aweme_id, extension_file_name)
+
+
+def get_dy_aweme_video_path(aweme_id, extension_file_name) -> str:
+    """
+    Local path for a Douyin video streamed straight to disk
+    Args:
+        aweme_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return DouYinVideo().prepare_save_file_name(aweme_id, extension_file_name)
@@ -26,12 +26,13 @@ import asyncio
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
-from sqlalchemy import select
+from sqlalchemy import update
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import DouyinAweme, DouyinAwemeComment, DyCreator
 from tools import utils, words
@@ -42,10 +43,7 @@ from database.mongodb_store_base import MongoDBStoreBase
 
 class DouyinCsvStoreImplement(AbstractStore):
     def __init__(self):
-        self.file_writer = AsyncFileWriter(
-            crawler_type=crawler_type_var.get(),
-            platform="douyin"
-        )
+        self.file_writer = AsyncFileWriter.get_instance(platform="douyin", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -97,20 +95,30 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        aweme_id = int(content_item.get("aweme_id"))
-        async with get_session() as session:
-            result = await session.execute(select(DouyinAweme).where(DouyinAweme.aweme_id == aweme_id))
-            aweme_detail = result.scalar_one_or_none()
-
-            if not aweme_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                if content_item.get("title"):
-                    new_content = DouyinAweme(**content_item)
-                    session.add(new_content)
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Douyin content DB bulk storage implementation
+        Args:
+            content_items: content item dict list
+        """
+        add_ts = utils.get_current_timestamp()
+        rows, untitled_rows = [], []
+        for content_item in content_items:
+            row = {**content_item, "aweme_id": int(content_item.get("aweme_id"))}
+            # Items without a title only refresh an existing aweme, they are never inserted
+            if row.get("title"):
+                rows.append({**row, "add_ts": add_ts})
             else:
-                for key, value in content_item.items():
-                    setattr(aweme_detail, key, value)
-            await session.commit()
+                untitled_rows.append(row)
+
+        async with get_session() as session:
+            await bulk_upsert(session, DouyinAweme, rows)
+            for row in untitled_rows:
+                await session.execute(
+                    update(DouyinAweme).where(DouyinAweme.aweme_id == row["aweme_id"]).values(**row)
+                )
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -118,19 +126,21 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
-        async with get_session() as session:
-            result = await session.execute(select(DouyinAwemeComment).where(DouyinAwemeComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
+        await self.store_comments([comment_item])
 
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = DouyinAwemeComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Douyin comment DB bulk storage implementation
+        Args:
+            comment_items: comment item dict list
+        """
+        add_ts = utils.get_current_timestamp()
+        rows = [
+            {**comment_item, "comment_id": int(comment_item.get("comment_id")), "add_ts": add_ts}
+            for comment_item in comment_items
+        ]
+        async with get_session() as session:
+            await bulk_upsert(session, DouyinAwemeComment, rows)
 
     async def store_creator(self, creator: Dict):
         """
@@ -138,27 +148,23 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
-        async with get_session() as session:
-            result = await session.execute(select(DyCreator).where(DyCreator.user_id == user_id))
-            user_detail = result.scalar_one_or_none()
+        await self.store_creators([creator])
 
-            if not user_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                new_creator = DyCreator(**creator)
-                session.add(new_creator)
-            else:
-                for key, value in creator.items():
-                    setattr(user_detail, key, value)
-            await session.commit()
+    async def store_creators(self, creators: List[Dict]):
+        """
+        Douyin creator DB bulk storage implementation
+        Args:
+            creators: creator dict list
+        """
+        add_ts = utils.get_current_timestamp()
+        rows = [{**creator, "add_ts": add_ts} for creator in creators]
+        async with get_session() as session:
+            await bulk_upsert(session, DyCreator, rows)
 
 
 class DouyinJsonStoreImplement(AbstractStore):
     def __init__(self):
-        self.file_writer = AsyncFileWriter(
-            crawler_type=crawler_type_var.get(),
-            platform="douyin"
-        )
+        self.file_writer = AsyncFileWriter.get_instance(platform="douyin", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -203,6 +209,52 @@ class DouyinJsonStoreImplement(AbstractStore):
         )
 
 
+class DouyinJsonlStoreImplement(AbstractStore):
+    def __init__(self):
+        self.file_writer = AsyncFileWriter.get_instance(platform="douyin", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=content_item,
+            item_type="contents"
+        )
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=comment_item,
+            item_type="comments"
+        )
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSONL storage implementation
+        Args:
+            creator:
+
+        Returns:
+
+        """
+        await self.file_writer.write_single_item_to_jsonl(
+            item=creator,
+            item_type="creators"
+        )
+
 
 class DouyinSqliteStoreImplement(DouyinDbStoreImplement):
     pass
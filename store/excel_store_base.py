@@ -33,26 +33,73 @@ Provides Excel export functionality for crawled data with formatted sheets
 
 import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pathlib import Path
 
 try:
     import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
     from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
 
+import config
 from base.base_crawler import AbstractStore
 from tools import utils
 
+# Named styles registered once per workbook and shared by all cells
+HEADER_STYLE = "mc_header"
+CELL_STYLE = "mc_cell"
+
+MIN_COLUMN_WIDTH = 10
+MAX_COLUMN_WIDTH = 50
+
+# Logical sheets: attribute prefix -> sheet title
+SHEET_TITLES = {
+    "contents": "Contents",
+    "comments": "Comments",
+    "creators": "Creators",
+    "contacts": "Contacts",
+    "dynamics": "Dynamics",
+}
+
+
+class _SheetState:
+    """
+    Headers, row count, rollover part and column widths of one logical sheet
+    """
+
+    def __init__(self, title: str):
+        self.title = title
+        self.headers: List[str] = []
+        self.part = 1
+        self.rows = 0  # data rows in the current worksheet
+        self.widths: List[int] = []
+        # Write-only mode: first rows of the worksheet, held back until their column widths are known
+        self.pending: Optional[List[List[Any]]] = None
+
+    def track_widths(self, values: List[Any]):
+        for index, value in enumerate(values):
+            width = min(len(str(value)), MAX_COLUMN_WIDTH) if value != "" else 0
+            if index >= len(self.widths):
+                self.widths.append(width)
+            elif width > self.widths[index]:
+                self.widths[index] = width
+
 
 class ExcelStoreBase(AbstractStore):
     """
     Base class for Excel storage implementation
     Provides formatted Excel export with multiple sheets for contents, comments, and creators
     Uses singleton pattern to maintain state across multiple store calls
+
+    With EXCEL_WRITE_ONLY the workbook uses openpyxl write-only worksheets, which stream rows
+    to temporary files instead of keeping every cell in memory. Column widths are then taken
+    from the first EXCEL_WIDTH_SAMPLE_ROWS rows of each sheet, since a write-only sheet fixes
+    them before its first row is written. In both modes a sheet that reaches
+    EXCEL_MAX_ROWS_PER_SHEET data rows continues in a new sheet, e.g. "Comments_2".
     """
 
     # Class-level singleton management
@@ -92,13 +139,14 @@ class ExcelStoreBase(AbstractStore):
                     utils.logger.error(f"[ExcelStoreBase] Error flushing {key}: {e}")
             cls._instances.clear()
 
-    def __init__(self, platform: str, crawler_type: str = "search"):
+    def __init__(self, platform: str, crawler_type: str = "search", write_only: Optional[bool] = None):
         """
         Initialize Excel store
 
         Args:
             platform: Platform name (xhs, dy, ks, etc.)
             crawler_type: Type of crawler (search, detail, creator)
+            write_only: Stream rows with write-only worksheets, EXCEL_WRITE_ONLY by default
         """
         if not EXCEL_AVAILABLE:
             raise ImportError(
@@ -109,19 +157,25 @@ class ExcelStoreBase(AbstractStore):
         super().__init__()
         self.platform = platform
         self.crawler_type = crawler_type
+        self.write_only = config.EXCEL_WRITE_ONLY if write_only is None else write_only
+        self.max_rows_per_sheet = config.EXCEL_MAX_ROWS_PER_SHEET
+        self.width_sample_rows = config.EXCEL_WIDTH_SAMPLE_ROWS
 
         # Create data directory
         self.data_dir = Path("data") / platform
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         # Initialize workbook
-        self.workbook = openpyxl.Workbook()
-        self.workbook.remove(self.workbook.active)  # Remove default sheet
+        self.workbook = openpyxl.Workbook(write_only=self.write_only)
+        if not self.write_only:
+            self.workbook.remove(self.workbook.active)  # Remove default sheet
+        self._register_styles()
+        self._states: Dict[str, _SheetState] = {kind: _SheetState(title) for kind, title in SHEET_TITLES.items()}
 
-        # Create sheets
-        self.contents_sheet = self.workbook.create_sheet("Contents")
-        self.comments_sheet = self.workbook.create_sheet("Comments")
-        self.creators_sheet = self.workbook.create_sheet("Creators")
+        # Create sheets, write-only sheets are created with their first row so no empty sheet is saved
+        self.contents_sheet = None if self.write_only else self.workbook.create_sheet("Contents")
+        self.comments_sheet = None if self.write_only else self.workbook.create_sheet("Comments")
+        self.creators_sheet = None if self.write_only else self.workbook.create_sheet("Creators")
 
         # Track if headers are written
         self.contents_headers_written = False
@@ -140,51 +194,51 @@ class ExcelStoreBase(AbstractStore):
 
         utils.logger.info(f"[ExcelStoreBase] Initialized Excel export to: {self.filename}")
 
-    def _apply_header_style(self, sheet, row_num: int = 1):
+    def _register_styles(self):
         """
-        Apply formatting to header row
-
-        Args:
-            sheet: Worksheet object
-            row_num: Row number for headers (default: 1)
+        Register the header and cell styles once, cells refer to them by name
+        instead of each allocating its own font, fill, alignment and border
         """
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
         border = Border(
             left=Side(style='thin'),
             right=Side(style='thin'),
             top=Side(style='thin'),
             bottom=Side(style='thin')
         )
+        header_style = NamedStyle(name=HEADER_STYLE)
+        header_style.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header_style.font = Font(bold=True, color="FFFFFF", size=11)
+        header_style.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        header_style.border = border
+        cell_style = NamedStyle(name=CELL_STYLE)
+        cell_style.alignment = Alignment(vertical="top", wrap_text=True)
+        cell_style.border = border
+        self.workbook.add_named_style(header_style)
+        self.workbook.add_named_style(cell_style)
 
-        for cell in sheet[row_num]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-
-    def _auto_adjust_column_width(self, sheet):
+    def _apply_header_style(self, sheet, row_num: int = 1):
         """
-        Auto-adjust column widths based on content
+        Apply formatting to header row
 
         Args:
             sheet: Worksheet object
+            row_num: Row number for headers (default: 1)
         """
-        for column in sheet.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
+        for cell in sheet[row_num]:
+            cell.style = HEADER_STYLE
 
-            for cell in column:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except (TypeError, AttributeError):
-                    pass
+    def _auto_adjust_column_width(self, sheet, state: _SheetState):
+        """
+        Set column widths from the widths tracked while rows were written
 
+        Args:
+            sheet: Worksheet object
+            state: Sheet state holding the widths
+        """
+        for index, width in enumerate(state.widths, 1):
             # Set width with min/max constraints
-            adjusted_width = min(max(max_length + 2, 10), 50)
-            sheet.column_dimensions[column_letter].width = adjusted_width
+            adjusted_width = min(max(width + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH)
+            sheet.column_dimensions[get_column_letter(index)].width = adjusted_width
 
     def _write_headers(self, sheet, headers: List[str]):
         """
@@ -194,41 +248,123 @@ class ExcelStoreBase(AbstractStore):
             sheet: Worksheet object
             headers: List of header names
         """
+        if self.write_only:
+            # Appended with the first data rows once their widths are known
+            return
         for col_num, header in enumerate(headers, 1):
             sheet.cell(row=1, column=col_num, value=header)
 
         self._apply_header_style(sheet)
 
-    def _write_row(self, sheet, data: Dict[str, Any], headers: List[str]):
+    def _write_row(self, sheet, state: _SheetState, values: List[Any]):
         """
         Write data row to sheet
 
         Args:
             sheet: Worksheet object
-            data: Data dictionary
-            headers: List of header names (defines column order)
+            state: Sheet state, tracks the row number and column widths
+            values: Cell values in header order
         """
-        row_num = sheet.max_row + 1
+        state.rows += 1
+        state.track_widths(values)
+        if self.write_only:
+            if state.pending is not None:
+                state.pending.append(values)
+                if len(state.pending) > self.width_sample_rows:
+                    self._release_pending(sheet, state)
+                return
+            sheet.append(self._styled_cells(sheet, values, CELL_STYLE))
+            return
 
-        for col_num, header in enumerate(headers, 1):
-            value = data.get(header, "")
+        row_num = state.rows + 1
+        for col_num, value in enumerate(values, 1):
+            cell = sheet.cell(row=row_num, column=col_num, value=value)
+            cell.style = CELL_STYLE
+
+    def _release_pending(self, sheet, state: _SheetState):
+        """
+        Fix the column widths of a write-only sheet and write its held back header and rows
+        """
+        if state.pending is None:
+            return
+        self._auto_adjust_column_width(sheet, state)
+        sheet.append(self._styled_cells(sheet, state.headers, HEADER_STYLE))
+        for values in state.pending:
+            sheet.append(self._styled_cells(sheet, values, CELL_STYLE))
+        state.pending = None
+
+    @staticmethod
+    def _styled_cells(sheet, values: List[Any], style: str) -> List[Any]:
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.style = style
+            cells.append(cell)
+        return cells
+
+    def _finish_sheet(self, sheet, state: _SheetState):
+        """
+        Complete a worksheet before rolling over or saving
+        """
+        if self.write_only:
+            self._release_pending(sheet, state)
+        else:
+            self._auto_adjust_column_width(sheet, state)
+
+    def _open_sheet(self, kind: str, state: _SheetState):
+        """
+        Create the worksheet a logical sheet writes to next, the first one or a rollover
+
+        Returns:
+            The new worksheet
+        """
+        current = getattr(self, f"{kind}_sheet")
+        if current is not None and state.rows > 0:
+            self._finish_sheet(current, state)
+            state.part += 1
+            utils.logger.info(
+                f"[ExcelStoreBase] {state.title} reached {self.max_rows_per_sheet} rows, continue in {state.title}_{state.part}"
+            )
+        title = state.title if state.part == 1 else f"{state.title}_{state.part}"
+        sheet = current if current is not None and state.rows == 0 else self.workbook.create_sheet(title)
+        setattr(self, f"{kind}_sheet", sheet)
+        state.rows = 0
+        state.widths = []
+        state.track_widths(state.headers)
+        if self.write_only:
+            state.pending = []
+        self._write_headers(sheet, state.headers)
+        return sheet
+
+    def _store_row(self, kind: str, item: Dict):
+        """
+        Write an item to a logical sheet, its first item defines the columns
+
+        Args:
+            kind: contents | comments | creators | contacts | dynamics
+            item: Data dictionary
+        """
+        state = self._states[kind]
+        sheet = getattr(self, f"{kind}_sheet")
+        if not getattr(self, f"{kind}_headers_written"):
+            # Define headers (customize based on platform)
+            state.headers = list(item.keys())
+            sheet = self._open_sheet(kind, state)
+            setattr(self, f"{kind}_headers_written", True)
+        elif state.rows >= self.max_rows_per_sheet:
+            sheet = self._open_sheet(kind, state)
+
+        values = []
+        for header in state.headers:
+            value = item.get(header, "")
 
             # Handle different data types
             if isinstance(value, (list, dict)):
                 value = str(value)
             elif value is None:
                 value = ""
-
-            cell = sheet.cell(row=row_num, column=col_num, value=value)
-
-            # Apply basic formatting
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
+            values.append(value)
+        self._write_row(sheet, state, values)
 
     async def store_content(self, content_item: Dict):
         """
@@ -237,16 +373,7 @@ class ExcelStoreBase(AbstractStore):
         Args:
             content_item: Content data dictionary
         """
-        # Define headers (customize based on platform)
-        headers = list(content_item.keys())
-
-        # Write headers if first time
-        if not self.contents_headers_written:
-            self._write_headers(self.contents_sheet, headers)
-            self.contents_headers_written = True
-
-        # Write data row
-        self._write_row(self.contents_sheet, content_item, headers)
+        self._store_row("contents", content_item)
 
         # Get ID from various possible field names
         content_id = content_item.get('note_id') or content_item.get('aweme_id') or content_item.get('video_id') or content_item.get('content_id') or 'N/A'
@@ -259,16 +386,7 @@ class ExcelStoreBase(AbstractStore):
         Args:
             comment_item: Comment data dictionary
         """
-        # Define headers
-        headers = list(comment_item.keys())
-
-        # Write headers if first time
-        if not self.comments_headers_written:
-            self._write_headers(self.comments_sheet, headers)
-            self.comments_headers_written = True
-
-        # Write data row
-        self._write_row(self.comments_sheet, comment_item, headers)
+        self._store_row("comments", comment_item)
 
         utils.logger.info(f"[ExcelStoreBase] Stored comment to Excel: {comment_item.get('comment_id', 'N/A')}")
 
@@ -279,16 +397,7 @@ class ExcelStoreBase(AbstractStore):
         Args:
             creator: Creator data dictionary
         """
-        # Define headers
-        headers = list(creator.keys())
-
-        # Write headers if first time
-        if not self.creators_headers_written:
-            self._write_headers(self.creators_sheet, headers)
-            self.creators_headers_written = True
-
-        # Write data row
-        self._write_row(self.creators_sheet, creator, headers)
+        self._store_row("creators", creator)
 
         utils.logger.info(f"[ExcelStoreBase] Stored creator to Excel: {creator.get('user_id', 'N/A')}")
 
@@ -299,20 +408,7 @@ class ExcelStoreBase(AbstractStore):
         Args:
             contact_item: Contact data dictionary
         """
-        # Create contacts sheet if not exists
-        if self.contacts_sheet is None:
-            self.contacts_sheet = self.workbook.create_sheet("Contacts")
-
-        # Define headers
-        headers = list(contact_item.keys())
-
-        # Write headers if first time
-        if not self.contacts_headers_written:
-            self._write_headers(self.contacts_sheet, headers)
-            self.contacts_headers_written = True
-
-        # Write data row
-        self._write_row(self.contacts_sheet, contact_item, headers)
+        self._store_row("contacts", contact_item)
 
         utils.logger.info(f"[ExcelStoreBase] Stored contact to Excel: up_id={contact_item.get('up_id', 'N/A')}, fan_id={contact_item.get('fan_id', 'N/A')}")
 
@@ -323,20 +419,7 @@ class ExcelStoreBase(AbstractStore):
         Args:
             dynamic_item: Dynamic data dictionary
         """
-        # Create dynamics sheet if not exists
-        if self.dynamics_sheet is None:
-            self.dynamics_sheet = self.workbook.create_sheet("Dynamics")
-
-        # Define headers
-        headers = list(dynamic_item.keys())
-
-        # Write headers if first time
-        if not self.dynamics_headers_written:
-            self._write_headers(self.dynamics_sheet, headers)
-            self.dynamics_headers_written = True
-
-        # Write data row
-        self._write_row(self.dynamics_sheet, dynamic_item, headers)
+        self._store_row("dynamics", dynamic_item)
 
         utils.logger.info(f"[ExcelStoreBase] Stored dynamic to Excel: {dynamic_item.get('dynamic_id', 'N/A')}")
 
@@ -345,26 +428,16 @@ class ExcelStoreBase(AbstractStore):
         Save workbook to file
         """
         try:
-            # Auto-adjust column widths for all sheets
-            self._auto_adjust_column_width(self.contents_sheet)
-            self._auto_adjust_column_width(self.comments_sheet)
-            self._auto_adjust_column_width(self.creators_sheet)
-            if self.contacts_sheet is not None:
-                self._auto_adjust_column_width(self.contacts_sheet)
-            if self.dynamics_sheet is not None:
-                self._auto_adjust_column_width(self.dynamics_sheet)
-
-            # Remove empty sheets (only header row)
-            if self.contents_sheet.max_row == 1:
-                self.workbook.remove(self.contents_sheet)
-            if self.comments_sheet.max_row == 1:
-                self.workbook.remove(self.comments_sheet)
-            if self.creators_sheet.max_row == 1:
-                self.workbook.remove(self.creators_sheet)
-            if self.contacts_sheet is not None and self.contacts_sheet.max_row == 1:
-                self.workbook.remove(self.contacts_sheet)
-            if self.dynamics_sheet is not None and self.dynamics_sheet.max_row == 1:
-                self.workbook.remove(self.dynamics_sheet)
+            for kind, state in self._states.items():
+                sheet = getattr(self, f"{kind}_sheet")
+                if sheet is None:
+                    continue
+                if state.rows == 0 and state.part == 1:
+                    # Remove empty sheets (only header row)
+                    if not self.write_only:
+                        self.workbook.remove(sheet)
+                    continue
+                self._finish_sheet(sheet, state)
 
             # Check if there are any sheets left
             if len(self.workbook.sheetnames) == 0:
@@ -25,6 +25,8 @@
 from typing import List
 
 import config
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -36,6 +38,7 @@ class KuaishouStoreFactory:
         "db": KuaishouDbStoreImplement,
         "postgres": KuaishouDbStoreImplement,
         "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonlStoreImplement,
         "sqlite": KuaishouSqliteStoreImplement,
         "mongodb": KuaishouMongoStoreImplement,
         "excel": KuaishouExcelStoreImplement,
@@ -46,8 +49,14 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("kuaishou", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("kuaishou", KuaishouStoreFactory.create_store)
+        return KuaishouStoreFactory.create_store()
 
 
 async def update_kuaishou_video(video_item: Dict):
@@ -75,7 +84,7 @@ async def update_kuaishou_video(video_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
-    await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
+    await KuaishouStoreFactory.get_store().store_content(content_item=save_content_item)
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
@@ -107,7 +116,7 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await KuaishouStoreFactory.get_store().store_comment(comment_item=save_comment_item)
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
@@ -126,4 +135,4 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.kuaishou.save_creator] creator:{local_db_item}")
-    await KuaishouStoreFactory.create_store().store_creator(local_db_item)
+    await KuaishouStoreFactory.get_store().store_creator(local_db_item)
@@ -27,14 +27,14 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 from tools.async_file_writer import AsyncFileWriter
 
 import aiofiles
-from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import KuaishouVideo, KuaishouVideoComment
 from tools import utils, words
@@ -60,7 +60,7 @@ def calculate_number_of_files(file_store_path: str) -> int:
 class KuaishouCsvStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="kuaishou", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="kuaishou", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -98,20 +98,18 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = content_item.get("video_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Kuaishou content DB bulk storage implementation
+        Args:
+            content_items: content item dict list
+        """
+        add_ts = utils.get_current_timestamp()
+        rows = [{**content_item, "add_ts": add_ts} for content_item in content_items]
         async with get_session() as session:
-            result = await session.execute(select(KuaishouVideo).where(KuaishouVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                new_content = KuaishouVideo(**content_item)
-                session.add(new_content)
-            else:
-                for key, value in content_item.items():
-                    if hasattr(video_detail, key):
-                        setattr(video_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, KuaishouVideo, rows)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -119,27 +117,24 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
-        async with get_session() as session:
-            result = await session.execute(
-                select(KuaishouVideoComment).where(KuaishouVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
+        await self.store_comments([comment_item])
 
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = KuaishouVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    if hasattr(comment_detail, key):
-                        setattr(comment_detail, key, value)
-            await session.commit()
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Kuaishou comment DB bulk storage implementation
+        Args:
+            comment_items: comment item dict list
+        """
+        add_ts = utils.get_current_timestamp()
+        rows = [{**comment_item, "add_ts": add_ts} for comment_item in comment_items]
+        async with get_session() as session:
+            await bulk_upsert(session, KuaishouVideoComment, rows)
 
 
 class KuaishouJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="kuaishou", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="kuaishou", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -167,6 +162,37 @@ class KuaishouJsonStoreImplement(AbstractStore):
         pass
 
 
+class KuaishouJsonlStoreImplement(AbstractStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = AsyncFileWriter.get_instance(platform="kuaishou", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="contents", item=content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="comments", item=comment_item)
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+
 class KuaishouSqliteStoreImplement(KuaishouDbStoreImplement):
     async def store_creator(self, creator: Dict):
         pass
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/store_registry.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Process wide store instances: one per platform, crawler type and save option
+"""
+
+import asyncio
+from typing import Dict, Tuple, Type
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from var import crawler_type_var
+
+
+class StoreRegistry:
+    """
+    The store module functions (update_xhs_note, update_dy_aweme_comment, ...) go through the
+    platform factory for every saved item. Handing out the same store instance per
+    (platform, crawler_type, save option) keeps per-store setup such as file writers out of
+    the per-item path. Stores that hold resources can define an async close(), which is
+    called once at shutdown.
+    """
+
+    # Class-level instance management
+    _instances: Dict[Tuple[str, str, str], AbstractStore] = {}
+
+    @classmethod
+    def get_instance(cls, platform: str, store_class: Type[AbstractStore]) -> AbstractStore:
+        """
+        Get or create the store for the given platform and the current crawler type and save option
+
+        Args:
+            platform: Platform name (xhs, douyin, bili, etc.)
+            store_class: Store implementation, e.g. XhsCsvStoreImplement
+
+        Returns:
+            Store instance
+        """
+        key = (platform, crawler_type_var.get(), config.SAVE_DATA_OPTION)
+        store = cls._instances.get(key)
+        if store is None or not isinstance(store, store_class):
+            store = store_class()
+            # Excel implementations return the ExcelStoreBase singleton from __new__, which
+            # manages its own lifecycle (flush_all), so only regular instances are kept here
+            if isinstance(store, store_class):
+                cls._instances[key] = store
+        return store
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Close every store that defines an async close(), should be called at shutdown
+        """
+        for key, store in list(cls._instances.items()):
+            close = getattr(store, "close", None)
+            if close is None or not asyncio.iscoroutinefunction(close):
+                continue
+            try:
+                await close()
+            except Exception as e:
+                utils.logger.error(f"[StoreRegistry.close_all] Error closing {key}: {e}")
+        cls._instances.clear()
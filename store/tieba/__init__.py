@@ -22,6 +22,8 @@
 from typing import List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -33,6 +35,7 @@ class TieBaStoreFactory:
         "db": TieBaDbStoreImplement,
         "postgres": TieBaDbStoreImplement,
         "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonlStoreImplement,
         "sqlite": TieBaSqliteStoreImplement,
         "mongodb": TieBaMongoStoreImplement,
         "excel": TieBaExcelStoreImplement,
@@ -43,8 +46,14 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("tieba", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("tieba", TieBaStoreFactory.create_store)
+        return TieBaStoreFactory.create_store()
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -76,7 +85,7 @@ async def update_tieba_note(note_item: TiebaNote):
     save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
 
-    await TieBaStoreFactory.create_store().store_content(save_note_item)
+    await TieBaStoreFactory.get_store().store_content(save_note_item)
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -108,7 +117,7 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    await TieBaStoreFactory.get_store().store_comment(save_comment_item)
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -123,4 +132,4 @@ async def save_creator(user_info: TiebaCreator):
     local_db_item = user_info.model_dump()
     local_db_item["last_modify_ts"] = utils.get_current_timestamp()
     utils.logger.info(f"[store.tieba.save_creator] creator:{local_db_item}")
-    await TieBaStoreFactory.create_store().store_creator(local_db_item)
+    await TieBaStoreFactory.get_store().store_creator(local_db_item)
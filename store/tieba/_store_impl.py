@@ -27,16 +27,16 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
 from database.models import TiebaNote, TiebaComment, TiebaCreator
 from tools import utils, words
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from tools.async_file_writer import AsyncFileWriter
@@ -61,7 +61,7 @@ def calculate_number_of_files(file_store_path: str) -> int:
 class TieBaCsvStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="tieba", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="tieba", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -104,62 +104,56 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        note_id = content_item.get("note_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        tieba content DB bulk storage implementation
+        Args:
+            content_items: content item dict list
+        """
         async with get_session() as session:
-            stmt = select(TiebaNote).where(TiebaNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                for key, value in content_item.items():
-                    setattr(db_note, key, value)
-            else:
-                db_note = TiebaNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await bulk_upsert(session, TiebaNote, content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
-        tieba content DB storage implementation
+        tieba comment DB storage implementation
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        tieba comment DB bulk storage implementation
+        Args:
+            comment_items: comment item dict list
+        """
         async with get_session() as session:
-            stmt = select(TiebaComment).where(TiebaComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                for key, value in comment_item.items():
-                    setattr(db_comment, key, value)
-            else:
-                db_comment = TiebaComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await bulk_upsert(session, TiebaComment, comment_items)
 
     async def store_creator(self, creator: Dict):
         """
-        tieba content DB storage implementation
+        tieba creator DB storage implementation
         Args:
-            creator: creator dict
+            creator: creator item dict
+        """
+        await self.store_creators([creator])
+
+    async def store_creators(self, creators: List[Dict]):
+        """
+        tieba creator DB bulk storage implementation
+        Args:
+            creators: creator item dict list
         """
-        user_id = creator.get("user_id")
         async with get_session() as session:
-            stmt = select(TiebaCreator).where(TiebaCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                for key, value in creator.items():
-                    setattr(db_creator, key, value)
-            else:
-                db_creator = TiebaCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await bulk_upsert(session, TiebaCreator, creators)
 
 
 class TieBaJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="tieba", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="tieba", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -195,6 +189,45 @@ class TieBaJsonStoreImplement(AbstractStore):
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
 
+class TieBaJsonlStoreImplement(AbstractStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = AsyncFileWriter.get_instance(platform="tieba", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        tieba content JSONL storage implementation
+        Args:
+            content_item: note item dict
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="contents", item=content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        tieba comment JSONL storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="comments", item=comment_item)
+
+    async def store_creator(self, creator: Dict):
+        """
+        tieba content JSONL storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="creators", item=creator)
+
+
 class TieBaSqliteStoreImplement(TieBaDbStoreImplement):
     """
     Tieba sqlite store implement
@@ -25,6 +25,8 @@
 import re
 from typing import List
 
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from var import source_keyword_var
 
 from .weibo_store_media import *
@@ -37,6 +39,7 @@ class WeibostoreFactory:
         "db": WeiboDbStoreImplement,
         "postgres": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonlStoreImplement,
         "sqlite": WeiboSqliteStoreImplement,
         "mongodb": WeiboMongoStoreImplement,
         "excel": WeiboExcelStoreImplement,
@@ -46,8 +49,14 @@ class WeibostoreFactory:
     def create_store() -> AbstractStore:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("weibo", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("weibo", WeibostoreFactory.create_store)
+        return WeibostoreFactory.create_store()
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
@@ -104,7 +113,7 @@ async def update_weibo_note(note_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    await WeibostoreFactory.get_store().store_content(content_item=save_content_item)
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -159,7 +168,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "avatar": user_info.get("profile_image_url", ""),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    await WeibostoreFactory.get_store().store_comment(comment_item=save_comment_item)
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -176,6 +185,19 @@ async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
     await WeiboStoreImage().store_image({"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
 
 
+def get_weibo_note_image_path(picid: str, extension_file_name) -> str:
+    """
+    Local path for a weibo note image streamed straight to disk
+    Args:
+        picid:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return WeiboStoreImage().prepare_save_file_name(picid, extension_file_name)
+
+
 async def save_creator(user_id: str, user_info: Dict):
     """
     Save creator information to local
@@ -199,4 +221,4 @@ async def save_creator(user_id: str, user_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
-    await WeibostoreFactory.create_store().store_creator(local_db_item)
+    await WeibostoreFactory.get_store().store_creator(local_db_item)
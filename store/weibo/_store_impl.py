@@ -27,10 +27,9 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
@@ -38,6 +37,7 @@ from base.base_crawler import AbstractStore
 from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
@@ -61,7 +61,7 @@ def calculate_number_of_files(file_store_path: str) -> int:
 class WeiboCsvStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="weibo", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="weibo", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -108,23 +108,23 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        note_id = int(content_item.get("note_id"))
-        content_item["note_id"] = note_id
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Weibo content DB bulk storage implementation
+        Args:
+            content_items: content item dict list
+
+        Returns:
+
+        """
+        rows = []
+        for content_item in content_items:
+            content_item["note_id"] = int(content_item.get("note_id"))
+            rows.append(self._with_timestamps(content_item))
         async with get_session() as session:
-            stmt = select(WeiboNote).where(WeiboNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                db_note.last_modify_ts = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    if hasattr(db_note, key):
-                        setattr(db_note, key, value)
-            else:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_note = WeiboNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await bulk_upsert(session, WeiboNote, rows)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -135,29 +135,28 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+        await self.store_comments([comment_item])
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Weibo comment DB bulk storage implementation
+        Args:
+            comment_items: comment item dict list
+
+        Returns:
+
+        """
+        rows = []
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
+            comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
+            comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            rows.append(self._with_timestamps(comment_item))
         async with get_session() as session:
-            stmt = select(WeiboNoteComment).where(WeiboNoteComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                db_comment.last_modify_ts = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    if hasattr(db_comment, key):
-                        setattr(db_comment, key, value)
-            else:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_comment = WeiboNoteComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await bulk_upsert(session, WeiboNoteComment, rows)
 
     async def store_creator(self, creator: Dict):
         """
@@ -168,33 +167,39 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        user_id = str(creator.get("user_id"))
-        creator["user_id"] = user_id
-        # 确保 follows 和 fans 等数字字段转换为字符串，以匹配数据库模型定义
-        for key in ["follows", "fans", "gender"]:
-            if key in creator and creator[key] is not None:
-                creator[key] = str(creator[key])
+        await self.store_creators([creator])
+
+    async def store_creators(self, creators: List[Dict]):
+        """
+        Weibo creator DB bulk storage implementation
+        Args:
+            creators: creator dict list
+
+        Returns:
+
+        """
+        rows = []
+        for creator in creators:
+            creator["user_id"] = str(creator.get("user_id"))
+            # 确保 follows 和 fans 等数字字段转换为字符串，以匹配数据库模型定义
+            for key in ["follows", "fans", "gender"]:
+                if key in creator and creator[key] is not None:
+                    creator[key] = str(creator[key])
+            rows.append(self._with_timestamps(creator))
         async with get_session() as session:
-            stmt = select(WeiboCreator).where(WeiboCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                db_creator.last_modify_ts = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    if hasattr(db_creator, key):
-                        setattr(db_creator, key, value)
-            else:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                db_creator = WeiboCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await bulk_upsert(session, WeiboCreator, rows)
+
+    @staticmethod
+    def _with_timestamps(item: Dict) -> Dict:
+        # add_ts is only written on insert, see database.bulk_upsert.INSERT_ONLY_COLUMNS
+        now = utils.get_current_timestamp()
+        return {**item, "add_ts": now, "last_modify_ts": now}
 
 
 class WeiboJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="weibo", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="weibo", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -230,6 +235,45 @@ class WeiboJsonStoreImplement(AbstractStore):
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
 
+class WeiboJsonlStoreImplement(AbstractStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = AsyncFileWriter.get_instance(platform="weibo", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="contents", item=content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="comments", item=comment_item)
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSONL storage implementation
+        Args:
+            creator:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="creators", item=creator)
+
+
 class WeiboSqliteStoreImplement(WeiboDbStoreImplement):
     """
     Weibo content SQLite storage implementation
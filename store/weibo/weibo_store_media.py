@@ -58,6 +58,20 @@ class WeiboStoreImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{picid}.{extension_file_name}"
 
+    def prepare_save_file_name(self, picid: str, extension_file_name: str) -> str:
+        """
+        make save file name and create its directory, for images streamed straight to disk
+
+        Args:
+            picid: image id
+            extension_file_name: image filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.image_store_path).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(picid, extension_file_name)
+
     async def save_image(self, picid: str, pic_content: str, extension_file_name="jpg"):
         """
         save image to local
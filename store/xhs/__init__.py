@@ -24,6 +24,8 @@
 from typing import List
 
 import config
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from var import source_keyword_var
 
 from .xhs_store_media import *
@@ -36,6 +38,7 @@ class XhsStoreFactory:
         "db": XhsDbStoreImplement,
         "postgres": XhsDbStoreImplement,
         "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonlStoreImplement,
         "sqlite": XhsSqliteStoreImplement,
         "mongodb": XhsMongoStoreImplement,
         "excel": XhsExcelStoreImplement,
@@ -45,8 +48,14 @@ class XhsStoreFactory:
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("xhs", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("xhs", XhsStoreFactory.create_store)
+        return XhsStoreFactory.create_store()
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -128,7 +137,7 @@ async def update_xhs_note(note_item: Dict):
         "xsec_token": note_item.get("xsec_token"),  # xsec_token
     }
     utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
-    await XhsStoreFactory.create_store().store_content(local_db_item)
+    await XhsStoreFactory.get_store().store_content(local_db_item)
 
 
 async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
@@ -177,7 +186,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "like_count": comment_item.get("like_count", 0),
     }
     utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    await XhsStoreFactory.get_store().store_comment(local_db_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -226,7 +235,7 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),  # Last modification timestamp (Generated by MediaCrawler, mainly used to record the latest update time of a record in DB storage)
     }
     utils.logger.info(f"[store.xhs.save_creator] creator:{local_db_item}")
-    await XhsStoreFactory.create_store().store_creator(local_db_item)
+    await XhsStoreFactory.get_store().store_creator(local_db_item)
 
 
 async def update_xhs_note_image(note_id, pic_content, extension_file_name):
@@ -257,3 +266,29 @@ async def update_xhs_note_video(note_id, video_content, extension_file_name):
     """
 
     await XiaoHongShuVideo().store_video({"notice_id": note_id, "video_content": video_content, "extension_file_name": extension_file_name})
+
+
+def get_xhs_note_image_path(note_id, extension_file_name) -> str:
+    """
+    Local path for a Xiaohongshu note image streamed straight to disk
+    Args:
+        note_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuImage().prepare_save_file_name(note_id, extension_file_name)
+
+
+def get_xhs_note_video_path(note_id, extension_file_name) -> str:
+    """
+    Local path for a Xiaohongshu note video streamed straight to disk
+    Args:
+        note_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuVideo().prepare_save_file_name(note_id, extension_file_name)
@@ -27,9 +27,12 @@ from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
                                           ZhihuJsonStoreImplement,
+                                          ZhihuJsonlStoreImplement,
                                           ZhihuSqliteStoreImplement,
                                           ZhihuMongoStoreImplement,
                                           ZhihuExcelStoreImplement)
+from store.buffered_store import BufferedStore
+from store.store_registry import StoreRegistry
 from tools import utils
 from var import source_keyword_var
 
@@ -40,6 +43,7 @@ class ZhihuStoreFactory:
         "db": ZhihuDbStoreImplement,
         "postgres": ZhihuDbStoreImplement,
         "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonlStoreImplement,
         "sqlite": ZhihuSqliteStoreImplement,
         "mongodb": ZhihuMongoStoreImplement,
         "excel": ZhihuExcelStoreImplement,
@@ -49,8 +53,14 @@ class ZhihuStoreFactory:
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
+        return StoreRegistry.get_instance("zhihu", store_class)
+
+    @staticmethod
+    def get_store() -> AbstractStore:
+        if config.ENABLE_STORE_BUFFER:
+            return BufferedStore.get_instance("zhihu", ZhihuStoreFactory.create_store)
+        return ZhihuStoreFactory.create_store()
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -80,7 +90,7 @@ async def update_zhihu_content(content_item: ZhihuContent):
     local_db_item = content_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
-    await ZhihuStoreFactory.create_store().store_content(local_db_item)
+    await ZhihuStoreFactory.get_store().store_content(local_db_item)
 
 
 
@@ -112,7 +122,7 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    await ZhihuStoreFactory.get_store().store_comment(local_db_item)
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -128,4 +138,4 @@ async def save_creator(creator: ZhihuCreator):
         return
     local_db_item = creator.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    await ZhihuStoreFactory.create_store().store_creator(local_db_item)
+    await ZhihuStoreFactory.get_store().store_creator(local_db_item)
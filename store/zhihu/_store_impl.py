@@ -27,14 +27,14 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import ZhihuContent, ZhihuComment, ZhihuCreator
 from tools import utils, words
@@ -60,7 +60,7 @@ def calculate_number_of_files(file_store_path: str) -> int:
 class ZhihuCsvStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="zhihu", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="zhihu", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -103,65 +103,56 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        content_id = content_item.get("content_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Zhihu content DB bulk storage implementation
+        Args:
+            content_items: content item dict list
+        """
         async with get_session() as session:
-            stmt = select(ZhihuContent).where(ZhihuContent.content_id == content_id)
-            result = await session.execute(stmt)
-            existing_content = result.scalars().first()
-            if existing_content:
-                for key, value in content_item.items():
-                    if hasattr(existing_content, key):
-                        setattr(existing_content, key, value)
-            else:
-                new_content = ZhihuContent(**content_item)
-                session.add(new_content)
-            await session.commit()
+            await bulk_upsert(session, ZhihuContent, content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
-        Zhihu content DB storage implementation
+        Zhihu comment DB storage implementation
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Zhihu comment DB bulk storage implementation
+        Args:
+            comment_items: comment item dict list
+        """
         async with get_session() as session:
-            stmt = select(ZhihuComment).where(ZhihuComment.comment_id == comment_id)
-            result = await session.execute(stmt)
-            existing_comment = result.scalars().first()
-            if existing_comment:
-                for key, value in comment_item.items():
-                    if hasattr(existing_comment, key):
-                        setattr(existing_comment, key, value)
-            else:
-                new_comment = ZhihuComment(**comment_item)
-                session.add(new_comment)
-            await session.commit()
+            await bulk_upsert(session, ZhihuComment, comment_items)
 
     async def store_creator(self, creator: Dict):
         """
-        Zhihu content DB storage implementation
+        Zhihu creator DB storage implementation
         Args:
-            creator: creator dict
+            creator: creator item dict
+        """
+        await self.store_creators([creator])
+
+    async def store_creators(self, creators: List[Dict]):
+        """
+        Zhihu creator DB bulk storage implementation
+        Args:
+            creators: creator item dict list
         """
-        user_id = creator.get("user_id")
         async with get_session() as session:
-            stmt = select(ZhihuCreator).where(ZhihuCreator.user_id == user_id)
-            result = await session.execute(stmt)
-            existing_creator = result.scalars().first()
-            if existing_creator:
-                for key, value in creator.items():
-                    if hasattr(existing_creator, key):
-                        setattr(existing_creator, key, value)
-            else:
-                new_creator = ZhihuCreator(**creator)
-                session.add(new_creator)
-            await session.commit()
+            await bulk_upsert(session, ZhihuCreator, creators)
 
 
 class ZhihuJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="zhihu", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter.get_instance(platform="zhihu", crawler_type=crawler_type_var.get())
 
     async def store_content(self, content_item: Dict):
         """
@@ -197,6 +188,45 @@ class ZhihuJsonStoreImplement(AbstractStore):
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
 
+class ZhihuJsonlStoreImplement(AbstractStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = AsyncFileWriter.get_instance(platform="zhihu", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSONL storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="contents", item=content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSONL storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="comments", item=comment_item)
+
+    async def store_creator(self, creator: Dict):
+        """
+        Zhihu content JSONL storage implementation
+        Args:
+            creator: creator dict
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="creators", item=creator)
+
+
 class ZhihuSqliteStoreImplement(ZhihuDbStoreImplement):
     """
     Zhihu content SQLite storage implementation
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/bench_db_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Comment write throughput on SQLite: per-row SELECT + INSERT/UPDATE vs bulk upsert
+
+Usage: python -m test.bench_db_upsert [rows] [batch_size]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.bulk_upsert import bulk_upsert
+from database.models import Base, XhsNoteComment
+
+
+def _rows(n: int, like_count: int):
+    return [
+        {
+            "comment_id": f"c{i}", "note_id": f"n{i // 50}", "content": "benchmark comment " * 4,
+            "like_count": str(like_count), "sub_comment_count": 0, "add_ts": 1, "last_modify_ts": like_count,
+        }
+        for i in range(n)
+    ]
+
+
+async def _per_row(engine, rows):
+    # What the DB stores did before: own session, one SELECT and one commit per row
+    for row in rows:
+        async with AsyncSession(engine) as session:
+            result = await session.execute(select(XhsNoteComment).where(XhsNoteComment.comment_id == row["comment_id"]))
+            existing = result.scalar_one_or_none()
+            if existing is None:
+                session.add(XhsNoteComment(**row))
+            else:
+                for key, value in row.items():
+                    setattr(existing, key, value)
+            await session.commit()
+
+
+async def _bulk(engine, rows, batch_size):
+    for i in range(0, len(rows), batch_size):
+        async with AsyncSession(engine) as session:
+            await bulk_upsert(session, XhsNoteComment, rows[i:i + batch_size])
+            await session.commit()
+
+
+async def _run(name, writer, n):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        for phase, like_count in (("insert", 1), ("update", 2)):
+            start = time.perf_counter()
+            await writer(engine, _rows(n, like_count))
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10} {phase:<7} {n} rows in {elapsed:6.2f}s  {n / elapsed:10.0f} rows/s")
+        await engine.dispose()
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    await _run("per-row", _per_row, n)
+    await _run("bulk", lambda engine, rows: _bulk(engine, rows, batch_size), n)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/bench_js_sign.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Signatures per second: PyExecJS call() per signature vs the JsSignPool node workers
+
+Usage: python -m test.bench_js_sign [signatures] [concurrency]
+"""
+
+import asyncio
+import sys
+import time
+
+import execjs
+
+from tools.js_sign_pool import JsSignPool
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+CASES = [
+    ("libs/douyin.js", "sign_datail", ("device_platform=webapp&aid=6383&aweme_id=7380308675841297704", USER_AGENT)),
+    ("libs/zhihu.js", "get_sign", ("/api/v4/search_v3?q=python&offset=0&limit=20", "d_c0=AAA_abcdefg|1700000000; z_c0=xyz")),
+]
+
+
+def _bench_execjs(script, fn, args, n):
+    with open(script, encoding="utf-8-sig") as f:
+        ctx = execjs.compile(f.read())
+    start = time.perf_counter()
+    for _ in range(n):
+        ctx.call(fn, *args)
+    return time.perf_counter() - start
+
+
+async def _bench_pool(script, fn, args, n, concurrency):
+    pool = JsSignPool.get_instance(script)
+    await pool.call(fn, *args)  # start the workers outside the timing
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await pool.call(fn, *args)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(n)])
+    return time.perf_counter() - start
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    for script, fn, args in CASES:
+        elapsed = _bench_execjs(script, fn, args, n)
+        print(f"{script:<16} execjs  {n} signs in {elapsed:6.2f}s  {n / elapsed:8.0f} signs/s (blocks the event loop)")
+        elapsed = await _bench_pool(script, fn, args, n, concurrency)
+        print(f"{script:<16} pool    {n} signs in {elapsed:6.2f}s  {n / elapsed:8.0f} signs/s")
+    await JsSignPool.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
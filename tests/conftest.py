@@ -29,6 +29,23 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 
+@pytest.fixture(autouse=True)
+def disable_rate_limit(monkeypatch):
+    """Client tests send many fake requests, don't pace them with the production token buckets"""
+    import config
+    monkeypatch.setattr(config, "ENABLE_RATE_LIMIT", False)
+
+
+@pytest.fixture(autouse=True)
+def csv_write_through(monkeypatch):
+    """File tests read CSV files right after writing them: write every row at once and close the handles after each test"""
+    import config
+    from tools.csv_sink import CsvSink
+    monkeypatch.setattr(config, "CSV_FLUSH_BYTES", 0)
+    yield
+    CsvSink.close_all()
+
+
 @pytest.fixture(scope="session")
 def project_root_path():
     """Return project root path"""
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_async_file_writer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for AsyncFileWriter
+"""
+
+import json
+
+import pytest
+
+from tools.async_file_writer import AsyncFileWriter
+
+
+class TestAsyncFileWriterJsonl:
+    """Test cases for the JSON Lines save mode"""
+
+    @pytest.fixture(autouse=True)
+    def setup_and_teardown(self, tmp_path, monkeypatch):
+        """Run inside a temp directory and reset the written-files registry"""
+        monkeypatch.chdir(tmp_path)
+        AsyncFileWriter._jsonl_files.clear()
+        yield
+        AsyncFileWriter._jsonl_files.clear()
+
+    @pytest.fixture
+    def writer(self):
+        return AsyncFileWriter(platform="test", crawler_type="search")
+
+    @pytest.mark.asyncio
+    async def test_write_appends_one_line_per_item(self, writer):
+        """Each item is appended as its own line"""
+        for i in range(3):
+            await writer.write_single_item_to_jsonl({"note_id": f"n{i}", "title": "标题"}, "contents")
+
+        file_path = writer._get_file_path("jsonl", "contents")
+        with open(file_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+        assert len(lines) == 3
+        assert json.loads(lines[2]) == {"note_id": "n2", "title": "标题"}
+        assert "标题" in lines[0]  # ensure_ascii=False
+
+    @pytest.mark.asyncio
+    async def test_load_jsonl_skips_malformed_lines(self, writer):
+        """A truncated trailing line does not break loading"""
+        await writer.write_single_item_to_jsonl({"comment_id": "c1"}, "comments")
+        file_path = writer._get_file_path("jsonl", "comments")
+        with open(file_path, "a", encoding="utf-8") as f:
+            f.write('\n{"comment_id": "c2"')
+
+        assert AsyncFileWriter.load_jsonl(file_path) == [{"comment_id": "c1"}]
+
+    @pytest.mark.asyncio
+    async def test_convert_jsonl_to_json(self, writer):
+        """Written JSONL files are converted into the json save option layout"""
+        await writer.write_single_item_to_jsonl({"note_id": "n1"}, "contents")
+        await writer.write_single_item_to_jsonl({"note_id": "n2"}, "contents")
+        await writer.write_single_item_to_jsonl({"comment_id": "c1"}, "comments")
+
+        converted = AsyncFileWriter.convert_jsonl_to_json()
+
+        assert len(converted) == 2
+        json_path = writer._get_file_path("json", "contents")
+        assert json_path in converted
+        with open(json_path, encoding="utf-8") as f:
+            assert json.load(f) == [{"note_id": "n1"}, {"note_id": "n2"}]
+        assert AsyncFileWriter._jsonl_files == set()
+
+    @pytest.mark.asyncio
+    async def test_convert_merges_into_json_mode_file(self, writer):
+        """Conversion keeps the items a json save option run wrote the same day"""
+        await writer.write_single_item_to_json({"note_id": "j1"}, "contents")
+        await writer.write_single_item_to_jsonl({"note_id": "n1"}, "contents")
+
+        AsyncFileWriter.convert_jsonl_to_json()
+
+        with open(writer._get_file_path("json", "contents"), encoding="utf-8") as f:
+            assert json.load(f) == [{"note_id": "j1"}, {"note_id": "n1"}]
+
+    @pytest.mark.asyncio
+    async def test_repeated_conversion_does_not_duplicate(self, writer):
+        """Converting a grown JSONL file again only adds the new items"""
+        await writer.write_single_item_to_jsonl({"note_id": "n1"}, "contents")
+        AsyncFileWriter.convert_jsonl_to_json()
+        await writer.write_single_item_to_jsonl({"note_id": "n2"}, "contents")
+        AsyncFileWriter.convert_jsonl_to_json()
+
+        with open(writer._get_file_path("json", "contents"), encoding="utf-8") as f:
+            assert json.load(f) == [{"note_id": "n1"}, {"note_id": "n2"}]
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_async_redis_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for AsyncRedisCache and IpCache, against fakeredis instead of a real server
+"""
+
+import time
+
+import pytest
+import pytest_asyncio
+
+from cache.abs_cache import AbstractAsyncCache, AbstractCache
+from cache.async_redis_cache import AsyncRedisCache
+from proxy.base_proxy import IpCache
+from proxy.types import IpInfoModel
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class CountingRedis(fakeredis.FakeAsyncRedis):
+    """Counts the commands that reach the server"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args[0])
+        return await super().execute_command(*args, **options)
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    client = CountingRedis()
+    yield client
+    await client.flushall()
+    await client.close()
+
+
+@pytest.mark.parametrize("serializer", ["pickle", "json", "msgpack"])
+@pytest.mark.asyncio
+async def test_round_trip(redis_client, serializer):
+    if serializer == "msgpack":
+        pytest.importorskip("msgpack")
+    cache = AsyncRedisCache(serializer=serializer, redis_client=redis_client)
+    value = {"ip": "10.0.0.1", "ports": [80, 443], "note": "代理"}
+
+    await cache.set("k", value, 10)
+
+    assert await cache.get("k") == value
+    assert await cache.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_keys_use_scan_and_get_many_uses_mget(redis_client):
+    cache = AsyncRedisCache(serializer="json", redis_client=redis_client)
+    await cache.set_many({f"kuaidaili_{i}": i for i in range(1200)}, 10)
+    await cache.set("wandouhttp_1", 1, 10)
+    redis_client.commands.clear()
+
+    keys = await cache.keys("kuaidaili_*")
+    values = await cache.get_by_pattern("kuaidaili_*")
+
+    assert len(keys) == 1200
+    assert values == {f"kuaidaili_{i}": i for i in range(1200)}
+    assert "KEYS" not in redis_client.commands
+    assert "GET" not in redis_client.commands
+    assert "MGET" in redis_client.commands
+
+
+@pytest.mark.asyncio
+async def test_ip_cache_loads_all_ips(redis_client):
+    ip_cache = IpCache()
+    ip_cache.cache_client = AsyncRedisCache(redis_client=redis_client)
+    for i in range(3):
+        proxy = IpInfoModel(ip=f"10.0.0.{i}", port=8000, user="u", password="p", expired_time_ts=int(time.time()) + 60)
+        await ip_cache.set_ip(f"kuaidaili_{proxy.ip}_{proxy.port}", proxy.model_dump_json(), ex=60)
+
+    proxies = await ip_cache.load_all_ip("kuaidaili")
+
+    assert sorted(p.ip for p in proxies) == ["10.0.0.0", "10.0.0.1", "10.0.0.2"]
+
+
+def test_async_cache_does_not_pose_as_the_sync_interface():
+    assert issubclass(AsyncRedisCache, AbstractAsyncCache)
+    assert not issubclass(AsyncRedisCache, AbstractCache)
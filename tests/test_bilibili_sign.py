@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_bilibili_sign.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for Bilibili WBI signing and the key cache
+"""
+
+import asyncio
+
+import pytest
+
+from media_platform.bilibili.help import BilibiliSign, BilibiliWbiKeyCache
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+
+
+class KeyFetcher:
+    def __init__(self):
+        self.calls = 0
+        self.keys = (IMG_KEY, SUB_KEY)
+        self.fail = False
+        self.from_server = []
+
+    async def __call__(self, from_server: bool = False):
+        self.calls += 1
+        self.from_server.append(from_server)
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("nav request failed")
+        return self.keys
+
+
+def test_sign_matches_reference(monkeypatch):
+    """Example from the bilibili-API-collect WBI documentation"""
+    monkeypatch.setattr("tools.utils.get_unix_timestamp", lambda: 1702204169)
+    signer = BilibiliSign(IMG_KEY, SUB_KEY)
+
+    signed = signer.sign({"foo": "114", "bar": "514", "zab": 1919810})
+
+    assert signer.salt == "ea1db124af3c7062474693fa704f4ff8"
+    assert signed["w_rid"] == "8f6f2b5b3d485fe1886cec6a0be8c5d4"
+
+
+@pytest.mark.asyncio
+async def test_keys_are_fetched_once():
+    fetcher = KeyFetcher()
+    cache = BilibiliWbiKeyCache(fetcher, ttl_sec=3600)
+
+    signers = await asyncio.gather(*[cache.get_signer() for _ in range(10)])
+
+    assert fetcher.calls == 1
+    assert all(s is signers[0] for s in signers)
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_refresh_in_background():
+    fetcher = KeyFetcher()
+    cache = BilibiliWbiKeyCache(fetcher, ttl_sec=0)
+    old = await cache.get_signer()
+
+    fetcher.keys = ("a" * 32, "b" * 32)
+    assert await cache.get_signer() is old  # served without waiting
+    await asyncio.sleep(0.05)
+
+    assert (await cache.get_signer()).img_key == "a" * 32
+    assert fetcher.calls >= 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_old_keys():
+    fetcher = KeyFetcher()
+    cache = BilibiliWbiKeyCache(fetcher, ttl_sec=3600)
+    old = await cache.get_signer()
+
+    fetcher.fail = True
+    cache.invalidate()
+    await asyncio.sleep(0.05)
+
+    assert await cache.get_signer() is old
+
+
+@pytest.mark.asyncio
+async def test_rejected_signature_fetches_keys_from_server():
+    fetcher = KeyFetcher()
+    cache = BilibiliWbiKeyCache(fetcher, ttl_sec=3600)
+    await cache.get_signer()
+
+    fetcher.keys = ("a" * 32, "b" * 32)
+    cache.invalidate()
+    await asyncio.sleep(0.05)
+
+    assert fetcher.from_server == [False, True]
+    assert (await cache.get_signer()).img_key == "a" * 32
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_without_keys_logs_instead_of_leaking(monkeypatch):
+    errors = []
+    monkeypatch.setattr("tools.utils.logger.error", errors.append)
+    fetcher = KeyFetcher()
+    fetcher.fail = True
+    cache = BilibiliWbiKeyCache(fetcher, ttl_sec=3600)
+
+    cache.invalidate()
+    await asyncio.sleep(0.05)
+
+    assert cache._refresh_task.done()
+    assert any("Fetch WBI keys failed" in message for message in errors)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_buffered_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for BufferedStore
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+import pytest
+
+from base.base_crawler import AbstractStore
+from store.buffered_store import BufferedStore
+from tools.async_file_writer import AsyncFileWriter
+
+
+class RecordingStore(AbstractStore):
+    """Store that records every written item and the batch it arrived in"""
+
+    instances: List["RecordingStore"] = []
+
+    def __init__(self):
+        self.items: List[Dict] = []
+        RecordingStore.instances.append(self)
+
+    async def store_content(self, content_item: Dict):
+        self.items.append(content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        if comment_item.get("fail"):
+            raise RuntimeError("boom")
+        self.items.append(comment_item)
+
+    async def store_creator(self, creator: Dict):
+        self.items.append(creator)
+
+    async def store_dynamic(self, dynamic_item: Dict):
+        self.items.append(dynamic_item)
+
+
+@pytest.fixture(autouse=True)
+def reset_state(monkeypatch):
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "csv")
+    RecordingStore.instances.clear()
+    BufferedStore._instances.clear()
+    yield
+    BufferedStore._instances.clear()
+
+
+@pytest.mark.asyncio
+async def test_items_are_written_in_batches():
+    """Items queued faster than the interval are written by one store instance per batch"""
+    store = BufferedStore(RecordingStore, batch_size=10, flush_interval_ms=1000)
+    for i in range(25):
+        await store.store_content({"note_id": i})
+    await store.close()
+
+    assert [len(s.items) for s in RecordingStore.instances] == [10, 10, 5]
+    assert [item["note_id"] for s in RecordingStore.instances for item in s.items] == list(range(25))
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_written_after_interval():
+    """A batch smaller than batch_size is written once the flush interval has passed"""
+    store = BufferedStore(RecordingStore, batch_size=100, flush_interval_ms=20)
+    await store.store_content({"note_id": 1})
+    await asyncio.sleep(0.1)
+
+    assert RecordingStore.instances and RecordingStore.instances[0].items == [{"note_id": 1}]
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure():
+    """store_xxx waits when the queue is full instead of growing memory"""
+    store = BufferedStore(RecordingStore, batch_size=1, flush_interval_ms=1000, queue_size=2)
+    await store.store_content({"note_id": 0})  # taken by the flusher on its next turn
+    await store.store_content({"note_id": 1})
+    await store.store_content({"note_id": 2})
+
+    blocked = asyncio.ensure_future(store._queues["store_content"].put({"note_id": 3}))
+    await asyncio.sleep(0)
+    await store.close()
+    assert blocked.done()
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_single_writes():
+    """One bad item does not drop the rest of its batch"""
+    store = BufferedStore(RecordingStore, batch_size=10, flush_interval_ms=1000)
+    await store.store_comment({"comment_id": "bad", "fail": True})
+    await store.store_comment({"comment_id": "c1"})
+    await store.store_comment({"comment_id": "c2"})
+    await store.close()
+
+    written = [item["comment_id"] for s in RecordingStore.instances for item in s.items]
+    assert written.count("c1") == 1
+    assert written.count("c2") == 1
+    assert "bad" not in written
+
+
+@pytest.mark.asyncio
+async def test_platform_specific_methods_are_buffered():
+    """Extra store_xxx methods such as Bilibili's store_dynamic go through their own queue"""
+    store = BufferedStore(RecordingStore, batch_size=10, flush_interval_ms=1000)
+    await store.store_dynamic({"dynamic_id": 1})
+    await store.close()
+
+    assert RecordingStore.instances[0].items == [{"dynamic_id": 1}]
+
+
+@pytest.mark.asyncio
+async def test_file_writer_batch_write(tmp_path, monkeypatch):
+    """Writes inside batch_write are deferred and land in the file together"""
+    monkeypatch.chdir(tmp_path)
+    writer = AsyncFileWriter(platform="test", crawler_type="search")
+    file_path = writer._get_file_path("json", "contents")
+
+    async with AsyncFileWriter.batch_write():
+        await writer.write_single_item_to_json({"note_id": 1}, "contents")
+        await writer.write_single_item_to_json({"note_id": 2}, "contents")
+        await writer.write_to_csv({"note_id": 1, "title": "a"}, "contents")
+        await writer.write_to_csv({"note_id": 2, "title": "b"}, "contents")
+        assert not (tmp_path / file_path).exists()
+
+    with open(file_path, encoding="utf-8") as f:
+        assert json.load(f) == [{"note_id": 1}, {"note_id": 2}]
+    with open(writer._get_file_path("csv", "contents"), encoding="utf-8-sig") as f:
+        assert f.read().splitlines() == ["note_id,title", "1,a", "2,b"]
+
+
+@pytest.mark.asyncio
+async def test_failed_file_batch_is_not_written_twice(monkeypatch):
+    """A file batch that fails after part of it was written is dropped, not retried item by item"""
+    written: List[Dict] = []
+
+    @asynccontextmanager
+    async def partly_written_scope():
+        yield
+        written.extend(item for s in RecordingStore.instances for item in s.items[:1])
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(BufferedStore, "_batch_scope", staticmethod(partly_written_scope))
+    store = BufferedStore(RecordingStore, batch_size=10, flush_interval_ms=1000)
+    for i in range(3):
+        await store.store_content({"note_id": i})
+    await store.close()
+
+    assert written == [{"note_id": 0}]
+    assert len(RecordingStore.instances) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_sql_batch_is_retried_one_by_one(monkeypatch):
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "sqlite")
+    monkeypatch.setattr(BufferedStore, "_batch_scope", staticmethod(_no_scope))
+
+    class RolledBackStore(RecordingStore):
+        async def store_contents(self, items: List[Dict]):
+            raise RuntimeError("deadlock")
+
+    store = BufferedStore(RolledBackStore, batch_size=10, flush_interval_ms=1000)
+    for i in range(3):
+        await store.store_content({"note_id": i})
+    await store.close()
+
+    assert [item["note_id"] for s in RecordingStore.instances for item in s.items] == [0, 1, 2]
+
+
+@asynccontextmanager
+async def _no_scope():
+    yield
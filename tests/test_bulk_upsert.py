@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_bulk_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for database.bulk_upsert on a temporary SQLite database
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database import bulk_upsert as bulk_upsert_module
+from database.bulk_upsert import bulk_upsert, get_natural_key
+from database.models import Base, BilibiliContactInfo, XhsNoteComment
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    bulk_upsert_module._conflict_target_cache.clear()
+    yield engine
+    await engine.dispose()
+
+
+async def _upsert(engine, model, rows, **kwargs):
+    async with AsyncSession(engine) as session:
+        written = await bulk_upsert(session, model, rows, **kwargs)
+        await session.commit()
+    return written
+
+
+async def _all(engine, model):
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(model).order_by(model.id))
+        return result.scalars().all()
+
+
+def _comment(comment_id, like_count, add_ts=1):
+    return {"comment_id": comment_id, "note_id": "n1", "like_count": str(like_count), "add_ts": add_ts}
+
+
+def test_natural_key():
+    assert get_natural_key(XhsNoteComment) == ("comment_id",)
+    assert get_natural_key(BilibiliContactInfo) == ("up_id", "fan_id")
+
+
+@pytest.mark.asyncio
+async def test_insert_then_update(engine):
+    """Existing rows are updated in place, add_ts keeps its first value"""
+    await _upsert(engine, XhsNoteComment, [_comment("c1", 1), _comment("c2", 2)])
+    await _upsert(engine, XhsNoteComment, [_comment("c2", 20, add_ts=2), _comment("c3", 3, add_ts=2)])
+
+    rows = await _all(engine, XhsNoteComment)
+    assert [(r.comment_id, r.like_count, r.add_ts) for r in rows] == [
+        ("c1", "1", 1), ("c2", "20", 1), ("c3", "3", 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_keys_in_one_batch(engine):
+    """The last row per key wins, unknown keys are dropped"""
+    written = await _upsert(engine, XhsNoteComment, [
+        _comment("c1", 1), {**_comment("c1", 5), "not_a_column": "x"},
+    ])
+
+    rows = await _all(engine, XhsNoteComment)
+    assert written == 1
+    assert [(r.comment_id, r.like_count) for r in rows] == [("c1", "5")]
+
+
+@pytest.mark.asyncio
+async def test_update_columns_subset(engine):
+    """Only the listed columns are overwritten on conflict"""
+    await _upsert(engine, XhsNoteComment, [{**_comment("c1", 1), "content": "first"}])
+    await _upsert(engine, XhsNoteComment, [{**_comment("c1", 9), "content": "second"}], update_columns=["like_count"])
+
+    rows = await _all(engine, XhsNoteComment)
+    assert (rows[0].like_count, rows[0].content) == ("9", "first")
+
+
+@pytest.mark.asyncio
+async def test_composite_key(engine):
+    await _upsert(engine, BilibiliContactInfo, [{"up_id": "1", "fan_id": 2, "fan_name": "a"}])
+    await _upsert(engine, BilibiliContactInfo, [{"up_id": 1, "fan_id": "2", "fan_name": "b"}])
+
+    rows = await _all(engine, BilibiliContactInfo)
+    assert [(r.up_id, r.fan_id, r.fan_name) for r in rows] == [(1, 2, "b")]
+
+
+@pytest.mark.asyncio
+async def test_fallback_without_unique_index(engine):
+    """Databases created before the unique indexes existed still upsert correctly"""
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_xhs_note_comment_comment_id"))
+        await conn.execute(text("CREATE INDEX ix_xhs_note_comment_comment_id ON xhs_note_comment (comment_id)"))
+
+    await _upsert(engine, XhsNoteComment, [_comment("c1", 1)])
+    await _upsert(engine, XhsNoteComment, [_comment("c1", 10, add_ts=2), _comment("c2", 2)])
+
+    rows = await _all(engine, XhsNoteComment)
+    assert [(r.comment_id, r.like_count, r.add_ts) for r in rows] == [("c1", "10", 1), ("c2", "2", 1)]
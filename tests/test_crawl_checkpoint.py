@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_crawl_checkpoint.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+"""
+Unit tests for CrawlCheckpoint and the --resume flag
+"""
+
+import asyncio
+import json
+
+import config
+from cmd_arg import arg
+from tools.crawl_checkpoint import CrawlCheckpoint
+
+
+def test_resumed_checkpoint_continues_from_saved_cursor(tmp_path):
+    path = str(tmp_path / "xhs_search.json")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.set_cursor("keyword:python", page=3, search_id="abc")
+    checkpoint.add_completed(["n1", "n2"])
+    checkpoint.mark_done("keyword:java")
+    checkpoint.save()
+
+    resumed = CrawlCheckpoint(path, resume=True)
+    assert resumed.get_cursor("keyword:python") == {"page": 3, "search_id": "abc"}
+    assert resumed.is_done("keyword:java")
+    assert not resumed.is_done("keyword:python")
+    assert resumed.is_completed("n1") and not resumed.is_completed("n3")
+
+
+def test_fresh_run_ignores_previous_checkpoint(tmp_path):
+    path = str(tmp_path / "xhs_search.json")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.set_cursor("keyword:python", page=3)
+    checkpoint.save()
+
+    fresh = CrawlCheckpoint(path, resume=False)
+    assert fresh.get_cursor("keyword:python") == {}
+
+
+def test_fresh_run_does_not_skip_completed_notes(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / "xhs_search.json"))
+    checkpoint.add_completed(["n1"])
+    assert not checkpoint.is_completed("n1")
+
+
+def test_disabled_checkpoint_never_writes(tmp_path):
+    path = tmp_path / "xhs_search.json"
+    path.write_text('{"scopes": {"keyword:a": {"done": true}}, "completed": []}')
+    checkpoint = CrawlCheckpoint(str(path), enabled=False)
+    checkpoint.set_cursor("keyword:b", page=2)
+    checkpoint.save()
+    assert json.loads(path.read_text())["scopes"] == {"keyword:a": {"done": True}}
+
+
+def test_saves_are_throttled_until_forced(tmp_path):
+    path = tmp_path / "bili_search.json"
+    checkpoint = CrawlCheckpoint(str(path), save_interval_sec=3600)
+    checkpoint.set_cursor("keyword:a", page=2)  # first change is written right away
+    checkpoint.set_cursor("keyword:a", page=3)
+    assert json.loads(path.read_text())["scopes"]["keyword:a"]["cursor"] == {"page": 2}
+
+    checkpoint.save()
+    assert json.loads(path.read_text())["scopes"]["keyword:a"]["cursor"] == {"page": 3}
+    assert not (tmp_path / "bili_search.json.tmp").exists()
+
+
+def test_corrupt_checkpoint_starts_from_scratch(tmp_path):
+    path = tmp_path / "dy_search.json"
+    path.write_text("{not json")
+    assert CrawlCheckpoint(str(path), resume=True).get_cursor("keyword:a") == {}
+
+
+def test_get_instance_uses_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "RESUME_CRAWL", False)
+    monkeypatch.setattr(config, "ENABLE_CRAWL_CHECKPOINT", True)
+    monkeypatch.setattr(CrawlCheckpoint, "_instances", {})
+    checkpoint = CrawlCheckpoint.get_instance("xhs", "creator")
+    assert checkpoint is CrawlCheckpoint.get_instance("xhs", "creator")
+    checkpoint.set_cursor("creator:u1", cursor="c1", notes=[])
+    CrawlCheckpoint.close_all()
+    assert (tmp_path / "xhs_creator.json").exists()
+
+
+def test_resume_flag_sets_config(monkeypatch):
+    monkeypatch.setattr(config, "RESUME_CRAWL", False)
+    args = asyncio.run(arg.parse_cmd(["--resume"]))
+    assert args.resume is True
+    assert config.RESUME_CRAWL is True
+
+
+def test_resumed_creator_crawl_keeps_note_cap(monkeypatch):
+    from media_platform.xhs.client import XiaoHongShuClient
+
+    monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 5)
+    client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+
+    async def get_notes_by_creator(user_id, cursor, **kwargs):
+        page = int(cursor or 0)
+        return {"has_more": True, "cursor": str(page + 1), "notes": [{"note_id": f"{page}-{i}"} for i in range(2)]}
+
+    monkeypatch.setattr(client, "get_notes_by_creator", get_notes_by_creator)
+    notes = asyncio.run(client.get_all_notes_by_creator("u1", crawl_interval=0, notes_cursor="2", collected_count=4))
+
+    assert notes == [{"note_id": "2-0"}]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_crawl_frontier.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+"""
+Unit tests for the Bloom filters and the persistent CrawlFrontier
+"""
+
+import time
+
+import pytest
+import pytest_asyncio
+
+import config
+
+from tools.bloom_filter import BloomFilter, ScalableBloomFilter
+from tools.crawl_frontier import CrawlFrontier
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"note:{i}")
+    assert all(f"note:{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_scalable_bloom_filter_grows_past_initial_capacity():
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01)
+    # A false positive makes add() skip an item, so a few may not be counted
+    added = sum(bloom.add(str(i)) for i in range(1000))
+    assert added > 980
+    assert not bloom.add("1")
+    assert len(bloom) == added
+    assert bloom.capacity >= 1000
+    assert all(str(i) in bloom for i in range(1000))
+
+
+@pytest_asyncio.fixture
+async def frontier(tmp_path):
+    frontier = CrawlFrontier("xhs", str(tmp_path / "frontier.db"), freshness_sec=3600)
+    yield frontier
+    await frontier.close()
+
+
+@pytest.mark.asyncio
+async def test_filter_unseen_skips_marked_items(frontier):
+    items = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    assert await frontier.filter_unseen("note", items, key=lambda item: item["id"]) == items
+
+    await frontier.mark_seen("note", ["a", "c"])
+    assert await frontier.filter_unseen("note", items, key=lambda item: item["id"]) == [{"id": "b"}]
+    assert await frontier.is_fresh("note", "a")
+    # Kinds do not share IDs
+    assert not await frontier.is_fresh("comment", "a")
+
+
+@pytest.mark.asyncio
+async def test_items_outside_freshness_window_are_crawled_again(frontier, monkeypatch):
+    await frontier.mark_seen("note", [1, 2])
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 7200)
+    assert await frontier.filter_unseen("note", [1, 2, 3]) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_seen_items_persist_across_runs(frontier):
+    await frontier.mark_seen("note", ["a"])
+    await frontier.close()
+
+    next_run = CrawlFrontier("xhs", frontier.db_path, freshness_sec=3600)
+    other_platform = CrawlFrontier("dy", frontier.db_path, freshness_sec=3600)
+    try:
+        assert await next_run.is_fresh("note", "a")
+        assert not await other_platform.is_fresh("note", "a")
+    finally:
+        await next_run.close()
+        await other_platform.close()
+
+
+@pytest.mark.asyncio
+async def test_comment_callback_stores_only_new_comments(frontier):
+    stored = []
+
+    async def store_comments(note_id, comments):
+        stored.append((note_id, [c["cid"] for c in comments]))
+
+    callback = frontier.comment_callback(store_comments, id_field="cid")
+    await callback("n1", [{"cid": "1"}, {"cid": "2"}])
+    await callback("n1", [{"cid": "2"}, {"cid": "3"}])
+    await callback("n1", [{"cid": "3"}])
+
+    assert stored == [("n1", ["1", "2"]), ("n1", ["3"])]
+
+
+@pytest.mark.asyncio
+async def test_notes_crawled_without_comments_are_crawled_again_with_comments(frontier, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+    await frontier.mark_notes_seen(["a"])
+    assert await frontier.filter_unseen(frontier.note_kind(), ["a", "b"]) == ["b"]
+
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", True)
+    assert await frontier.filter_unseen(frontier.note_kind(), ["a", "b"]) == ["a", "b"]
+    await frontier.mark_notes_seen(["a"])
+    assert await frontier.filter_unseen(frontier.note_kind(), ["a", "b"]) == ["b"]
+
+    # Notes crawled with comments also satisfy runs without them
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+    assert await frontier.filter_unseen(frontier.note_kind(), ["a", "b"]) == ["b"]
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_crawl_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+"""
+Unit tests for CrawlPipeline and SearchProgress
+"""
+
+import asyncio
+import contextvars
+
+import pytest
+
+from tools.crawl_checkpoint import CrawlCheckpoint, SearchProgress
+from tools.crawl_pipeline import CrawlPipeline
+
+keyword_var: contextvars.ContextVar[str] = contextvars.ContextVar("keyword_var", default="")
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_stages_overlap_instead_of_adding_up():
+    async def slow(item):
+        await asyncio.sleep(0.05)
+        return item
+
+    pipeline = CrawlPipeline("test", queue_size=2).add_stage("a", slow).add_stage("b", slow)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    stats = await pipeline.run(_iterate(range(6)))
+    elapsed = loop.time() - started
+
+    # sequential would take 6 * 2 * 0.05 = 0.6s, pipelined about (6 + 1) * 0.05 = 0.35s
+    assert elapsed < 0.5
+    assert stats["a"]["processed"] == stats["b"]["processed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_applies_back_pressure():
+    produced = []
+    release = asyncio.Event()
+
+    async def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    async def blocked(item):
+        await release.wait()
+        return item
+
+    pipeline = CrawlPipeline("test", queue_size=2).add_stage("blocked", blocked)
+    task = asyncio.create_task(pipeline.run(source()))
+    await asyncio.sleep(0.05)
+    # one item held by the worker, two in the queue, one waiting on put
+    assert len(produced) <= 4
+    release.set()
+    await task
+    assert len(produced) == 20
+
+
+@pytest.mark.asyncio
+async def test_dropped_and_failed_items_reach_on_exit():
+    exits = []
+
+    async def check(item):
+        if item == 1:
+            return None
+        if item == 2:
+            raise RuntimeError("boom")
+        return item
+
+    async def on_exit(item, completed):
+        exits.append((item, completed))
+
+    pipeline = CrawlPipeline("test", queue_size=4).add_stage("check", check, concurrency=2)
+    stats = await pipeline.run(_iterate(range(4)), on_exit=on_exit)
+
+    assert sorted(exits) == [(0, True), (1, False), (2, False), (3, True)]
+    assert stats["check"] == {"processed": 3, "dropped": 1, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_context_of_the_producer_follows_each_item():
+    seen = []
+
+    async def source():
+        for keyword in ("python", "java"):
+            keyword_var.set(keyword)
+            for i in range(2):
+                yield i
+
+    async def record(item):
+        await asyncio.sleep(0.01)
+        seen.append(keyword_var.get())
+        return item
+
+    pipeline = CrawlPipeline("test", queue_size=1).add_stage("a", record, concurrency=2).add_stage("b", record)
+    await pipeline.run(source())
+    assert sorted(seen) == ["java"] * 4 + ["python"] * 4
+    assert seen[-1] == "java"
+
+
+def test_search_progress_keeps_lowest_unfinished_page(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / "xhs_search.json"), resume=True)
+    progress = SearchProgress(checkpoint, "keyword:python")
+
+    progress.page_fetched(1, 2, search_id="s1")
+    progress.page_fetched(2, 1, search_id="s2")
+    progress.item_finished(2, "n3")
+    assert checkpoint.get_cursor("keyword:python")["page"] == 1
+
+    progress.item_finished(1, "n1")
+    progress.item_finished(1, "n2")
+    assert checkpoint.get_cursor("keyword:python") == {"page": 3, "search_id": "s2"}
+    assert checkpoint.is_completed("n1") and checkpoint.is_completed("n3")
+
+    progress.source_finished()
+    assert checkpoint.is_done("keyword:python")
+
+
+def test_search_progress_keeps_page_with_failed_items(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / "xhs_search.json"))
+    progress = SearchProgress(checkpoint, "keyword:python")
+
+    progress.page_fetched(1, 2, search_id="s1")
+    progress.page_fetched(2, 1, search_id="s2")
+    progress.item_finished(1, "n1")
+    progress.item_finished(1, "n2", completed=False)
+    progress.item_finished(2, "n3")
+    assert checkpoint.get_cursor("keyword:python") == {"page": 1, "search_id": "s1"}
+
+    progress.source_finished()
+    assert not checkpoint.is_done("keyword:python")
+    assert checkpoint.get_cursor("keyword:python")["page"] == 1
+
+
+def test_search_progress_gives_up_on_note_failing_every_resume(tmp_path):
+    file_path = str(tmp_path / "xhs_search.json")
+    for _ in range(3):
+        checkpoint = CrawlCheckpoint(file_path, resume=True, max_note_attempts=3)
+        progress = SearchProgress(checkpoint, "keyword:python")
+        progress.page_fetched(1, 1, search_id="s1")
+        progress.item_finished(1, "deleted", completed=False)
+        progress.source_finished()
+        checkpoint.save()
+
+    assert checkpoint.is_done("keyword:python")
+    assert checkpoint.is_completed("deleted")
+
+
+def test_search_progress_item_without_id_does_not_hold_page(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / "xhs_search.json"))
+    progress = SearchProgress(checkpoint, "keyword:python")
+
+    progress.page_fetched(1, 1, search_id="s1")
+    progress.item_finished(1, None, completed=False)
+    progress.source_finished()
+    assert checkpoint.is_done("keyword:python")
+
+
+def test_search_progress_waits_for_pending_items_before_done(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / "dy_search.json"))
+    progress = SearchProgress(checkpoint, "keyword:python")
+
+    progress.page_fetched(1, 1)
+    progress.source_finished()
+    assert not checkpoint.is_done("keyword:python")
+    progress.item_finished(1, "a1")
+    assert checkpoint.is_done("keyword:python")
+
+
+def test_search_progress_stopped_on_error_is_not_done(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path / "dy_search.json"))
+    progress = SearchProgress(checkpoint, "keyword:python")
+
+    progress.page_fetched(4, 0)
+    progress.source_finished(False)
+    assert not checkpoint.is_done("keyword:python")
+    assert checkpoint.get_cursor("keyword:python") == {"page": 5}
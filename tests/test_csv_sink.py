@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_csv_sink.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+"""
+Unit tests for CsvSink
+"""
+
+import asyncio
+import csv
+
+import pytest
+
+from tools.csv_sink import CsvSink, get_csv_fieldnames
+
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f))
+
+
+def test_fieldnames_come_from_the_table_schema():
+    fieldnames = get_csv_fieldnames("xhs", "contents")
+    assert "id" not in fieldnames
+    assert fieldnames[:2] == ["user_id", "nickname"]
+    assert "note_id" in fieldnames and "xsec_token" in fieldnames
+    assert get_csv_fieldnames("test", "contents") is None
+
+
+@pytest.mark.asyncio
+async def test_rows_stay_aligned_with_the_fixed_header(tmp_path):
+    path = tmp_path / "comments.csv"
+    sink = CsvSink(str(path), ["comment_id", "content"], flush_bytes=0)
+    await sink.write_rows([{"content": "hi", "comment_id": "c1", "extra": 1}])
+    await sink.write_rows([{"comment_id": "c2"}, {"content": "yo", "comment_id": "c3", "unknown": "x"}])
+    sink.close()
+
+    assert _read_rows(path) == [
+        ["comment_id", "content", "extra"],
+        ["c1", "hi", "1"],
+        ["c2", "", ""],
+        ["c3", "yo", ""],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rows_are_buffered_until_the_size_threshold(tmp_path):
+    path = tmp_path / "contents.csv"
+    sink = CsvSink(str(path), ["note_id", "title"], flush_bytes=200, flush_interval_sec=3600)
+    await sink.write_rows([{"note_id": "n0", "title": "t"}])
+    handle = sink._file
+    assert path.read_text(encoding="utf-8-sig") == ""
+
+    await sink.write_rows([{"note_id": f"n{i}", "title": "t" * 20} for i in range(1, 10)])
+    assert len(_read_rows(path)) == 11
+    assert sink._file is handle  # the file is opened once
+    sink.close()
+
+
+@pytest.mark.asyncio
+async def test_rows_are_flushed_after_the_interval(tmp_path):
+    path = tmp_path / "contents.csv"
+    sink = CsvSink(str(path), ["note_id"], flush_bytes=1 << 20, flush_interval_sec=0.05)
+    await sink.write_rows([{"note_id": "n1"}])
+    assert path.read_text(encoding="utf-8-sig") == ""
+
+    await asyncio.sleep(0.1)
+    assert _read_rows(path) == [["note_id"], ["n1"]]
+    sink.close()
+
+
+@pytest.mark.asyncio
+async def test_close_writes_pending_rows_and_existing_header_is_kept(tmp_path):
+    path = tmp_path / "contents.csv"
+    sink = CsvSink(str(path), ["note_id", "title"], flush_bytes=1 << 20, flush_interval_sec=3600)
+    await sink.write_rows([{"note_id": "n1", "title": "a"}])
+    sink.close()
+    assert _read_rows(path) == [["note_id", "title"], ["n1", "a"]]
+
+    # The next run appends with the file's header, even if the schema changed meanwhile
+    reopened = CsvSink(str(path), ["title", "note_id", "liked_count"], flush_bytes=0)
+    await reopened.write_rows([{"title": "b", "note_id": "n2", "liked_count": 3}])
+    reopened.close()
+    assert _read_rows(path) == [["note_id", "title"], ["n1", "a"], ["n2", "b"]]
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_db_session.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for engine / session caching in database.db_session
+"""
+
+import pytest
+from sqlalchemy import text
+
+from database import db, db_session
+
+
+@pytest.fixture(autouse=True)
+def sqlite_db(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "sqlite")
+    monkeypatch.setitem(db_session.sqlite_db_config, "db_path", str(tmp_path / "test.db"))
+    monkeypatch.setitem(db_session.sqlite_db_config, "busy_timeout_ms", 1234)
+    db_session._engines.clear()
+    db_session._session_factories.clear()
+    yield
+    db_session._engines.clear()
+    db_session._session_factories.clear()
+
+
+def test_session_factory_is_cached():
+    assert db_session.get_session_factory() is db_session.get_session_factory()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_on_connect():
+    async with db_session.get_session() as session:
+        journal_mode = (await session.execute(text("PRAGMA journal_mode"))).scalar()
+        synchronous = (await session.execute(text("PRAGMA synchronous"))).scalar()
+        busy_timeout = (await session.execute(text("PRAGMA busy_timeout"))).scalar()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert busy_timeout == 1234
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_close_disposes_engines():
+    async with db_session.get_session() as session:
+        await session.execute(text("SELECT 1"))
+    engine = db_session._engines["sqlite"]
+    assert engine.pool.checkedin() == 1
+
+    await db.close()
+
+    assert db_session._engines == {}
+    assert db_session._session_factories == {}
+    assert engine.pool.checkedin() == 0
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_douyin_params.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the Douyin common params / msToken cache
+"""
+
+import urllib.parse
+
+import httpx
+import pytest
+
+from media_platform.douyin import client as douyin_client
+from media_platform.douyin.client import DouYinClient
+
+
+class FakePage:
+    def __init__(self):
+        self.evaluations = 0
+        self.token = "token-1"
+
+    async def evaluate(self, script: str):
+        self.evaluations += 1
+        return self.token
+
+
+@pytest.fixture
+def dy_client(monkeypatch):
+    signed = []
+
+    async def fake_get_a_bogus(uri, query_string, post_data, user_agent, page):
+        signed.append(query_string)
+        return "bogus"
+
+    monkeypatch.setattr(douyin_client, "get_a_bogus", fake_get_a_bogus)
+    client = DouYinClient(
+        timeout=10,
+        headers={"User-Agent": "ua", "Cookie": ""},
+        playwright_page=FakePage(),
+        cookie_dict={},
+    )
+    client.signed = signed
+    return client
+
+
+@pytest.mark.asyncio
+async def test_query_string_matches_full_encoding(dy_client):
+    params = {"aweme_id": "123", "keyword": "中文 空格"}
+    await dy_client._DouYinClient__process_req_params("/aweme/v1/web/aweme/detail/", params)
+
+    expected = dict(params)
+    expected.pop("a_bogus")
+    assert dy_client.signed[0] == urllib.parse.urlencode(expected)
+    assert params["msToken"] == "token-1"
+    assert params["a_bogus"] == "bogus"
+
+
+@pytest.mark.asyncio
+async def test_ms_token_read_once_until_stale(dy_client):
+    page = dy_client.playwright_page
+    for _ in range(5):
+        await dy_client._DouYinClient__process_req_params("/aweme/v1/web/aweme/detail/", {"aweme_id": "1"})
+    assert page.evaluations == 1
+
+    page.token = "token-2"
+    dy_client.get_http_client = lambda follow_redirects=False: httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, text="")))
+    with pytest.raises(Exception):
+        await dy_client.request("GET", "https://www.douyin.com/aweme/v1/web/aweme/detail/")
+
+    params = {"aweme_id": "1"}
+    await dy_client._DouYinClient__process_req_params("/aweme/v1/web/aweme/detail/", params)
+    assert page.evaluations == 2
+    assert params["msToken"] == "token-2"
+    # webid is stable for the whole session
+    assert len({urllib.parse.parse_qs(q)["webid"][0] for q in dy_client.signed}) == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_ms_token_is_read_again(dy_client):
+    page = dy_client.playwright_page
+    page.token = None
+    await dy_client._DouYinClient__process_req_params("/aweme/v1/web/aweme/detail/", {"aweme_id": "1"})
+
+    page.token = "token-1"
+    params = {"aweme_id": "1"}
+    await dy_client._DouYinClient__process_req_params("/aweme/v1/web/aweme/detail/", params)
+    await dy_client._DouYinClient__process_req_params("/aweme/v1/web/aweme/detail/", {"aweme_id": "1"})
+
+    assert params["msToken"] == "token-1"
+    assert page.evaluations == 2
@@ -273,3 +273,66 @@ class TestSingletonPattern:
 
         # Verify instances are cleared
         assert len(ExcelStoreBase._instances) == 0
+
+
+@pytest.mark.skipif(not EXCEL_AVAILABLE, reason="openpyxl not installed")
+class TestStreamingExcel:
+    """Test write-only streaming mode and sheet rollover"""
+
+    @pytest.fixture(autouse=True)
+    def setup_and_teardown(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        ExcelStoreBase._instances.clear()
+        yield
+        ExcelStoreBase._instances.clear()
+
+    @pytest.mark.asyncio
+    async def test_write_only_export(self, monkeypatch):
+        monkeypatch.setattr("config.EXCEL_WIDTH_SAMPLE_ROWS", 2)
+        store = ExcelStoreBase(platform="test", crawler_type="search", write_only=True)
+        for i in range(5):
+            await store.store_comment({"comment_id": f"c{i}", "content": "x" * (20 if i == 1 else 3)})
+        store.flush()
+
+        wb = openpyxl.load_workbook(store.filename)
+        assert wb.sheetnames == ["Comments"]
+        sheet = wb["Comments"]
+        assert sheet.max_row == 6
+        assert sheet.cell(row=1, column=1).font.bold is True
+        assert sheet.cell(row=2, column=2).alignment.wrap_text is True
+        assert sheet.column_dimensions["B"].width == 22  # widest value of the sampled rows + 2
+        wb.close()
+
+    @pytest.mark.asyncio
+    async def test_columns_follow_first_item(self):
+        store = ExcelStoreBase(platform="test", crawler_type="search")
+        await store.store_content({"note_id": "n1", "title": "a"})
+        await store.store_content({"title": "b", "note_id": "n2", "extra": 1})
+
+        assert [cell.value for cell in store.contents_sheet[3]] == ["n2", "b"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("write_only", [False, True])
+    async def test_rollover_to_new_sheet(self, monkeypatch, write_only):
+        monkeypatch.setattr("config.EXCEL_MAX_ROWS_PER_SHEET", 2)
+        store = ExcelStoreBase(platform="test", crawler_type="search", write_only=write_only)
+        for i in range(5):
+            await store.store_comment({"comment_id": f"c{i}"})
+        store.flush()
+
+        wb = openpyxl.load_workbook(store.filename)
+        assert wb.sheetnames == ["Comments", "Comments_2", "Comments_3"]
+        assert [wb[name].max_row for name in wb.sheetnames] == [3, 3, 2]
+        assert wb["Comments_3"].cell(row=1, column=1).value == "comment_id"
+        assert wb["Comments_3"].cell(row=2, column=1).value == "c4"
+        wb.close()
+
+    def test_column_width_tracked_without_rescanning(self):
+        store = ExcelStoreBase(platform="test", crawler_type="search")
+        asyncio.run(store.store_content({"note_id": "n1", "desc": "y" * 100}))
+        store.flush()
+
+        wb = openpyxl.load_workbook(store.filename)
+        assert wb["Contents"].column_dimensions["A"].width == 10
+        assert wb["Contents"].column_dimensions["B"].width == 50
+        wb.close()
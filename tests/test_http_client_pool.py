@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_http_client_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for HttpClientPool
+"""
+
+import asyncio
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from tools.http_client_pool import HttpClientPool, _PooledAsyncClient
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_pool():
+    yield
+    await HttpClientPool.close_all()
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_per_platform_and_proxy():
+    client = HttpClientPool.get_client("XiaoHongShuClient", None)
+
+    assert HttpClientPool.get_client("XiaoHongShuClient", None) is client
+    assert HttpClientPool.get_client("XiaoHongShuClient", "http://127.0.0.1:8080") is not client
+    assert HttpClientPool.get_client("DouYinClient", None) is not client
+    assert HttpClientPool.get_client("XiaoHongShuClient", None, follow_redirects=True) is not client
+
+
+@pytest.mark.asyncio
+async def test_response_cookies_are_not_persisted():
+    """Login cookies are sent explicitly, Set-Cookie must not leak into later requests"""
+    client = HttpClientPool.get_client("XiaoHongShuClient", None)
+    request = httpx.Request("GET", "https://www.xiaohongshu.com")
+    client.cookies.extract_cookies(httpx.Response(200, headers={"set-cookie": "a1=xyz"}, request=request))
+
+    assert len(client.cookies.jar) == 0
+
+
+@pytest.mark.asyncio
+async def test_redirect_cookies_stay_within_one_request():
+    """Cookies set during a redirect chain reach the next hop but not later requests"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/start":
+            return httpx.Response(302, headers={"location": "/next", "set-cookie": "sid=1; Path=/"})
+        return httpx.Response(200, text=request.headers.get("cookie", ""))
+
+    client = _PooledAsyncClient(
+        transport=httpx.MockTransport(handler),
+        follow_redirects=True,
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+    async with client:
+        redirected = await client.get("https://www.douyin.com/start")
+        direct = await client.get("https://www.douyin.com/next")
+
+    assert redirected.text == "sid=1"
+    assert [r.status_code for r in redirected.history] == [302]
+    assert direct.text == ""
+    assert len(client.cookies.jar) == 0
+
+
+@pytest.mark.asyncio
+async def test_retired_client_is_closed_after_grace(monkeypatch):
+    monkeypatch.setattr(HttpClientPool, "RETIRE_GRACE_SECONDS", 0)
+    old = HttpClientPool.get_client("XiaoHongShuClient", "http://1.1.1.1:80")
+
+    HttpClientPool.retire_clients("XiaoHongShuClient", "http://1.1.1.1:80")
+    await asyncio.sleep(0.05)
+
+    assert old.is_closed
+    assert HttpClientPool.get_client("XiaoHongShuClient", "http://1.1.1.1:80") is not old
+
+
+@pytest.mark.asyncio
+async def test_close_all_closes_active_and_retiring_clients():
+    active = HttpClientPool.get_client("XiaoHongShuClient", None)
+    retiring = HttpClientPool.get_client("XiaoHongShuClient", "http://1.1.1.1:80")
+    HttpClientPool.retire_clients("XiaoHongShuClient", "http://1.1.1.1:80")
+
+    await HttpClientPool.close_all()
+
+    assert active.is_closed and retiring.is_closed
+    assert HttpClientPool._clients == {}
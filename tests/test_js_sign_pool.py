@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_js_sign_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for JsSignPool
+"""
+
+import asyncio
+import hashlib
+import shutil
+
+import pytest
+import pytest_asyncio
+
+from tools.js_sign_pool import JsSignError, JsSignPool
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+SCRIPT = """
+const crypto = require('crypto');
+var calls = 0;
+
+function md5(text) {
+    calls += 1;
+    console.log('logging must not break the protocol');
+    return crypto.createHash('md5').update(text).digest('hex');
+}
+
+function call_count() {
+    return calls;
+}
+
+function fail() {
+    throw new Error('bad input');
+}
+
+function spin() {
+    while (true) {}
+}
+"""
+
+
+@pytest_asyncio.fixture
+async def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.JS_SIGN_TIMEOUT_SEC", 2)
+    script = tmp_path / "sign.js"
+    script.write_text(SCRIPT, encoding="utf-8")
+    pool = JsSignPool(str(script), size=2)
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls(pool):
+    results = await asyncio.gather(*[pool.call("md5", f"text{i}") for i in range(20)])
+
+    assert len(set(results)) == 20
+    assert results[0] == hashlib.md5(b"text0").hexdigest()
+    # the script is loaded once per worker and reused across calls
+    counts = [await worker.call("call_count") for worker in pool._workers]
+    assert sum(counts) == 20
+
+
+@pytest.mark.asyncio
+async def test_js_error_is_raised(pool):
+    with pytest.raises(JsSignError, match="bad input"):
+        await pool.call("fail")
+    assert await pool.call("md5", "ok")
+
+
+@pytest.mark.asyncio
+async def test_timeout_restarts_worker(pool):
+    with pytest.raises(JsSignError, match="timed out"):
+        await pool.call("spin", timeout=0.5)
+    assert await pool.call("md5", "ok")
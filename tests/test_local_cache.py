@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_local_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the heap based ExpiringLocalCache
+"""
+
+import asyncio
+
+import pytest
+
+from cache.cache_factory import CacheFactory
+from cache.local_cache import ExpiringLocalCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.local_cache.time.time", lambda: now[0])
+    return now
+
+
+def test_expired_keys_are_purged(clock):
+    cache = ExpiringLocalCache()
+    for i in range(100):
+        cache.set(f"k{i}", i, expire_time=10 if i % 2 else 100)
+
+    clock[0] += 50
+    cache.set("new", 1, 10)
+
+    assert len(cache) == 51
+    assert cache.expirations == 50
+    assert cache.get("k1") is None
+    assert cache.get("k2") == 2
+
+
+def test_overwritten_key_keeps_new_expiry(clock):
+    cache = ExpiringLocalCache()
+    cache.set("k", "old", 10)
+    cache.set("k", "new", 100)
+
+    clock[0] += 50
+    cache.keys("*")  # triggers a purge
+
+    assert cache.get("k") == "new"
+    assert cache.expirations == 0
+
+
+def test_lru_eviction():
+    cache = CacheFactory.create_cache("memory", max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key, 60)
+    cache.get("a")  # a becomes most recently used
+
+    cache.set("d", "d", 60)
+
+    assert cache.keys("*") == ["c", "a", "d"]
+    assert cache.evictions == 1
+
+
+def test_glob_keys_and_counters():
+    cache = ExpiringLocalCache()
+    for key in ("kuaidaili_1", "kuaidaili_2", "wandouhttp_1", "xkuaidaili_3"):
+        cache.set(key, 1, 60)
+
+    assert sorted(cache.keys("kuaidaili_*")) == ["kuaidaili_1", "kuaidaili_2"]
+    assert cache.keys("*_1") == ["kuaidaili_1", "wandouhttp_1"]
+
+    cache.get("kuaidaili_1")
+    cache.get("missing")
+    assert cache.stats() == {"size": 4, "hits": 1, "misses": 1, "evictions": 0, "expirations": 0}
+
+
+def test_heap_is_compacted(clock):
+    cache = ExpiringLocalCache()
+    for i in range(1000):
+        cache.set("same", i, 60)
+
+    assert len(cache._expire_heap) < 100
+
+
+@pytest.mark.asyncio
+async def test_cron_purges_in_background(clock):
+    cache = ExpiringLocalCache(cron_interval=0)
+    cache.set("k", 1, 10)
+    clock[0] += 20
+    await asyncio.sleep(0.01)
+
+    assert len(cache) == 0
+    cache._cron_task.cancel()
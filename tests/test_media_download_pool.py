@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_media_download_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+"""
+Unit tests for the media download worker pool
+"""
+
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+from tools.media_download_pool import MediaDownloadPool
+
+
+class FakeDownloader:
+    def __init__(self, contents, failures=0):
+        self.contents = contents
+        self.failures = failures
+        self.calls = []
+
+    async def __call__(self, url: str, file_path: str) -> bool:
+        self.calls.append(url)
+        if self.failures:
+            self.failures -= 1
+            return False
+        with open(file_path, "wb") as f:
+            f.write(self.contents[url])
+        return True
+
+
+def _pool(tmp_path, **kwargs) -> MediaDownloadPool:
+    kwargs.setdefault("retry_base_sec", 0.01)
+    return MediaDownloadPool("xhs", str(tmp_path / "media_jobs.db"), str(tmp_path / "media"), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_identical_content_is_stored_once_and_linked(tmp_path):
+    downloader = FakeDownloader({"https://a/1.jpg": b"same", "https://b/1.jpg": b"same"})
+    pool = _pool(tmp_path)
+    await pool.start(downloader)
+    note_a, note_b = tmp_path / "images" / "a", tmp_path / "images" / "b"
+    note_a.mkdir(parents=True)
+    note_b.mkdir(parents=True)
+    await pool.enqueue("https://a/1.jpg", str(note_a / "0.jpg"))
+    await pool.enqueue("https://b/1.jpg", str(note_b / "0.jpg"))
+    await pool.join()
+    await pool.close()
+
+    objects = [name for _, _, names in os.walk(tmp_path / "media" / "objects") for name in names]
+    assert len(objects) == 1
+    assert (note_a / "0.jpg").read_bytes() == (note_b / "0.jpg").read_bytes() == b"same"
+    assert os.path.islink(note_a / "0.jpg")
+
+
+@pytest.mark.asyncio
+async def test_downloaded_url_is_not_fetched_again(tmp_path):
+    downloader = FakeDownloader({"https://a/1.jpg": b"image"})
+    pool = _pool(tmp_path, concurrency=1)
+    await pool.start(downloader)
+    await pool.enqueue("https://a/1.jpg", str(tmp_path / "n1" / "0.jpg"))
+    await pool.join()
+    await pool.enqueue("https://a/1.jpg", str(tmp_path / "n2" / "0.jpg"))
+    await pool.enqueue("https://a/1.jpg", str(tmp_path / "n1" / "0.jpg"))  # already done
+    await pool.join()
+    await pool.close()
+
+    assert downloader.calls == ["https://a/1.jpg"]
+    assert (tmp_path / "n2" / "0.jpg").read_bytes() == b"image"
+    assert pool.linked == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_download_is_retried_with_backoff(tmp_path):
+    downloader = FakeDownloader({"https://a/v.mp4": b"video"}, failures=2)
+    pool = _pool(tmp_path, max_attempts=3)
+    await pool.start(downloader)
+    await pool.enqueue("https://a/v.mp4", str(tmp_path / "n1" / "video.mp4"))
+    await pool.join()
+    await pool.close()
+
+    assert len(downloader.calls) == 3
+    assert (tmp_path / "n1" / "video.mp4").read_bytes() == b"video"
+
+
+@pytest.mark.asyncio
+async def test_pool_gives_up_after_max_attempts(tmp_path):
+    downloader = FakeDownloader({}, failures=10)
+    pool = _pool(tmp_path, max_attempts=2)
+    await pool.start(downloader)
+    await pool.enqueue("https://a/v.mp4", str(tmp_path / "n1" / "video.mp4"))
+    await pool.join()
+    await pool.close()
+
+    assert len(downloader.calls) == 2
+    assert pool.failed == 1
+    assert not os.path.exists(tmp_path / "n1" / "video.mp4")
+
+
+@pytest.mark.asyncio
+async def test_queued_jobs_survive_a_restart(tmp_path):
+    pool = _pool(tmp_path)
+    await pool.enqueue("https://a/1.jpg", str(tmp_path / "n1" / "0.jpg"))
+    await pool.close()  # stopped before any worker ran
+
+    downloader = FakeDownloader({"https://a/1.jpg": b"image"})
+    resumed = _pool(tmp_path)
+    await resumed.start(downloader)
+    await resumed.join()
+    await resumed.close()
+
+    assert downloader.calls == ["https://a/1.jpg"]
+    assert (tmp_path / "n1" / "0.jpg").read_bytes() == b"image"
+
+
+@pytest.mark.asyncio
+async def test_database_error_does_not_hang_join(tmp_path, monkeypatch):
+    downloader = FakeDownloader({"https://a/1.jpg": b"image", "https://a/2.jpg": b"other"})
+    pool = _pool(tmp_path, concurrency=1)
+    finish = pool._finish
+    calls = []
+
+    async def flaky_finish(job_id, status, **kwargs):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        await finish(job_id, status, **kwargs)
+
+    monkeypatch.setattr(pool, "_finish", flaky_finish)
+    await pool.start(downloader)
+    await pool.enqueue("https://a/1.jpg", str(tmp_path / "n1" / "0.jpg"))
+    await pool.enqueue("https://a/2.jpg", str(tmp_path / "n1" / "1.jpg"))
+    await asyncio.wait_for(pool.join(), 5)
+    await pool.close()
+
+    assert pool.failed == 1
+    assert (tmp_path / "n1" / "1.jpg").read_bytes() == b"other"
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_media_downloader.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+"""
+Unit tests for the streaming media downloader
+"""
+
+import os
+import re
+
+import httpx
+import pytest
+
+import config
+from tools.media_downloader import MediaDownloadError, stream_download
+
+BODY = bytes(range(256)) * 64  # 16 KiB
+
+
+def _range_transport(body: bytes, requests: list, support_ranges: bool = True) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        range_header = request.headers.get("range")
+        requests.append(range_header)
+        if not range_header or not support_ranges:
+            return httpx.Response(200, content=body)
+        start, end = re.match(r"bytes=(\d+)-(\d*)", range_header).groups()
+        start, end = int(start), int(end) if end else len(body) - 1
+        if start >= len(body):
+            return httpx.Response(416, headers={"Content-Range": f"bytes */{len(body)}"})
+        return httpx.Response(
+            206,
+            content=body[start:end + 1],
+            headers={"Content-Range": f"bytes {start}-{end}/{len(body)}"},
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(config, "MEDIA_DOWNLOAD_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(config, "ENABLE_MEDIA_RANGE_RESUME", True)
+
+
+@pytest.mark.asyncio
+async def test_download_writes_file_and_removes_part(tmp_path):
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests)) as client:
+        size = await stream_download(client, "https://cdn.test/v.mp4", file_path)
+
+    assert size == len(BODY)
+    assert open(file_path, "rb").read() == BODY
+    assert not os.path.exists(file_path + ".part")
+    assert requests == [None]
+
+
+@pytest.mark.asyncio
+async def test_partial_file_is_resumed_with_range(tmp_path):
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    with open(file_path + ".part", "wb") as f:
+        f.write(BODY[:5000])
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests)) as client:
+        await stream_download(client, "https://cdn.test/v.mp4", file_path)
+
+    assert requests == ["bytes=5000-"]
+    assert open(file_path, "rb").read() == BODY
+
+
+@pytest.mark.asyncio
+async def test_server_ignoring_range_restarts_from_scratch(tmp_path):
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    with open(file_path + ".part", "wb") as f:
+        f.write(b"x" * 5000)
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests, support_ranges=False)) as client:
+        await stream_download(client, "https://cdn.test/v.mp4", file_path)
+
+    assert open(file_path, "rb").read() == BODY
+
+
+@pytest.mark.asyncio
+async def test_complete_part_file_is_finished_on_416(tmp_path):
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    with open(file_path + ".part", "wb") as f:
+        f.write(BODY)
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests)) as client:
+        await stream_download(client, "https://cdn.test/v.mp4", file_path)
+
+    assert open(file_path, "rb").read() == BODY
+
+
+@pytest.mark.asyncio
+async def test_oversized_part_file_is_discarded(tmp_path):
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    with open(file_path + ".part", "wb") as f:
+        f.write(BODY + b"junk")
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests)) as client:
+        with pytest.raises(MediaDownloadError):
+            await stream_download(client, "https://cdn.test/v.mp4", file_path)
+
+    assert not os.path.exists(file_path + ".part")
+
+
+@pytest.mark.asyncio
+async def test_failed_download_keeps_no_destination_file(tmp_path):
+    file_path = str(tmp_path / "video.mp4")
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await stream_download(client, "https://cdn.test/v.mp4", file_path)
+
+    assert not os.path.exists(file_path)
+
+
+@pytest.mark.asyncio
+async def test_large_file_is_downloaded_in_parallel_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MEDIA_SEGMENT_MIN_MB", 0.01)
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests)) as client:
+        size = await stream_download(client, "https://cdn.test/v.mp4", file_path, segments=3)
+
+    assert size == len(BODY)
+    assert open(file_path, "rb").read() == BODY
+    assert sorted(requests) == sorted(["bytes=0-0", "bytes=0-5461", "bytes=5462-10923", "bytes=10924-16383"])
+    assert os.listdir(tmp_path) == ["video.mp4"]
+
+
+@pytest.mark.asyncio
+async def test_segments_fall_back_to_one_stream_without_range_support(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MEDIA_SEGMENT_MIN_MB", 0.01)
+    requests = []
+    file_path = str(tmp_path / "video.mp4")
+    async with httpx.AsyncClient(transport=_range_transport(BODY, requests, support_ranges=False)) as client:
+        await stream_download(client, "https://cdn.test/v.mp4", file_path, segments=3, total_size=len(BODY))
+
+    assert open(file_path, "rb").read() == BODY
+    assert os.listdir(tmp_path) == ["video.mp4"]
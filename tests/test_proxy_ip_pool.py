@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_proxy_ip_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the health-scored ProxyIpPool
+"""
+
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from proxy.base_proxy import ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.types import IpInfoModel
+
+
+class FakeProvider(ProxyProvider):
+    def __init__(self, ttl_sec: int = 600):
+        self.ttl_sec = ttl_sec
+        self.calls = 0
+        self.excluded = []
+
+    async def get_proxy(self, num: int, exclude=None, valid_for_sec: int = 0) -> List[IpInfoModel]:
+        self.calls += 1
+        self.excluded.append(set(exclude or ()))
+        await asyncio.sleep(0.05)
+        start = self.calls * 100
+        return [
+            IpInfoModel(ip=f"10.0.0.{start + i}", port=8000, user="", password="",
+                        expired_time_ts=int(time.time()) + self.ttl_sec)
+            for i in range(num)
+        ]
+
+
+def make_pool(provider: ProxyProvider, count: int = 4, latencies=None) -> ProxyIpPool:
+    pool = ProxyIpPool(ip_pool_count=count, enable_validate_ip=True, ip_provider=provider)
+    latencies = latencies or {}
+
+    async def check(proxy: IpInfoModel):
+        await asyncio.sleep(0.1)
+        return latencies.get(proxy.ip, 0.5)
+
+    pool._check_proxy = check
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_candidates_are_validated_concurrently():
+    pool = make_pool(FakeProvider(), count=5, latencies={"10.0.0.101": None})
+
+    start = time.monotonic()
+    added = await pool.load_proxies()
+
+    assert time.monotonic() - start < 0.3
+    assert added == 4
+    assert "10.0.0.101" not in [p.ip for p in pool.proxy_list]
+
+
+@pytest.mark.asyncio
+async def test_healthiest_proxy_is_used_and_failing_one_removed():
+    pool = make_pool(FakeProvider(), count=3, latencies={"10.0.0.100": 0.9, "10.0.0.101": 0.1, "10.0.0.102": 0.5})
+    await pool.load_proxies()
+
+    best = await pool.get_proxy()
+    assert best.ip == "10.0.0.101"
+
+    for _ in range(pool.max_failures):
+        pool.record_result(best, False)
+
+    assert pool.current_proxy is None
+    assert (await pool.get_or_refresh_proxy()).ip == "10.0.0.102"
+
+
+@pytest.mark.asyncio
+async def test_replacements_are_prefetched_before_expiry():
+    provider = FakeProvider(ttl_sec=45)  # inside the 60s prefetch window, outside the 30s expiry buffer
+    pool = make_pool(provider, count=2)
+    await pool.load_proxies()
+    current = await pool.get_proxy()
+
+    start = time.monotonic()
+    assert await pool.get_or_refresh_proxy() is current
+    assert time.monotonic() - start < 0.05  # never waits on the provider
+
+    await pool._prefetch_task
+    assert provider.calls == 2
+    assert len(pool.proxy_list) == 4
+    assert provider.excluded[1] == {pool.proxy_key(p) for p in pool.proxy_list[:2]}
+
+
+def test_cached_ips_held_or_expiring_soon_are_not_handed_out():
+    now = int(time.time())
+    cached = [
+        IpInfoModel(ip="10.0.0.1", port=8000, user="", password="", expired_time_ts=now + 600),
+        IpInfoModel(ip="10.0.0.2", port=8000, user="", password="", expired_time_ts=now + 30),
+        IpInfoModel(ip="10.0.0.3", port=8000, user="", password="", expired_time_ts=now + 600),
+    ]
+    usable = ProxyProvider.usable_cached_ips(cached, exclude={"10.0.0.1:8000"}, valid_for_sec=60)
+    assert [ip.ip for ip in usable] == ["10.0.0.3"]
+
+
+@pytest.mark.asyncio
+async def test_validation_reuses_a_pooled_client_per_proxy(monkeypatch):
+    from tools.http_client_pool import HttpClientPool
+
+    created = []
+
+    def get_client(platform, proxy=None, follow_redirects=False):
+        created.append((platform, proxy))
+        return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    monkeypatch.setattr(HttpClientPool, "get_client", staticmethod(get_client))
+    pool = ProxyIpPool(ip_pool_count=2, enable_validate_ip=True, ip_provider=FakeProvider())
+    assert await pool.load_proxies() == 2
+    assert created == [("ProxyIpPool", "http://10.0.0.100:8000"), ("ProxyIpPool", "http://10.0.0.101:8000")]
+
+
+@pytest.mark.asyncio
+async def test_lease_caps_concurrency_per_ip(monkeypatch):
+    monkeypatch.setattr("config.IP_PROXY_MAX_CONCURRENCY_PER_IP", 1)
+    pool = make_pool(FakeProvider(), count=2)
+    await pool.load_proxies()
+    peak = {}
+
+    async def one_request():
+        async with pool.lease() as proxy:
+            key = pool.proxy_key(proxy)
+            peak[key] = max(peak.get(key, 0), pool._in_flight[key])
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(*[one_request() for _ in range(6)])
+
+    assert len(peak) == 2  # requests fan out over both IPs
+    assert max(peak.values()) == 1
+    assert not pool._in_flight
+
+
+@pytest.mark.asyncio
+async def test_sticky_key_keeps_its_proxy(monkeypatch):
+    monkeypatch.setattr("config.IP_PROXY_MAX_CONCURRENCY_PER_IP", 0)
+    pool = make_pool(FakeProvider(), count=4)
+    await pool.load_proxies()
+
+    used = set()
+    for _ in range(10):
+        async with pool.lease("note_id=n1") as proxy:
+            used.add(proxy.ip)
+    assert len(used) == 1
+
+    drawn = set()
+    for _ in range(40):
+        async with pool.lease() as proxy:
+            drawn.add(proxy.ip)
+    assert len(drawn) > 1
+
+
+@pytest.mark.asyncio
+async def test_rotate_every_n_requests(monkeypatch):
+    monkeypatch.setattr("config.IP_PROXY_ROTATE_EVERY_N_REQUESTS", 3)
+    monkeypatch.setattr("config.IP_PROXY_MAX_CONCURRENCY_PER_IP", 0)
+    pool = make_pool(FakeProvider(), count=4)
+    await pool.load_proxies()
+
+    ips = []
+    for _ in range(9):
+        async with pool.lease() as proxy:
+            ips.append(proxy.ip)
+
+    for i in range(0, 9, 3):
+        assert len(set(ips[i:i + 3])) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_requests_rotate_and_stick(monkeypatch):
+    from proxy.proxy_mixin import ProxyRefreshMixin, sticky_proxy
+    from tools.http_client_pool import HttpClientPool
+
+    monkeypatch.setattr("config.IP_PROXY_ROTATION_MODE", "request")
+    monkeypatch.setattr("config.IP_PROXY_MAX_CONCURRENCY_PER_IP", 0)
+    seen = []
+
+    def get_client(platform, proxy=None, follow_redirects=False):
+        def handler(request):
+            seen.append(proxy)
+            return httpx.Response(200, json={})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(HttpClientPool, "get_client", staticmethod(get_client))
+
+    class Client(ProxyRefreshMixin):
+        def __init__(self, pool):
+            self.proxy = None
+            self.init_proxy_pool(pool)
+
+        @sticky_proxy("note_id")
+        async def get_all_comments(self, note_id: str):
+            for _ in range(5):
+                await self._send_request("GET", "https://example.com/comments")
+
+    pool = make_pool(FakeProvider(), count=4)
+    await pool.load_proxies()
+    client = Client(pool)
+
+    await client.get_all_comments("n1")
+    assert len(set(seen)) == 1
+
+    seen.clear()
+    for _ in range(40):
+        await client._send_request("GET", "https://example.com/feed")
+    assert len(set(seen)) > 1
+
+
+@pytest.mark.asyncio
+async def test_client_only_consults_pool_when_its_proxy_needs_refresh(monkeypatch):
+    from proxy.proxy_mixin import ProxyRefreshMixin
+
+    class Client(ProxyRefreshMixin):
+        def __init__(self, pool):
+            self.proxy = None
+            self.init_proxy_pool(pool)
+
+    pool = make_pool(FakeProvider(), count=2)
+    await pool.load_proxies()
+    client = Client(pool)
+    calls = []
+    get_or_refresh_proxy = pool.get_or_refresh_proxy
+
+    async def counting_get_or_refresh_proxy(*args, **kwargs):
+        calls.append(1)
+        return await get_or_refresh_proxy(*args, **kwargs)
+
+    monkeypatch.setattr(pool, "get_or_refresh_proxy", counting_get_or_refresh_proxy)
+
+    await client._refresh_proxy_if_expired()
+    first = client.proxy
+    for _ in range(5):
+        await client._refresh_proxy_if_expired()
+    assert len(calls) == 1
+
+    for _ in range(pool.max_failures):
+        pool.record_result(pool.current_proxy, False)
+    await client._refresh_proxy_if_expired()
+    assert len(calls) == 2
+    assert client.proxy != first
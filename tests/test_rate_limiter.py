@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_rate_limiter.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+"""
+Unit tests for the token-bucket RateLimiter
+"""
+
+import time
+
+import pytest
+
+import config
+from media_platform.kuaishou.client import KuaiShouClient
+from tools.rate_limiter import RateLimiter, TokenBucket, get_crawl_interval
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_RATE_LIMIT", True)
+    monkeypatch.setattr(RateLimiter, "_buckets", {})
+    monkeypatch.setattr(config, "RATE_LIMITS", {"search": (20, 1), "detail": (50, 2), "media": (0, 1)})
+    monkeypatch.setattr(config, "RATE_LIMITS_PER_PLATFORM", {"xhs": {"detail": (5, 1)}})
+    return RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - start < 0.02
+
+    for _ in range(4):
+        await bucket.acquire()
+    # 4 more tokens at 20/s take about 0.2s
+    assert time.monotonic() - start >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_buckets_are_per_platform_and_endpoint(limiter):
+    assert limiter.get_bucket("search", "dy") is limiter.get_bucket("search", "dy")
+    assert limiter.get_bucket("search", "dy") is not limiter.get_bucket("search", "bili")
+    assert limiter.get_bucket("detail", "dy").rate == 50
+    assert limiter.get_bucket("detail", "xhs").rate == 5
+    # Unknown classes fall back to the detail limit, a zero rate means unlimited
+    assert limiter.get_bucket("comments", "dy").rate == 50
+    assert limiter.get_bucket("media", "dy") is None
+
+
+@pytest.mark.asyncio
+async def test_acquire_is_a_no_op_when_disabled(limiter, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_RATE_LIMIT", False)
+    start = time.monotonic()
+    for _ in range(10):
+        await limiter.acquire("search", "dy")
+    assert time.monotonic() - start < 0.05
+    assert limiter._buckets == {}
+
+
+def test_unset_limits_follow_crawler_sleep(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "_buckets", {})
+    monkeypatch.setattr(config, "CRAWLER_MAX_SLEEP_SEC", 4)
+    monkeypatch.setattr(config, "RATE_LIMITS", {"search": None, "detail": None, "media": (4, 4)})
+    monkeypatch.setattr(config, "RATE_LIMITS_PER_PLATFORM", {})
+    bucket = RateLimiter.get_bucket("comments", "dy")
+    assert (bucket.rate, bucket.burst) == (0.25, 1)
+    assert RateLimiter.get_bucket("media", "dy").rate == 4
+
+
+def test_classify_by_url(limiter):
+    assert RateLimiter.classify("https://edith.xiaohongshu.com/api/sns/web/v2/comment/page") == "comments"
+    assert RateLimiter.classify("https://api.bilibili.com/x/v2/reply/wbi/main") == "comments"
+    assert RateLimiter.classify("https://www.douyin.com/aweme/v1/web/general/search/single/") == "search"
+    assert RateLimiter.classify("https://www.zhihu.com/question/1/answer/2") == "detail"
+
+
+def test_kuaishou_search_is_told_apart_by_graphql_operation():
+    client = KuaiShouClient.__new__(KuaiShouClient)
+    url = "https://www.kuaishou.com/graphql"
+    assert client._rate_limit_endpoint(url, data='{"operationName":"visionSearchPhoto","variables":{}}') == "search"
+    assert client._rate_limit_endpoint(url, data='{"operationName":"visionVideoDetail","variables":{}}') == "detail"
+
+
+def test_crawl_interval_only_without_rate_limit(monkeypatch):
+    monkeypatch.setattr(config, "CRAWLER_MAX_SLEEP_SEC", 2)
+    monkeypatch.setattr(config, "ENABLE_RATE_LIMIT", True)
+    assert get_crawl_interval() == 0
+    monkeypatch.setattr(config, "ENABLE_RATE_LIMIT", False)
+    assert get_crawl_interval() == 2
+
+
+@pytest.mark.asyncio
+async def test_bucket_takes_weighted_acquisitions():
+    bucket = TokenBucket(rate=1000, burst=100)
+    started = time.monotonic()
+    await bucket.acquire(100)  # full burst at once
+    await bucket.acquire(400)  # larger than the burst: waits for a full bucket, leaves 300 in debt
+    await bucket.acquire(10)  # pays back the debt first
+    assert 0.4 <= time.monotonic() - started < 0.6
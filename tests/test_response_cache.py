@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_response_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+"""
+Unit tests for the on-disk HttpResponseCache and its hook in ProxyRefreshMixin
+"""
+
+import base64
+import os
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import config
+from proxy.proxy_mixin import ProxyRefreshMixin
+from tools.response_cache import HttpResponseCache, invalidate_cached_response
+
+RULES = {r"example\.com/detail/": 3600, r"example\.com/profile/": 1}
+DETAIL_URL = "https://example.com/detail/1"
+
+
+@pytest_asyncio.fixture
+async def cache(tmp_path):
+    cache = HttpResponseCache(str(tmp_path / "cache" / "responses.db"), RULES, 1024 * 1024, ["xsec_token"])
+    yield cache
+    await cache.close()
+
+
+def _response(body: str = "<html>detail</html>", status: int = 200) -> httpx.Response:
+    return httpx.Response(status, text=body, headers={"content-type": "text/html; charset=utf-8"})
+
+
+def test_key_ignores_param_order_and_signing_params(cache):
+    key = cache.make_key("GET", "https://example.com/detail/1?b=2&a=1&xsec_token=x")
+    assert key == cache.make_key("get", "https://EXAMPLE.com/detail/1?a=1", {"b": 2, "xsec_token": "y"})
+    assert key != cache.make_key("GET", "https://example.com/detail/1?a=1&b=3")
+    assert key != cache.make_key("POST", "https://example.com/detail/1?a=1&b=2")
+
+
+def test_only_get_requests_matching_a_rule_are_cacheable(cache):
+    assert cache.ttl_for("GET", DETAIL_URL) == 3600
+    assert cache.ttl_for("POST", DETAIL_URL) is None
+    assert cache.ttl_for("GET", "https://example.com/search?q=1") is None
+
+
+@pytest.mark.asyncio
+async def test_set_then_get_round_trips_the_response(cache):
+    assert await cache.get("GET", DETAIL_URL) is None
+    assert await cache.set("GET", DETAIL_URL, None, _response())
+
+    cached = await cache.get("GET", DETAIL_URL)
+    assert cached.status_code == 200
+    assert cached.text == "<html>detail</html>"
+    assert cached.headers["content-type"].startswith("text/html")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_failed_and_unmatched_responses_are_not_stored(cache):
+    assert not await cache.set("GET", DETAIL_URL, None, _response(status=403))
+    assert not await cache.set("GET", "https://example.com/search", None, _response())
+    assert await cache.get("GET", DETAIL_URL) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_misses(cache, monkeypatch):
+    url = "https://example.com/profile/1"
+    await cache.set("GET", url, None, _response())
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 2)
+    assert await cache.get("GET", url) is None
+
+
+@pytest.mark.asyncio
+async def test_entries_survive_reopening_the_database(cache):
+    await cache.set("GET", DETAIL_URL, None, _response())
+    await cache.close()
+
+    reopened = HttpResponseCache(cache.db_path, RULES, 1024 * 1024)
+    try:
+        assert (await reopened.get("GET", DETAIL_URL)).text == "<html>detail</html>"
+    finally:
+        await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_size_cap_evicts_least_recently_read(tmp_path):
+    cache = HttpResponseCache(str(tmp_path / "responses.db"), RULES, 2500)
+    try:
+        # Random bodies so zlib cannot shrink them below ~900 bytes each
+        bodies = {i: base64.b64encode(os.urandom(900)).decode() for i in range(3)}
+        await cache.set("GET", "https://example.com/detail/0", None, _response(bodies[0]))
+        await cache.set("GET", "https://example.com/detail/1", None, _response(bodies[1]))
+        # Reading entry 0 makes entry 1 the least recently used
+        assert await cache.get("GET", "https://example.com/detail/0") is not None
+        await cache.set("GET", "https://example.com/detail/2", None, _response(bodies[2]))
+
+        assert await cache.get("GET", "https://example.com/detail/1") is None
+        assert (await cache.get("GET", "https://example.com/detail/0")).text == bodies[0]
+        assert (await cache.get("GET", "https://example.com/detail/2")).text == bodies[2]
+    finally:
+        await cache.close()
+
+
+class FakeClient(ProxyRefreshMixin):
+    def __init__(self):
+        self.proxy = None
+        self.sent = 0
+
+    async def _dispatch_request(self, method, url, follow_redirects, **kwargs):
+        self.sent += 1
+        return _response()
+
+
+@pytest.mark.asyncio
+async def test_send_request_serves_repeats_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_RESPONSE_CACHE", True)
+    monkeypatch.setattr(config, "RESPONSE_CACHE_PATH", str(tmp_path / "responses.db"))
+    monkeypatch.setattr(config, "RESPONSE_CACHE_TTL_RULES", RULES)
+    client = FakeClient()
+    try:
+        for _ in range(3):
+            response = await client._send_request("GET", DETAIL_URL)
+            assert response.text == "<html>detail</html>"
+        await client._send_request("GET", "https://example.com/search")
+        await client._send_request("GET", "https://example.com/search")
+    finally:
+        await HttpResponseCache.close_all()
+
+    assert client.sent == 3
+
+
+@pytest.mark.asyncio
+async def test_pages_without_the_required_marker_are_not_stored(tmp_path):
+    cache = HttpResponseCache(
+        str(tmp_path / "responses.db"), RULES, 1024 * 1024, required_markers={r"example\.com/detail/": "__INITIAL_STATE__"}
+    )
+    try:
+        assert not await cache.set("GET", DETAIL_URL, None, _response("<html>captcha</html>"))
+        assert await cache.set("GET", DETAIL_URL, None, _response("<script>window.__INITIAL_STATE__={}</script>"))
+        assert await cache.set("GET", "https://example.com/profile/1", None, _response("<html>any</html>"))
+    finally:
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_key_separates_requests_with_and_without_cookies(cache):
+    await cache.set("GET", DETAIL_URL, None, _response("logged in"), {"Cookie": "a=1"})
+    assert await cache.get("GET", DETAIL_URL) is None
+    assert (await cache.get("GET", DETAIL_URL, headers={"cookie": "a=2"})).text == "logged in"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_an_unparseable_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_RESPONSE_CACHE", True)
+    monkeypatch.setattr(config, "RESPONSE_CACHE_PATH", str(tmp_path / "responses.db"))
+    monkeypatch.setattr(config, "RESPONSE_CACHE_TTL_RULES", RULES)
+    client = FakeClient()
+    try:
+        await client._send_request("GET", DETAIL_URL)
+        await invalidate_cached_response("GET", DETAIL_URL)
+        await client._send_request("GET", DETAIL_URL)
+    finally:
+        await HttpResponseCache.close_all()
+
+    assert client.sent == 2
@@ -10,6 +10,7 @@ from store.xhs import XhsStoreFactory
 from store.xhs._store_impl import (
     XhsCsvStoreImplement,
     XhsJsonStoreImplement,
+    XhsJsonlStoreImplement,
     XhsDbStoreImplement,
     XhsSqliteStoreImplement,
     XhsMongoStoreImplement,
@@ -32,6 +33,12 @@ class TestXhsStoreFactory:
         store = XhsStoreFactory.create_store()
         assert isinstance(store, XhsJsonStoreImplement)
     
+    @patch('config.SAVE_DATA_OPTION', 'jsonl')
+    def test_create_jsonl_store(self):
+        """Test creating JSON Lines store"""
+        store = XhsStoreFactory.create_store()
+        assert isinstance(store, XhsJsonlStoreImplement)
+    
     @patch('config.SAVE_DATA_OPTION', 'db')
     def test_create_db_store(self):
         """Test creating database store"""
@@ -67,7 +74,7 @@ class TestXhsStoreFactory:
     
     def test_all_stores_registered(self):
         """Test that all store types are registered"""
-        expected_stores = ['csv', 'json', 'db', 'sqlite', 'mongodb', 'excel']
+        expected_stores = ['csv', 'json', 'jsonl', 'db', 'postgres', 'sqlite', 'mongodb', 'excel']
         
         for store_type in expected_stores:
             assert store_type in XhsStoreFactory.STORES
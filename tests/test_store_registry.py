@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_store_registry.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for StoreRegistry and the shared AsyncFileWriter state
+"""
+
+import asyncio
+import csv
+from unittest.mock import patch
+
+import pytest
+
+from store.store_registry import StoreRegistry
+from store.xhs import XhsStoreFactory
+from store.xhs._store_impl import XhsCsvStoreImplement
+from tools.async_file_writer import AsyncFileWriter
+from var import crawler_type_var
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    StoreRegistry._instances.clear()
+    AsyncFileWriter._instances.clear()
+    yield
+    StoreRegistry._instances.clear()
+    AsyncFileWriter._instances.clear()
+
+
+@patch('config.SAVE_DATA_OPTION', 'csv')
+def test_store_is_shared_per_crawler_type():
+    token = crawler_type_var.set("search")
+    try:
+        first = XhsStoreFactory.create_store()
+        assert XhsStoreFactory.create_store() is first
+        assert isinstance(first, XhsCsvStoreImplement)
+
+        crawler_type_var.set("detail")
+        assert XhsStoreFactory.create_store() is not first
+    finally:
+        crawler_type_var.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_writers_of_the_same_file_share_a_lock():
+    # Separate instances (e.g. created by old call sites) must still serialize on the file
+    writers = [AsyncFileWriter(platform="test", crawler_type="search") for _ in range(4)]
+
+    await asyncio.gather(*[
+        writers[i % 4].write_to_csv({"note_id": f"n{i}", "title": "t"}, "contents") for i in range(40)
+    ])
+
+    with open(writers[0]._get_file_path("csv", "contents"), encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["note_id", "title"]
+    assert len(rows) == 41
+
+
+@pytest.mark.asyncio
+async def test_close_all_closes_stores():
+    closed = []
+
+    class ClosableStore(XhsCsvStoreImplement):
+        async def close(self):
+            closed.append(self)
+
+    with patch('config.SAVE_DATA_OPTION', 'csv'):
+        store = StoreRegistry.get_instance("xhs", ClosableStore)
+    await StoreRegistry.close_all()
+
+    assert closed == [store]
+    assert not StoreRegistry._instances
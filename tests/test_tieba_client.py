@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_tieba_client.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the async Tieba HTTP path
+"""
+
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from media_platform.tieba.client import BaiduTieBaClient
+from proxy.types import IpInfoModel
+from tools.http_client_pool import HttpClientPool
+
+
+class FakeIpPool:
+    def __init__(self):
+        self.current_proxy = IpInfoModel(ip="10.0.0.1", port=8000, user="", password="")
+        self.failed: List[str] = []
+
+    async def get_or_refresh_proxy(self) -> IpInfoModel:
+        return self.current_proxy
+
+    def record_result(self, proxy: IpInfoModel, success: bool, latency: Optional[float] = None):
+        if not success:
+            self.failed.append(proxy.ip)
+
+    async def get_proxy(self) -> IpInfoModel:
+        self.current_proxy = IpInfoModel(ip="10.0.0.2", port=8000, user="", password="")
+        return self.current_proxy
+
+
+@pytest.fixture
+def requests_seen(monkeypatch):
+    """Route every pooled client through a mock transport, blocking the first proxy"""
+    seen: List[Optional[str]] = []
+
+    def get_client(platform, proxy=None, follow_redirects=False):
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(proxy)
+            if proxy == "http://10.0.0.1:8000":
+                return httpx.Response(403, text="forbidden")
+            return httpx.Response(200, json={"no": 0, "cookie": request.headers.get("cookie")})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(HttpClientPool, "get_client", staticmethod(get_client))
+    monkeypatch.setattr(HttpClientPool, "retire_clients", staticmethod(lambda platform, proxy: None))
+    monkeypatch.setattr(BaiduTieBaClient.request.retry, "wait", wait_none())
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_request_sends_headers(requests_seen):
+    client = BaiduTieBaClient(headers={"User-Agent": "ua", "Cookie": "BDUSS=1"})
+
+    res = await client.get("/f/search/res", params={"qw": "python"})
+
+    assert res == {"no": 0, "cookie": "BDUSS=1"}
+    assert requests_seen == [None]
+
+
+@pytest.mark.asyncio
+async def test_get_falls_back_to_new_proxy_after_retries(requests_seen):
+    ip_pool = FakeIpPool()
+    client = BaiduTieBaClient(ip_pool=ip_pool, default_ip_proxy="http://10.0.0.1:8000")
+
+    res = await client.get("/p/1")
+
+    assert res["no"] == 0
+    assert ip_pool.failed == ["10.0.0.1"]
+    assert requests_seen == ["http://10.0.0.1:8000"] * 3 + ["http://10.0.0.2:8000"]
+    assert client.default_ip_proxy == "http://10.0.0.2:8000"
+
+
+@pytest.mark.asyncio
+async def test_rotation_mode_only_counts_blocking_statuses_as_proxy_failures(monkeypatch):
+    ip_pool = FakeIpPool()
+
+    @asynccontextmanager
+    async def lease(sticky_key=None):
+        yield ip_pool.current_proxy
+
+    ip_pool.lease = lease
+    statuses = {"/p/404": 404, "/p/302": 302, "/p/429": 429}
+
+    def get_client(platform, proxy=None, follow_redirects=False):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(statuses[request.url.path])
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(HttpClientPool, "get_client", staticmethod(get_client))
+    monkeypatch.setattr("config.IP_PROXY_ROTATION_MODE", "request")
+    client = BaiduTieBaClient(ip_pool=ip_pool)
+
+    for path in statuses:
+        await client._send_request("GET", f"https://tieba.baidu.com{path}")
+
+    assert ip_pool.failed == ["10.0.0.1"]
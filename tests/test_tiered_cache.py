@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_tiered_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for TieredCache, with fakeredis as the Redis tier
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.async_redis_cache import AsyncRedisCache
+from cache.cache_factory import CacheFactory
+from cache.local_cache import ExpiringLocalCache
+from cache.tiered_cache import TieredCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    client = fakeredis.FakeAsyncRedis()
+    yield client
+    await client.flushall()
+    await client.close()
+
+
+def make_cache(redis_client) -> TieredCache:
+    return TieredCache(l1=ExpiringLocalCache(), l2=AsyncRedisCache(redis_client=redis_client), l1_ttl_sec=30)
+
+
+@pytest.mark.asyncio
+async def test_write_through_and_shared_warm_data(redis_client):
+    worker_a, worker_b = make_cache(redis_client), make_cache(redis_client)
+
+    await worker_a.set("wbi_keys", ["img", "sub"], 3600)
+
+    assert worker_a.l1.get("wbi_keys") == ["img", "sub"]
+    assert await worker_b.get("wbi_keys") == ["img", "sub"]  # from redis
+    assert worker_b.l1.get("wbi_keys") == ["img", "sub"]  # now warm locally
+
+
+@pytest.mark.asyncio
+async def test_hot_key_served_from_l1(redis_client):
+    cache = make_cache(redis_client)
+    await cache.set("k", 1, 60)
+    await redis_client.flushall()
+
+    assert await cache.get("k") == 1
+    await cache.delete("k")
+    assert await cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(redis_client):
+    cache = make_cache(redis_client)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"proxies": [1, 2]}
+
+    results = await asyncio.gather(*[cache.get_or_load("proxy_list", loader, 60) for _ in range(20)])
+
+    assert calls == 1
+    assert all(r == {"proxies": [1, 2]} for r in results)
+    assert await cache.l2.get("proxy_list") == {"proxies": [1, 2]}
+
+
+@pytest.mark.asyncio
+async def test_loader_error_reaches_every_waiter(redis_client):
+    cache = make_cache(redis_client)
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    results = await asyncio.gather(*[cache.get_or_load("k", loader, 60) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_cache_factory_creates_tiered_cache(redis_client):
+    cache = CacheFactory.create_cache("tiered", l2=AsyncRedisCache(redis_client=redis_client), l1_ttl_sec=30)
+
+    assert isinstance(cache, TieredCache)
+    assert isinstance(cache, AbstractAsyncCache)
+    await cache.set("k", "v", 60)
+    assert await cache.get("k") == "v"
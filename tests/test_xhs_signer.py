@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_xhs_signer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the batched Xiaohongshu signer
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from media_platform.xhs.playwright_sign import XhsPlaywrightSigner, _build_sign_string, _build_xs_payload
+
+
+class FakePage:
+    """Stands in for a playwright Page running the batch sign script"""
+
+    def __init__(self, b1: str = "b1-value", fail: bool = False):
+        self.b1 = b1
+        self.fail = fail
+        self.batches: List[List] = []
+
+    async def evaluate(self, script: str, items: List):
+        await asyncio.sleep(0.01)  # CDP round trip
+        if self.fail:
+            raise RuntimeError("Target closed")
+        self.batches.append(items)
+        return {"b1": self.b1, "x3": [f"mns-{sign_str}" for sign_str, _ in items]}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_evaluate():
+    page = FakePage()
+    signer = XhsPlaywrightSigner([page])
+
+    results = await asyncio.gather(*[
+        signer.sign(f"/api/sns/web/v1/feed{i}", {"note_id": i}, a1="a1") for i in range(10)
+    ])
+    await signer.close()
+
+    assert sum(len(batch) for batch in page.batches) == 10
+    assert len(page.batches) <= 2
+    sign_str = _build_sign_string("/api/sns/web/v1/feed3", {"note_id": 3}, "POST")
+    assert results[3]["x-s"] == _build_xs_payload(f"mns-{sign_str}", "object")
+    assert signer.b1 == "b1-value"
+
+
+@pytest.mark.asyncio
+async def test_pages_sign_in_parallel():
+    pages = [FakePage(), FakePage()]
+    signer = XhsPlaywrightSigner(pages, max_batch_size=2)
+
+    await asyncio.gather(*[signer.sign(f"/api/{i}", {"i": i}) for i in range(8)])
+    await signer.close()
+
+    assert all(page.batches for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_b1_is_refreshed_and_kept_on_failure():
+    page = FakePage()
+    signer = XhsPlaywrightSigner([page])
+    await signer.sign("/api/a", {})
+
+    page.b1 = "b1-rotated"
+    await signer.sign("/api/b", {})
+    assert signer.b1 == "b1-rotated"
+
+    page.fail = True
+    signs = await signer.sign("/api/c", {})
+    await signer.close()
+
+    assert signer.b1 == "b1-rotated"
+    assert signs["x-s"] == _build_xs_payload("", "object")
+
+
+@pytest.mark.asyncio
+async def test_client_close_stops_signer_and_closes_sign_pages():
+    from media_platform.xhs.client import XiaoHongShuClient
+
+    class ClosablePage(FakePage):
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    main_page, sign_page = ClosablePage(), ClosablePage()
+    client = XiaoHongShuClient(headers={}, playwright_page=main_page, cookie_dict={}, sign_pages=[sign_page])
+    await client._signer.sign("/api/1", {"i": 1})
+    workers = list(client._signer._workers)
+
+    await client.close()
+
+    assert all(task.done() for task in workers)
+    assert sign_page.closed and not main_page.closed
@@ -17,42 +17,141 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
-import csv
 import json
 import os
 import pathlib
-from typing import Dict, List
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set, Tuple
 import aiofiles
 import config
+from tools.csv_sink import CsvSink, get_csv_fieldnames
 from tools.utils import utils
 from tools.words import AsyncWordCloudGenerator
 
 class AsyncFileWriter:
+    # JSONL files written during this process, converted to JSON arrays at shutdown
+    _jsonl_files: Set[str] = set()
+    # Deferred items per (writer, file_type, item_type) while inside batch_write()
+    _batch_items: ContextVar[Optional[Dict[Tuple["AsyncFileWriter", str, str], List[Dict]]]] = ContextVar(
+        "file_writer_batch_items", default=None
+    )
+    # One lock per file shared by every writer, so writers of the same file never interleave
+    _file_locks: Dict[str, asyncio.Lock] = {}
+    # Class-level instance management, one writer per platform and crawler type
+    _instances: Dict[str, "AsyncFileWriter"] = {}
+    # Loading stop words and registering jieba words is done once per process
+    _wordcloud_generator: Optional[AsyncWordCloudGenerator] = None
+
+    @classmethod
+    def get_instance(cls, platform: str, crawler_type: str) -> "AsyncFileWriter":
+        """
+        Get or create the writer for the given platform and crawler type
+
+        Args:
+            platform: Platform name (xhs, douyin, bili, etc.)
+            crawler_type: Type of crawler (search, detail, creator)
+
+        Returns:
+            AsyncFileWriter instance
+        """
+        key = f"{platform}_{crawler_type}"
+        if key not in cls._instances:
+            cls._instances[key] = cls(platform, crawler_type)
+        return cls._instances[key]
+
     def __init__(self, platform: str, crawler_type: str):
-        self.lock = asyncio.Lock()
         self.platform = platform
         self.crawler_type = crawler_type
-        self.wordcloud_generator = AsyncWordCloudGenerator() if config.ENABLE_GET_WORDCLOUD else None
+        # (file_type, item_type, date) -> file path, so the data directory is created once
+        self._file_paths: Dict[Tuple[str, str, str], str] = {}
+
+    @property
+    def wordcloud_generator(self) -> Optional[AsyncWordCloudGenerator]:
+        if not config.ENABLE_GET_WORDCLOUD:
+            return None
+        if AsyncFileWriter._wordcloud_generator is None:
+            AsyncFileWriter._wordcloud_generator = AsyncWordCloudGenerator()
+        return AsyncFileWriter._wordcloud_generator
+
+    @classmethod
+    def _get_file_lock(cls, file_path: str) -> asyncio.Lock:
+        key = os.path.abspath(file_path)
+        lock = cls._file_locks.get(key)
+        if lock is None:
+            lock = cls._file_locks[key] = asyncio.Lock()
+        return lock
 
     def _get_file_path(self, file_type: str, item_type: str) -> str:
-        base_path = f"data/{self.platform}/{file_type}"
-        pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
-        file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{file_type}"
-        return f"{base_path}/{file_name}"
+        key = (file_type, item_type, utils.get_current_date())
+        file_path = self._file_paths.get(key)
+        if file_path is None:
+            base_path = f"data/{self.platform}/{file_type}"
+            pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
+            file_name = f"{self.crawler_type}_{item_type}_{key[2]}.{file_type}"
+            file_path = self._file_paths[key] = f"{base_path}/{file_name}"
+        return file_path
 
     async def write_to_csv(self, item: Dict, item_type: str):
-        file_path = self._get_file_path('csv', item_type)
-        async with self.lock:
-            file_exists = os.path.exists(file_path)
-            async with aiofiles.open(file_path, 'a', newline='', encoding='utf-8-sig') as f:
-                writer = csv.DictWriter(f, fieldnames=item.keys())
-                if not file_exists or await f.tell() == 0:
-                    await writer.writeheader()
-                await writer.writerow(item)
+        if self._defer_to_batch('csv', item_type, item):
+            return
+        await self._write_items_to_csv([item], item_type)
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
+        if self._defer_to_batch('json', item_type, item):
+            return
+        await self._write_items_to_json([item], item_type)
+
+    async def write_single_item_to_jsonl(self, item: Dict, item_type: str):
+        """
+        Append one item as a single line to the day's JSON Lines file.
+        Unlike write_single_item_to_json, the existing file is never read back,
+        so each write costs O(1) regardless of how many items are already stored.
+        """
+        if self._defer_to_batch('jsonl', item_type, item):
+            return
+        await self._write_items_to_jsonl([item], item_type)
+
+    @classmethod
+    @asynccontextmanager
+    async def batch_write(cls):
+        """
+        Defer every write made inside the block and write each file once on exit,
+        so a batch of N items costs one open (and for json one read/rewrite) instead of N.
+        If the block raises, the deferred items are discarded and nothing is written.
+        """
+        if cls._batch_items.get() is not None:
+            yield
+            return
+        pending: Dict[Tuple["AsyncFileWriter", str, str], List[Dict]] = {}
+        token = cls._batch_items.set(pending)
+        try:
+            yield
+        finally:
+            cls._batch_items.reset(token)
+        for (writer, file_type, item_type), items in pending.items():
+            if file_type == 'csv':
+                await writer._write_items_to_csv(items, item_type)
+            elif file_type == 'json':
+                await writer._write_items_to_json(items, item_type)
+            else:
+                await writer._write_items_to_jsonl(items, item_type)
+
+    def _defer_to_batch(self, file_type: str, item_type: str, item: Dict) -> bool:
+        pending = self._batch_items.get()
+        if pending is None:
+            return False
+        pending.setdefault((self, file_type, item_type), []).append(item)
+        return True
+
+    async def _write_items_to_csv(self, items: List[Dict], item_type: str):
+        file_path = self._get_file_path('csv', item_type)
+        sink = CsvSink.get_instance(file_path, get_csv_fieldnames(self.platform, item_type))
+        await sink.write_rows(items)
+
+    async def _write_items_to_json(self, items: List[Dict], item_type: str):
         file_path = self._get_file_path('json', item_type)
-        async with self.lock:
+        async with self._get_file_lock(file_path):
             existing_data = []
             if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
                 async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
@@ -65,11 +164,94 @@ class AsyncFileWriter:
                     except json.JSONDecodeError:
                         existing_data = []
 
-            existing_data.append(item)
+            existing_data.extend(items)
 
             async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
                 await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
 
+    async def _write_items_to_jsonl(self, items: List[Dict], item_type: str):
+        file_path = self._get_file_path('jsonl', item_type)
+        lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        async with self._get_file_lock(file_path):
+            async with aiofiles.open(file_path, 'a', encoding='utf-8') as f:
+                await f.write(lines)
+        AsyncFileWriter._jsonl_files.add(file_path)
+
+    @staticmethod
+    def load_jsonl(file_path: str) -> List[Dict]:
+        """
+        Read a JSON Lines file, skipping blank or truncated lines
+        (e.g. a partial last line left behind by a killed process)
+        """
+        items = []
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except json.JSONDecodeError:
+                    utils.logger.warning(f"[AsyncFileWriter.load_jsonl] Skip malformed line in {file_path}")
+        return items
+
+    @staticmethod
+    def convert_jsonl_file_to_json(jsonl_path: str) -> str:
+        """
+        Convert one data/{platform}/jsonl/xxx.jsonl file into the JSON array file
+        data/{platform}/json/xxx.json that the json save option writes. Items already in an
+        existing xxx.json (a json save option run of the same day or an earlier conversion)
+        are kept and JSONL items identical to one of them are not added again, so repeated
+        conversions do not duplicate items
+        :param jsonl_path: path of the JSONL file
+        :return: path of the written JSON file
+        """
+        jsonl_file = pathlib.Path(jsonl_path)
+        json_dir = jsonl_file.parent.parent / "json"
+        json_dir.mkdir(parents=True, exist_ok=True)
+        json_file = json_dir / f"{jsonl_file.stem}.json"
+        items = []
+        if json_file.exists() and json_file.stat().st_size > 0:
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    items = json.load(f)
+                if not isinstance(items, list):
+                    items = [items]
+            except json.JSONDecodeError:
+                utils.logger.warning(f"[AsyncFileWriter.convert_jsonl_file_to_json] Replace malformed {json_file}")
+                items = []
+        seen = {json.dumps(item, ensure_ascii=False, sort_keys=True) for item in items}
+        for item in AsyncFileWriter.load_jsonl(str(jsonl_file)):
+            key = json.dumps(item, ensure_ascii=False, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                items.append(item)
+        tmp_file = json_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_file, json_file)
+        return str(json_file)
+
+    @classmethod
+    def convert_jsonl_to_json(cls) -> List[str]:
+        """
+        Convert every JSONL file written by this process into a JSON array file,
+        for consumers that still expect the json save option layout
+        :return: paths of the written JSON files
+        """
+        converted = []
+        for jsonl_path in sorted(cls._jsonl_files):
+            if not os.path.exists(jsonl_path):
+                continue
+            try:
+                json_path = cls.convert_jsonl_file_to_json(jsonl_path)
+                converted.append(json_path)
+                utils.logger.info(f"[AsyncFileWriter.convert_jsonl_to_json] Converted {jsonl_path} -> {json_path}")
+            except Exception as e:
+                utils.logger.error(f"[AsyncFileWriter.convert_jsonl_to_json] Error converting {jsonl_path}: {e}")
+        cls._jsonl_files.clear()
+        return converted
+
     async def generate_wordcloud_from_comments(self):
         """
         Generate wordcloud from comments data
@@ -82,21 +264,25 @@ class AsyncFileWriter:
             return
 
         try:
-            # Read comments from JSON file
-            comments_file_path = self._get_file_path('json', 'comments')
+            # Read comments from JSON (or JSON Lines) file
+            file_type = 'jsonl' if config.SAVE_DATA_OPTION == 'jsonl' else 'json'
+            comments_file_path = self._get_file_path(file_type, 'comments')
             if not os.path.exists(comments_file_path) or os.path.getsize(comments_file_path) == 0:
                 utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No comments file found at {comments_file_path}")
                 return
 
-            async with aiofiles.open(comments_file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                if not content:
-                    utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Comments file is empty")
-                    return
+            if file_type == 'jsonl':
+                comments_data = self.load_jsonl(comments_file_path)
+            else:
+                async with aiofiles.open(comments_file_path, 'r', encoding='utf-8') as f:
+                    content = await f.read()
+                    if not content:
+                        utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Comments file is empty")
+                        return
 
-                comments_data = json.loads(content)
-                if not isinstance(comments_data, list):
-                    comments_data = [comments_data]
+                    comments_data = json.loads(content)
+                    if not isinstance(comments_data, list):
+                        comments_data = [comments_data]
 
             # Filter comments data to only include 'content' field
             # Handle different comment data structures across platforms
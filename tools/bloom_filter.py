@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/bloom_filter.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+In-memory Bloom filters for fast "probably seen" checks in front of an exact store
+"""
+
+import hashlib
+import math
+from typing import List
+
+
+class BloomFilter:
+    """
+    Fixed capacity Bloom filter over strings, using double hashing of one blake2b digest
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1)")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> bool:
+        """
+        Add an item
+        Returns:
+            True if the item was not (probably) present before
+        """
+        added = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows without a capacity known up front: when the current slice is
+    full a new one with GROWTH_FACTOR times the capacity and a tighter error rate is added,
+    keeping the overall false positive rate below error_rate
+    """
+
+    GROWTH_FACTOR = 2
+    # Error rate ratio between consecutive slices
+    TIGHTENING_RATIO = 0.5
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 0.001):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self._filters: List[BloomFilter] = []
+
+    def add(self, item: str) -> bool:
+        """
+        Add an item
+        Returns:
+            True if the item was not (probably) present before
+        """
+        if item in self:
+            return False
+        if not self._filters or len(self._filters[-1]) >= self._filters[-1].capacity:
+            index = len(self._filters)
+            self._filters.append(BloomFilter(
+                self.initial_capacity * self.GROWTH_FACTOR ** index,
+                self.error_rate * (1 - self.TIGHTENING_RATIO) * self.TIGHTENING_RATIO ** index,
+            ))
+        return self._filters[-1].add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in reversed(self._filters))
+
+    def __len__(self) -> int:
+        return sum(len(f) for f in self._filters)
+
+    @property
+    def capacity(self) -> int:
+        return sum(f.capacity for f in self._filters)
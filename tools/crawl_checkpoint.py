@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/crawl_checkpoint.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Durable crawl progress (search pages, days, creator cursors and finished notes), so an
+interrupted run can continue where it stopped with --resume
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import config
+from tools import utils
+
+
+class CrawlCheckpoint:
+    """
+    Progress of one (platform, crawler type) run, saved as a small JSON file.
+
+    Progress is tracked per scope, e.g. "keyword:<kw>", "keyword:<kw>:day:<date>" or
+    "creator:<id>": each scope has a cursor dict (page, search_id, cursor, ...) and a done
+    flag. Notes whose detail and comments are complete are kept so a resumed run skips them,
+    and failed attempts are counted per note so a note that keeps failing is given up on.
+    The file is rewritten atomically at most every CHECKPOINT_SAVE_INTERVAL_SEC seconds
+    and once more at shutdown, and only when checkpointing is enabled.
+    """
+
+    # Class-level instance management
+    _instances: Dict[Tuple[str, str], "CrawlCheckpoint"] = {}
+
+    def __init__(self, file_path: str, resume: bool = False, save_interval_sec: float = 10, enabled: bool = True,
+                 max_note_attempts: int = 3):
+        self.file_path = file_path
+        self.resume = resume
+        self.enabled = enabled or resume
+        self.save_interval_sec = save_interval_sec
+        self.max_note_attempts = max_note_attempts
+        self._scopes: Dict[str, Dict[str, Any]] = {}
+        self._completed: set = set()
+        self._attempts: Dict[str, int] = {}
+        self._dirty = False
+        self._last_save = float("-inf")
+        if resume:
+            self._load()
+
+    @classmethod
+    def get_instance(cls, platform: str, crawler_type: str) -> "CrawlCheckpoint":
+        """
+        Get the checkpoint of a run, loaded from disk when config.RESUME_CRAWL is set and
+        written only when config.ENABLE_CRAWL_CHECKPOINT or config.RESUME_CRAWL is set
+        Args:
+            platform: Platform name, e.g. xhs
+            crawler_type: search | detail | creator
+
+        Returns:
+            CrawlCheckpoint instance
+        """
+        key = (platform, crawler_type)
+        if key not in cls._instances:
+            file_path = os.path.join(config.CHECKPOINT_DIR, f"{platform}_{crawler_type}.json")
+            cls._instances[key] = cls(
+                file_path, config.RESUME_CRAWL, config.CHECKPOINT_SAVE_INTERVAL_SEC, config.ENABLE_CRAWL_CHECKPOINT,
+                config.CHECKPOINT_MAX_NOTE_ATTEMPTS,
+            )
+        return cls._instances[key]
+
+    @classmethod
+    def close_all(cls):
+        """
+        Save every checkpoint, should be called at shutdown
+        """
+        for checkpoint in cls._instances.values():
+            checkpoint.save()
+        cls._instances.clear()
+
+    def get_cursor(self, scope: str) -> Dict[str, Any]:
+        """
+        Last saved position of a scope
+        Returns:
+            The cursor dict, empty if the scope never made progress
+        """
+        return dict(self._scopes.get(scope, {}).get("cursor", {}))
+
+    def set_cursor(self, scope: str, **cursor):
+        """
+        Record the position to continue a scope from, e.g. the next page to fetch
+        """
+        self._scopes.setdefault(scope, {})["cursor"] = cursor
+        self._changed()
+
+    def is_done(self, scope: str) -> bool:
+        return self._scopes.get(scope, {}).get("done", False)
+
+    def mark_done(self, scope: str):
+        self._scopes.setdefault(scope, {})["done"] = True
+        self._changed()
+
+    def is_completed(self, note_id: Any) -> bool:
+        """
+        Whether a resumed run already crawled the note's detail and comments. Always False
+        for a fresh run, so a note returned by several keywords is stored once per keyword
+        """
+        return self.resume and str(note_id) in self._completed
+
+    def add_completed(self, note_ids: Iterable[Any]):
+        self._completed.update(str(note_id) for note_id in note_ids if note_id not in (None, ""))
+        self._changed()
+
+    def add_failed_attempt(self, note_id: Any) -> bool:
+        """
+        Count a failed attempt at a note, across resumed runs
+        Returns:
+            True if the note should be tried again, False once it used up max_note_attempts.
+            A note given up on is recorded as completed so resumed runs skip it.
+        """
+        note_id = str(note_id)
+        attempts = self._attempts.get(note_id, 0) + 1
+        if attempts < self.max_note_attempts:
+            self._attempts[note_id] = attempts
+            self._changed()
+            return True
+        self._attempts.pop(note_id, None)
+        utils.logger.warning(f"[CrawlCheckpoint.add_failed_attempt] Giving up on note {note_id} after {attempts} attempts")
+        self.add_completed([note_id])
+        return False
+
+    def save(self, force: bool = True):
+        """
+        Write the checkpoint file through a temporary file, so a crash never leaves it half written
+        Args:
+            force: Write even if CHECKPOINT_SAVE_INTERVAL_SEC has not passed since the last save
+        """
+        if not self.enabled or not self._dirty or (not force and time.monotonic() - self._last_save < self.save_interval_sec):
+            return
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"scopes": self._scopes, "completed": sorted(self._completed), "attempts": self._attempts},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.file_path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _changed(self):
+        self._dirty = True
+        self.save(force=False)
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            utils.logger.info(f"[CrawlCheckpoint._load] No checkpoint at {self.file_path}, starting from scratch")
+            return
+        try:
+            with open(self.file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            utils.logger.error(f"[CrawlCheckpoint._load] Can not read checkpoint {self.file_path}: {e}")
+            return
+        self._scopes = data.get("scopes", {})
+        self._completed = set(data.get("completed", []))
+        self._attempts = data.get("attempts", {})
+        utils.logger.info(
+            f"[CrawlCheckpoint._load] Resuming from {self.file_path}: {len(self._scopes)} scopes, "
+            f"{len(self._completed)} completed notes"
+        )
+
+
+class SearchProgress:
+    """
+    Checkpoint bookkeeping of one keyword searched through a CrawlPipeline, where notes of
+    several pages are in flight at once. The saved page is the lowest page that still has
+    unfinished or failed notes, so a resumed run fetches it again and skips its completed notes.
+    Notes without an ID, or that failed CHECKPOINT_MAX_NOTE_ATTEMPTS times, do not hold their
+    page back, so a note dropped for good (e.g. deleted) can not pin the keyword forever.
+    """
+
+    def __init__(self, checkpoint: CrawlCheckpoint, scope: str):
+        self.checkpoint = checkpoint
+        self.scope = scope
+        self._pending: Dict[int, int] = {}
+        self._failed: set = set()
+        self._page_cursors: Dict[int, Dict[str, Any]] = {}
+        self._next_page: Optional[int] = None
+        self._cursor: Dict[str, Any] = {}
+        self._source_finished = False
+
+    def page_fetched(self, page: int, item_count: int, **cursor):
+        """
+        A page was fetched and item_count of its notes entered the pipeline
+        Args:
+            page: The fetched page
+            item_count: Notes of the page handed to the pipeline
+            **cursor: Extra state needed to fetch the page again, e.g. search_id
+        """
+        self._next_page = page + 1
+        self._cursor = cursor
+        self._page_cursors[page] = cursor
+        if item_count:
+            self._pending[page] = self._pending.get(page, 0) + item_count
+        self._save()
+
+    def item_finished(self, page: int, note_id: Any, completed: bool = True):
+        """
+        A note of the page left the pipeline
+        Args:
+            page: The page the note came from
+            note_id: The note ID
+            completed: True if it passed every stage, False if it was dropped or failed
+        """
+        if completed:
+            self.checkpoint.add_completed([note_id])
+        elif note_id not in (None, "") and self.checkpoint.add_failed_attempt(note_id):
+            self._failed.add(page)
+        self._pending[page] -= 1
+        if not self._pending[page]:
+            del self._pending[page]
+        self._save()
+
+    def source_finished(self, finished: bool = True):
+        """
+        No more pages will be fetched for the keyword
+        Args:
+            finished: False when the search stopped on an error and should be resumed later
+        """
+        self._source_finished = finished
+        self._save()
+
+    def _save(self):
+        unfinished = self._failed.union(self._pending)
+        if self._source_finished and not unfinished:
+            self.checkpoint.mark_done(self.scope)
+            return
+        if self._next_page is None:
+            return
+        if unfinished:
+            page = min(unfinished)
+            self.checkpoint.set_cursor(self.scope, page=page, **self._page_cursors[page])
+        else:
+            self.checkpoint.set_cursor(self.scope, page=self._next_page, **self._cursor)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/crawl_frontier.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Persistent crawl frontier: remembers which notes / videos and comments were already
+crawled, so incremental runs can skip detail and comment fetches for fresh items
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+import aiosqlite
+
+import config
+from tools import utils
+from tools.bloom_filter import ScalableBloomFilter
+
+
+class CrawlFrontier:
+    """
+    Seen-set of one platform. A ScalableBloomFilter answers "never seen" without touching
+    the disk; its positives are confirmed against the exact SQLite table, which also holds
+    when each item was last crawled so only items inside the freshness window are skipped.
+
+    Items are grouped by kind, e.g. "note" for notes / awemes / videos and "comment".
+    A note whose comments were crawled too is also recorded as "note_comments", so a run
+    with ENABLE_GET_COMMENTS on does not skip notes an earlier run crawled without them.
+    """
+
+    # Class-level instance management, one frontier per platform
+    _instances: Dict[str, "CrawlFrontier"] = {}
+
+    # SQLite limits the number of bound parameters per statement
+    QUERY_CHUNK_SIZE = 500
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS seen_items (
+            platform TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            seen_at REAL NOT NULL,
+            PRIMARY KEY (platform, kind, item_id)
+        )
+    """
+
+    def __init__(self, platform: str, db_path: str, freshness_sec: float,
+                 bloom_capacity: int = 100000, bloom_error_rate: float = 0.001):
+        self.platform = platform
+        self.db_path = db_path
+        self.freshness_sec = freshness_sec
+        self._bloom = ScalableBloomFilter(bloom_capacity, bloom_error_rate)
+        self._db: Optional[aiosqlite.Connection] = None
+        self._open_lock = asyncio.Lock()
+        self.skipped = 0
+
+    @classmethod
+    def get_instance(cls, platform: str) -> "CrawlFrontier":
+        """
+        Get the frontier of a platform configured in base_config, created on first use
+        Args:
+            platform: Platform name, e.g. xhs, dy, bili
+
+        Returns:
+            CrawlFrontier instance
+        """
+        if platform not in cls._instances:
+            cls._instances[platform] = cls(
+                platform,
+                os.path.abspath(config.CRAWL_FRONTIER_PATH),
+                config.CRAWL_FRONTIER_FRESHNESS_HOURS * 3600,
+                config.CRAWL_FRONTIER_BLOOM_CAPACITY,
+                config.CRAWL_FRONTIER_BLOOM_ERROR_RATE,
+            )
+        return cls._instances[platform]
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Close every frontier database, should be called at shutdown
+        """
+        for frontier in list(cls._instances.values()):
+            await frontier.close()
+        cls._instances.clear()
+
+    async def filter_unseen(self, kind: str, items: Sequence[Any],
+                            key: Callable[[Any], Any] = lambda item: item) -> List[Any]:
+        """
+        Drop the items crawled within the freshness window
+        Args:
+            kind: Item kind, e.g. "note" or "comment"
+            items: Item IDs or item dicts
+            key: Returns the ID of an item, identity by default
+
+        Returns:
+            The items to crawl, in their original order
+        """
+        if not items:
+            return []
+        ids = [str(key(item)) for item in items]
+        fresh = await self._fresh_ids(kind, ids)
+        if fresh:
+            self.skipped += len(fresh)
+            utils.logger.info(
+                f"[CrawlFrontier.filter_unseen] {self.platform}: skip {len(fresh)} {kind}(s) crawled in the last "
+                f"{self.freshness_sec / 3600:g} hours"
+            )
+        return [item for item, item_id in zip(items, ids) if item_id not in fresh]
+
+    async def is_fresh(self, kind: str, item_id: Any) -> bool:
+        """
+        Whether the item was crawled within the freshness window
+        """
+        return bool(await self._fresh_ids(kind, [str(item_id)]))
+
+    async def mark_seen(self, kind: str, item_ids: Iterable[Any]):
+        """
+        Record items as crawled now
+        Args:
+            kind: Item kind, e.g. "note" or "comment"
+            item_ids: IDs of the crawled items
+        """
+        ids = [str(item_id) for item_id in item_ids if item_id not in (None, "")]
+        if not ids:
+            return
+        db = await self._get_db()
+        now = time.time()
+        await db.executemany(
+            "INSERT OR REPLACE INTO seen_items (platform, kind, item_id, seen_at) VALUES (?, ?, ?, ?)",
+            [(self.platform, kind, item_id, now) for item_id in ids],
+        )
+        await db.commit()
+        for item_id in ids:
+            self._bloom.add(f"{kind}:{item_id}")
+
+    @staticmethod
+    def note_kind() -> str:
+        """
+        Kind to filter notes on: "note_comments" when comments are crawled, else "note"
+        """
+        return "note_comments" if config.ENABLE_GET_COMMENTS else "note"
+
+    async def mark_notes_seen(self, note_ids: Iterable[Any]):
+        """
+        Record notes as crawled now, together with their comments when those are crawled
+        Args:
+            note_ids: IDs of the crawled notes / awemes / videos
+        """
+        note_ids = list(note_ids)
+        await self.mark_seen("note", note_ids)
+        if self.note_kind() != "note":
+            await self.mark_seen(self.note_kind(), note_ids)
+
+    def comment_callback(self, callback: Callable[[str, List[Dict]], Awaitable[Any]],
+                         id_field: str) -> Callable[[str, List[Dict]], Awaitable[Any]]:
+        """
+        Wrap a store's batch comment callback so comments stored within the freshness
+        window are not stored again, and the stored ones are recorded
+        Args:
+            callback: e.g. xhs_store.batch_update_xhs_note_comments
+            id_field: Comment ID field of the platform, e.g. "id", "cid" or "rpid"
+
+        Returns:
+            The wrapped callback with the same (content_id, comments) signature
+        """
+
+        async def wrapper(content_id: str, comments: List[Dict]):
+            comments = await self.filter_unseen("comment", comments or [], key=lambda c: c.get(id_field))
+            if not comments:
+                return
+            await callback(content_id, comments)
+            await self.mark_seen("comment", [c.get(id_field) for c in comments])
+
+        return wrapper
+
+    async def close(self):
+        """
+        Close the database connection
+        """
+        if self._db is not None:
+            if self.skipped:
+                utils.logger.info(f"[CrawlFrontier.close] {self.platform}: skipped {self.skipped} already crawled items")
+            await self._db.close()
+            self._db = None
+
+    async def _fresh_ids(self, kind: str, ids: List[str]) -> set:
+        db = await self._get_db()
+        # Bloom filter negatives are exact, only its positives need the table
+        candidates = [item_id for item_id in ids if f"{kind}:{item_id}" in self._bloom]
+        if not candidates:
+            return set()
+        threshold = time.time() - self.freshness_sec
+        fresh = set()
+        for start in range(0, len(candidates), self.QUERY_CHUNK_SIZE):
+            chunk = candidates[start:start + self.QUERY_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            async with db.execute(
+                f"SELECT item_id FROM seen_items WHERE platform = ? AND kind = ? AND seen_at >= ? "
+                f"AND item_id IN ({placeholders})",
+                (self.platform, kind, threshold, *chunk),
+            ) as cursor:
+                fresh.update(row[0] for row in await cursor.fetchall())
+        return fresh
+
+    async def _get_db(self) -> aiosqlite.Connection:
+        if self._db is not None:
+            return self._db
+        async with self._open_lock:
+            if self._db is None:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(self._SCHEMA)
+                await db.commit()
+                loaded = 0
+                async with db.execute(
+                    "SELECT kind, item_id FROM seen_items WHERE platform = ?", (self.platform,)
+                ) as cursor:
+                    async for kind, item_id in cursor:
+                        self._bloom.add(f"{kind}:{item_id}")
+                        loaded += 1
+                utils.logger.info(f"[CrawlFrontier._get_db] {self.platform}: loaded {loaded} seen items")
+                self._db = db
+        return self._db
+
+
+def get_crawl_frontier(platform: str) -> Optional[CrawlFrontier]:
+    """
+    The crawl frontier of a platform
+    Args:
+        platform: Platform name, e.g. xhs, dy, bili
+
+    Returns:
+        CrawlFrontier if ENABLE_CRAWL_FRONTIER is on, else None
+    """
+    if not config.ENABLE_CRAWL_FRONTIER:
+        return None
+    return CrawlFrontier.get_instance(platform)
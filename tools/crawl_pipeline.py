@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/crawl_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Staged producer/consumer crawl pipeline: search pages, details, storage, media and
+comments run concurrently, connected by bounded queues
+"""
+
+import asyncio
+import contextvars
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import config
+from tools import utils
+
+# Put into a stage's queue once per worker after the last item
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    One step of a CrawlPipeline
+    Args:
+        name: Stage name used in logs and stats
+        handler: Coroutine function taking an item and returning the item for the next stage,
+                 or None to drop it
+        concurrency: Number of workers running the handler
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]], concurrency: int = 1):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+
+
+class CrawlPipeline:
+    """
+    Runs items from an async source through a chain of stages. Stages are connected by
+    bounded queues, so a slow stage applies back-pressure upstream instead of buffering
+    everything, and each stage works on the next items while the following stages are
+    still busy: throughput is set by the slowest stage instead of the sum of all stages.
+
+    Every item runs in a copy of the context it was produced in, so context variables such
+    as source_keyword_var set by the source stay correct in every stage.
+    """
+
+    def __init__(self, name: str, queue_size: Optional[int] = None):
+        self.name = name
+        self.queue_size = queue_size or config.CRAWL_PIPELINE_QUEUE_SIZE
+        self.stages: List[PipelineStage] = []
+
+    def add_stage(self, name: str, handler: Callable[[Any], Awaitable[Any]], concurrency: int = 1) -> "CrawlPipeline":
+        """
+        Append a stage
+        Returns:
+            The pipeline, to chain add_stage calls
+        """
+        self.stages.append(PipelineStage(name, handler, concurrency))
+        return self
+
+    async def run(
+        self,
+        source: AsyncIterator[Any],
+        on_exit: Optional[Callable[[Any, bool], Any]] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Feed every source item through the stages and wait until all of them left the pipeline
+        Args:
+            source: Async iterator producing the items of the first stage
+            on_exit: Called with an item and whether it passed every stage when it leaves
+                     the pipeline, either at the end or dropped / failed in a stage
+
+        Returns:
+            processed / dropped / failed counts per stage
+        """
+        if not self.stages:
+            raise ValueError(f"Pipeline {self.name} has no stages")
+        queues: List[asyncio.Queue] = [asyncio.Queue(self.queue_size) for _ in self.stages]
+        workers: List[List[asyncio.Task]] = [
+            [
+                asyncio.create_task(self._work(index, queues, on_exit), name=f"{self.name}.{stage.name}.{n}")
+                for n in range(stage.concurrency)
+            ]
+            for index, stage in enumerate(self.stages)
+        ]
+        try:
+            async for item in source:
+                await queues[0].put((item, contextvars.copy_context()))
+            # Stop the stages in order, each one only after everything upstream was handed over
+            for index, stage in enumerate(self.stages):
+                for _ in range(stage.concurrency):
+                    await queues[index].put((_STOP, None))
+                await asyncio.gather(*workers[index])
+        finally:
+            pending = [task for stage_workers in workers for task in stage_workers if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        stats = {
+            stage.name: {"processed": stage.processed, "dropped": stage.dropped, "failed": stage.failed}
+            for stage in self.stages
+        }
+        utils.logger.info(f"[CrawlPipeline.run] {self.name} finished: {stats}")
+        return stats
+
+    async def _work(self, index: int, queues: List[asyncio.Queue], on_exit: Optional[Callable[[Any, bool], Any]]):
+        stage = self.stages[index]
+        is_last = index == len(self.stages) - 1
+        while True:
+            item, ctx = await queues[index].get()
+            if item is _STOP:
+                return
+            try:
+                result = await asyncio.create_task(stage.handler(item), context=ctx)
+            except Exception as e:
+                stage.failed += 1
+                utils.logger.error(f"[CrawlPipeline._work] {self.name}.{stage.name} failed: {e}")
+                await self._exit(on_exit, item, False, ctx)
+                continue
+            stage.processed += 1
+            if result is None:
+                stage.dropped += 1
+                await self._exit(on_exit, item, False, ctx)
+            elif is_last:
+                await self._exit(on_exit, result, True, ctx)
+            else:
+                await queues[index + 1].put((result, ctx))
+
+    async def _exit(self, on_exit: Optional[Callable[[Any, bool], Any]], item: Any, completed: bool, ctx: contextvars.Context):
+        if on_exit is None:
+            return
+        try:
+            result = ctx.run(on_exit, item, completed)
+            if asyncio.iscoroutine(result):
+                await asyncio.create_task(result, context=ctx)
+        except Exception as e:
+            utils.logger.error(f"[CrawlPipeline._exit] {self.name} exit callback failed: {e}")
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/csv_sink.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+CSV sink keeping one open handle per file, with the header fixed from the platform's
+table schema so rows of items with different keys stay aligned
+"""
+
+import asyncio
+import csv
+import io
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import config
+from tools import utils
+
+# (platform, item_type) -> model name in database.models, whose columns define the CSV header
+CSV_SCHEMA_MODELS = {
+    ("xhs", "contents"): "XhsNote",
+    ("xhs", "comments"): "XhsNoteComment",
+    ("xhs", "creators"): "XhsCreator",
+    ("douyin", "contents"): "DouyinAweme",
+    ("douyin", "comments"): "DouyinAwemeComment",
+    ("douyin", "creators"): "DyCreator",
+    ("bili", "videos"): "BilibiliVideo",
+    ("bili", "comments"): "BilibiliVideoComment",
+    ("bili", "creators"): "BilibiliUpInfo",
+    ("bili", "contacts"): "BilibiliContactInfo",
+    ("bili", "dynamics"): "BilibiliUpDynamic",
+    ("kuaishou", "contents"): "KuaishouVideo",
+    ("kuaishou", "comments"): "KuaishouVideoComment",
+    ("weibo", "contents"): "WeiboNote",
+    ("weibo", "comments"): "WeiboNoteComment",
+    ("weibo", "creators"): "WeiboCreator",
+    ("tieba", "contents"): "TiebaNote",
+    ("tieba", "comments"): "TiebaComment",
+    ("tieba", "creators"): "TiebaCreator",
+    ("zhihu", "contents"): "ZhihuContent",
+    ("zhihu", "comments"): "ZhihuComment",
+    ("zhihu", "creators"): "ZhihuCreator",
+}
+
+
+def get_csv_fieldnames(platform: str, item_type: str) -> Optional[List[str]]:
+    """
+    CSV columns of a platform's item type: the columns of its database table without the
+    auto-increment id, in table order
+    Args:
+        platform: Platform name as used by AsyncFileWriter, e.g. xhs, douyin, bili
+        item_type: contents, comments, creators ...
+
+    Returns:
+        Column names, None if the item type has no table
+    """
+    model_name = CSV_SCHEMA_MODELS.get((platform, item_type))
+    if model_name is None:
+        return None
+    from database import models
+
+    table = getattr(models, model_name).__table__
+    return [column.name for column in table.columns if not (column.primary_key and column.name == "id")]
+
+
+class CsvSink:
+    """
+    Appends rows to one CSV file through a handle opened once. Rows are formatted into an
+    in-memory buffer and written out when it holds CSV_FLUSH_BYTES or CSV_FLUSH_INTERVAL_SEC
+    passed since the last write, and at close.
+
+    The header is fixed when the file is created: the schema columns followed by any other
+    keys of the first item. Appending to an existing file keeps that file's header. Keys of
+    later items outside the header are dropped with a warning instead of shifting columns.
+    """
+
+    # Class-level instance management, one sink per absolute file path
+    _instances: Dict[str, "CsvSink"] = {}
+
+    def __init__(self, file_path: str, fieldnames: Optional[List[str]] = None,
+                 flush_bytes: Optional[int] = None, flush_interval_sec: Optional[float] = None):
+        self.file_path = file_path
+        self.schema = fieldnames
+        self.flush_bytes = config.CSV_FLUSH_BYTES if flush_bytes is None else flush_bytes
+        self.flush_interval_sec = config.CSV_FLUSH_INTERVAL_SEC if flush_interval_sec is None else flush_interval_sec
+        self.fieldnames: Optional[List[str]] = None
+        self._field_set: Set[str] = set()
+        self._file = None
+        self._buffer = io.StringIO()
+        self._writer: Optional[csv.DictWriter] = None
+        self._lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._dropped_keys: Set[str] = set()
+
+    @classmethod
+    def get_instance(cls, file_path: str, fieldnames: Optional[List[str]] = None) -> "CsvSink":
+        """
+        Get or create the sink of a file
+        Args:
+            file_path: CSV file path
+            fieldnames: Schema columns, used when the file is created
+
+        Returns:
+            CsvSink instance
+        """
+        key = os.path.abspath(file_path)
+        if key not in cls._instances:
+            cls._instances[key] = cls(key, fieldnames)
+        return cls._instances[key]
+
+    @classmethod
+    def close_all(cls):
+        """
+        Write out and close every sink, should be called at shutdown
+        """
+        for sink in list(cls._instances.values()):
+            try:
+                sink.close()
+            except Exception as e:
+                utils.logger.error(f"[CsvSink.close_all] Error closing {sink.file_path}: {e}")
+        cls._instances.clear()
+
+    async def write_rows(self, items: Iterable[Dict]):
+        """
+        Append items as rows
+        Args:
+            items: Row dicts
+        """
+        items = list(items)
+        if not items:
+            return
+        if self._writer is None:
+            self._open(items[0])
+        for item in items:
+            if not self._field_set.issuperset(item):
+                self._warn_dropped(item)
+            self._writer.writerow(item)
+
+        if self._buffer.tell() >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_interval_sec:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        """
+        Write the buffered rows to the file
+        """
+        async with self._lock:
+            data = self._take_buffer()
+            if data:
+                await asyncio.to_thread(self._write, data)
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Write the buffered rows and close the file
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._file is None:
+            return
+        self._write(self._take_buffer())
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval_sec)
+            self._flush_task = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+
+    def _open(self, first_item: Dict):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        header = None
+        if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
+            with open(self.file_path, newline="", encoding="utf-8-sig") as f:
+                header = next(csv.reader(f), None)
+        if header:
+            self.fieldnames = header
+        else:
+            schema = list(self.schema or [])
+            self.fieldnames = schema + [key for key in first_item if key not in schema]
+        self._field_set = set(self.fieldnames)
+        self._file = open(self.file_path, "a", newline="", encoding="utf-8-sig")
+        self._writer = csv.DictWriter(self._buffer, fieldnames=self.fieldnames, restval="", extrasaction="ignore")
+        if not header:
+            self._writer.writeheader()
+
+    def _take_buffer(self) -> str:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def _write(self, data: str):
+        if data:
+            self._file.write(data)
+        self._file.flush()
+
+    def _warn_dropped(self, item: Dict):
+        dropped = {key for key in item if key not in self._field_set} - self._dropped_keys
+        if dropped:
+            self._dropped_keys.update(dropped)
+            utils.logger.warning(
+                f"[CsvSink.write_rows] {self.file_path}: columns {sorted(dropped)} are not in the header and are dropped"
+            )
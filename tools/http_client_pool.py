@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/http_client_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Long-lived httpx.AsyncClient instances shared per platform and proxy
+"""
+
+import asyncio
+import importlib.util
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+import config
+from tools import utils
+
+
+class _PooledAsyncClient(httpx.AsyncClient):
+    """
+    httpx.AsyncClient that follows redirects with a cookie jar private to each request
+    """
+
+    async def send(
+        self,
+        request: httpx.Request,
+        *,
+        stream: bool = False,
+        auth=httpx.USE_CLIENT_DEFAULT,
+        follow_redirects=httpx.USE_CLIENT_DEFAULT,
+    ) -> httpx.Response:
+        if follow_redirects is httpx.USE_CLIENT_DEFAULT:
+            follow_redirects = self.follow_redirects
+        if not follow_redirects:
+            return await super().send(request, stream=stream, auth=auth, follow_redirects=False)
+
+        cookies = httpx.Cookies()
+        history = []
+        while True:
+            response = await super().send(request, stream=stream, auth=auth, follow_redirects=False)
+            response.history = list(history)
+            if response.next_request is None:
+                return response
+
+            await response.aread()
+            cookies.extract_cookies(response)
+            history.append(response)
+            request = response.next_request
+            if len(history) > self.max_redirects:
+                raise httpx.TooManyRedirects("Exceeded maximum allowed redirects.", request=request)
+            cookies.set_cookie_header(request)
+
+
+class HttpClientPool:
+    """
+    Keeps one httpx.AsyncClient per (platform, proxy, follow_redirects) so consecutive
+    requests reuse pooled keep-alive connections instead of paying a new TCP and TLS
+    handshake each time.
+
+    Clients never persist response cookies: the platform clients send their login
+    cookies explicitly in the headers, exactly like the per-request clients did before.
+    Cookies set inside a redirect chain are still sent on the following hops of that
+    chain, but are dropped once the request returns so they never reach other requests
+    sharing the client.
+    """
+
+    # Class-level client management
+    _clients: Dict[Tuple[str, Optional[str], bool], httpx.AsyncClient] = {}
+    _retiring: Dict[httpx.AsyncClient, asyncio.Task] = {}
+
+    # Seconds a replaced client stays open so in-flight requests can finish
+    RETIRE_GRACE_SECONDS = 120
+
+    @classmethod
+    def get_client(cls, platform: str, proxy: Optional[str] = None, follow_redirects: bool = False) -> httpx.AsyncClient:
+        """
+        Get or create the shared client
+
+        Args:
+            platform: Client owner, e.g. the platform client class name
+            proxy: Proxy URL, None for a direct connection
+            follow_redirects: Whether the client follows redirects
+
+        Returns:
+            httpx.AsyncClient instance
+        """
+        key = (platform, proxy, follow_redirects)
+        client = cls._clients.get(key)
+        if client is None or client.is_closed:
+            client = cls._create_client(proxy, follow_redirects)
+            cls._clients[key] = client
+        return client
+
+    @classmethod
+    def retire_clients(cls, platform: Optional[str], proxy: Optional[str]):
+        """
+        Drop the clients of a proxy that is no longer used, they are closed after
+        RETIRE_GRACE_SECONDS so requests already running on them are not cut off
+
+        Args:
+            platform: Client owner, None for the clients of every owner
+            proxy: The replaced proxy URL
+        """
+        for key in [k for k in cls._clients if platform in (None, k[0]) and k[1] == proxy]:
+            client = cls._clients.pop(key)
+            task = asyncio.create_task(cls._close_later(client, cls.RETIRE_GRACE_SECONDS))
+            cls._retiring[client] = task
+            task.add_done_callback(lambda _, c=client: cls._retiring.pop(c, None))
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Close every client, should be called at shutdown
+        """
+        retiring = dict(cls._retiring)
+        for task in retiring.values():
+            task.cancel()
+        await asyncio.gather(*retiring.values(), return_exceptions=True)
+        clients = list(cls._clients.values()) + list(retiring)
+        cls._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                utils.logger.error(f"[HttpClientPool.close_all] Error closing client: {e}")
+
+    @staticmethod
+    def _create_client(proxy: Optional[str], follow_redirects: bool) -> httpx.AsyncClient:
+        http2 = config.HTTPX_ENABLE_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            utils.logger.warning("[HttpClientPool._create_client] HTTPX_ENABLE_HTTP2 is set but h2 is not installed, using HTTP/1.1")
+            http2 = False
+        return _PooledAsyncClient(
+            proxy=proxy,
+            follow_redirects=follow_redirects,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.HTTPX_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTPX_KEEPALIVE_EXPIRY,
+            ),
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        )
+
+    @staticmethod
+    async def _close_later(client: httpx.AsyncClient, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            await client.aclose()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/js_sign_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Pool of long-lived Node.js processes running the JS signing scripts in libs/
+(douyin a_bogus, zhihu x-zse-96)
+
+PyExecJS starts a new node process for every call() and blocks the event loop
+while it runs. Here each worker loads its script once and answers
+newline-delimited JSON requests over stdin/stdout (see libs/sign_worker.js),
+so a signature costs one pipe round trip and is awaited without blocking.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+import config
+from tools import utils
+
+SIGN_WORKER_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "sign_worker.js")
+
+
+class JsSignError(Exception):
+    """Raised when a signing call fails or times out"""
+
+
+class JsSignWorker:
+    """One node process with its script loaded, requests are pipelined by id"""
+
+    def __init__(self, script_path: str, node_path: str):
+        self.script_path = script_path
+        self.node_path = node_path
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self):
+        async with self._start_lock:
+            if self.is_running:
+                return
+            self._process = await asyncio.create_subprocess_exec(
+                self.node_path, SIGN_WORKER_JS, self.script_path,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=1024 * 1024,
+            )
+            ready = await asyncio.wait_for(self._process.stdout.readline(), config.JS_SIGN_TIMEOUT_SEC * 4)
+            if not ready or not json.loads(ready).get("ready"):
+                await self.close()
+                raise JsSignError(f"[JsSignWorker.start] Worker for {self.script_path} failed to start")
+            self._reader = asyncio.create_task(self._read_loop(self._process))
+
+    async def call(self, fn: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        if not self.is_running:
+            await self.start()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            line = json.dumps({"id": request_id, "fn": fn, "args": list(args)}, ensure_ascii=False) + "\n"
+            self._process.stdin.write(line.encode("utf-8"))
+            await self._process.stdin.drain()
+            return await asyncio.wait_for(future, timeout or config.JS_SIGN_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            # The script may be stuck in a loop, a fresh process is started on the next call
+            utils.logger.error(f"[JsSignWorker.call] {fn} timed out, restarting worker for {self.script_path}")
+            await self.close()
+            raise JsSignError(f"{fn} timed out")
+        except (BrokenPipeError, ConnectionResetError) as e:
+            await self.close()
+            raise JsSignError(f"{fn} failed, worker exited: {e}")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self):
+        process, self._process = self._process, None
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+        self._fail_pending(JsSignError("worker closed"))
+
+    async def _read_loop(self, process: asyncio.subprocess.Process):
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            future = self._pending.get(message.get("id"))
+            if future is None or future.done():
+                continue
+            if "error" in message:
+                future.set_exception(JsSignError(message["error"]))
+            else:
+                future.set_result(message.get("result"))
+        self._fail_pending(JsSignError("worker exited"))
+
+    def _fail_pending(self, exc: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+
+class JsSignPool:
+    """
+    N workers for one signing script, calls go to the least busy worker.
+    Without a node executable the pool falls back to PyExecJS in a worker thread.
+    """
+
+    # Class-level pool management, one pool per script
+    _instances: Dict[str, "JsSignPool"] = {}
+
+    @classmethod
+    def get_instance(cls, script_path: str) -> "JsSignPool":
+        """
+        Get or create the pool for a signing script
+
+        Args:
+            script_path: JS file, e.g. libs/douyin.js
+
+        Returns:
+            JsSignPool instance
+        """
+        key = os.path.abspath(script_path)
+        if key not in cls._instances:
+            cls._instances[key] = cls(key)
+        return cls._instances[key]
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Stop every worker process, should be called at shutdown
+        """
+        for pool in list(cls._instances.values()):
+            await pool.close()
+        cls._instances.clear()
+
+    def __init__(self, script_path: str, size: Optional[int] = None):
+        self.script_path = script_path
+        self.size = max(1, size or config.JS_SIGN_WORKER_COUNT)
+        self.node_path = shutil.which("node")
+        self._workers: List[JsSignWorker] = []
+        self._execjs_ctx = None
+
+    async def call(self, fn: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Call a top-level function of the script
+
+        Args:
+            fn: Function name
+            *args: JSON serializable arguments
+            timeout: Seconds before the call fails, defaults to JS_SIGN_TIMEOUT_SEC
+
+        Returns:
+            The function's return value
+        """
+        if not self.node_path:
+            return await asyncio.wait_for(
+                asyncio.to_thread(self._call_execjs, fn, *args), timeout or config.JS_SIGN_TIMEOUT_SEC
+            )
+        if not self._workers:
+            self._workers = [JsSignWorker(self.script_path, self.node_path) for _ in range(self.size)]
+        worker = min(self._workers, key=lambda w: w.pending)
+        return await worker.call(fn, *args, timeout=timeout)
+
+    async def close(self):
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            await worker.close()
+
+    def _call_execjs(self, fn: str, *args: Any) -> Any:
+        import execjs
+
+        if self._execjs_ctx is None:
+            with open(self.script_path, encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return self._execjs_ctx.call(fn, *args)
@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/media_download_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Media download worker pool: crawlers only enqueue media URLs, a separate set of workers
+downloads them from a persistent job queue and stores every file once by content hash
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import shutil
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import aiosqlite
+
+import config
+from tools import utils
+
+# Downloads url to file_path and returns whether it succeeded, e.g. XiaoHongShuClient.download_note_media
+MediaDownloader = Callable[[str, str], Awaitable[bool]]
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class MediaDownloadPool:
+    """
+    Downloads the media of one platform in the background with its own concurrency limit.
+
+    Jobs live in an SQLite table, so media still queued when a run stops are downloaded by
+    the next run. A failed job is retried with exponential backoff. Downloaded files are
+    stored once under <store_dir>/objects by their SHA-256, and the path the crawler asked
+    for (e.g. data/xhs/images/<note_id>/0.jpg) becomes a symlink to it; a URL that was
+    already downloaded is linked without fetching it again. The jobs table doubles as the
+    manifest of which note file holds which content hash.
+    """
+
+    # Class-level instance management, one pool per platform
+    _instances: Dict[str, "MediaDownloadPool"] = {}
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS media_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL,
+            url TEXT NOT NULL,
+            dest_path TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_try_at REAL NOT NULL DEFAULT 0,
+            sha256 TEXT,
+            size INTEGER,
+            error TEXT,
+            updated_at REAL NOT NULL,
+            UNIQUE (platform, dest_path)
+        )
+    """
+
+    def __init__(self, platform: str, db_path: str, store_dir: str, concurrency: int = 2,
+                 max_attempts: int = 3, retry_base_sec: float = 5):
+        self.platform = platform
+        self.db_path = db_path
+        self.store_dir = store_dir
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_sec = retry_base_sec
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
+        self._downloader: Optional[MediaDownloader] = None
+        self._workers: list = []
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._unfinished = 0
+        self.downloaded = 0
+        self.linked = 0
+        self.failed = 0
+
+    @classmethod
+    def get_instance(cls, platform: str) -> "MediaDownloadPool":
+        """
+        Get the pool of a platform configured in base_config, created on first use
+        Args:
+            platform: Platform name, e.g. xhs, dy, bili
+
+        Returns:
+            MediaDownloadPool instance
+        """
+        if platform not in cls._instances:
+            cls._instances[platform] = cls(
+                platform,
+                os.path.abspath(config.MEDIA_POOL_DB_PATH),
+                os.path.abspath(config.MEDIA_STORE_DIR),
+                config.MEDIA_DOWNLOAD_CONCURRENCY,
+                config.MEDIA_DOWNLOAD_MAX_ATTEMPTS,
+                config.MEDIA_DOWNLOAD_RETRY_BASE_SEC,
+            )
+        return cls._instances[platform]
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Stop every pool and close its database, should be called at shutdown.
+        Jobs not downloaded yet stay queued for the next run.
+        """
+        for pool in list(cls._instances.values()):
+            await pool.close()
+        cls._instances.clear()
+
+    async def start(self, downloader: MediaDownloader):
+        """
+        Start the workers, jobs left over by an earlier run are picked up first
+        Args:
+            downloader: Platform client method downloading a URL to a file
+        """
+        self._downloader = downloader
+        if self._workers:
+            return
+        db = await self._get_db()
+        async with self._db_lock:
+            # Jobs of an interrupted run, their .part files are resumed
+            await db.execute(
+                "UPDATE media_jobs SET status = ? WHERE platform = ? AND status = ?",
+                (STATUS_PENDING, self.platform, STATUS_RUNNING),
+            )
+            await db.commit()
+            async with db.execute(
+                "SELECT COUNT(*) FROM media_jobs WHERE platform = ? AND status = ?",
+                (self.platform, STATUS_PENDING),
+            ) as cursor:
+                self._unfinished = (await cursor.fetchone())[0]
+        if self._unfinished:
+            utils.logger.info(f"[MediaDownloadPool.start] {self.platform}: resume {self._unfinished} queued media")
+        self._update_idle()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"media_pool.{self.platform}.{n}") for n in range(self.concurrency)
+        ]
+
+    async def enqueue(self, url: str, dest_path: str):
+        """
+        Queue a media file, returns at once. A destination already downloaded or queued with
+        the same URL is not queued again.
+        Args:
+            url: Media URL
+            dest_path: Where the crawler wants the file, its directory must exist
+        """
+        if not url:
+            return
+        db = await self._get_db()
+        async with self._db_lock:
+            # A destination that gave up before or now has another URL is queued again
+            cursor = await db.execute(
+                "INSERT INTO media_jobs (platform, url, dest_path, status, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (platform, dest_path) DO UPDATE SET url = excluded.url, status = excluded.status, "
+                "attempts = 0, next_try_at = 0, updated_at = excluded.updated_at "
+                "WHERE media_jobs.status = ? OR (media_jobs.status = ? AND media_jobs.url != excluded.url)",
+                (self.platform, url, os.path.abspath(dest_path), STATUS_PENDING, time.time(), STATUS_FAILED, STATUS_DONE),
+            )
+            await db.commit()
+            inserted = cursor.rowcount > 0
+        if inserted:
+            self._unfinished += 1
+            self._update_idle()
+            self._wakeup.set()
+
+    async def join(self):
+        """
+        Wait until every queued job was downloaded or gave up
+        """
+        if self._workers:
+            await self._idle.wait()
+
+    async def close(self):
+        """
+        Stop the workers and close the database
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._db is not None:
+            utils.logger.info(
+                f"[MediaDownloadPool.close] {self.platform}: downloaded {self.downloaded}, "
+                f"reused {self.linked}, failed {self.failed}, left {self._unfinished} queued"
+            )
+            await self._db.close()
+            self._db = None
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                # The queue database is unavailable for now, try again instead of losing the worker
+                utils.logger.error(f"[MediaDownloadPool._work] {self.platform}: claim media job failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if job is None:
+                continue
+            try:
+                await self._run(*job)
+            except Exception as e:
+                # The job's outcome could not be recorded, it stays running in the database and is
+                # resumed by the next run; count it out here so join() does not wait for it forever
+                utils.logger.error(f"[MediaDownloadPool._work] {self.platform}: record media job {job[1]} failed: {e}")
+                self.failed += 1
+                self._unfinished -= 1
+                self._update_idle()
+
+    async def _claim(self) -> Optional[Tuple[int, str, str, int]]:
+        """
+        Take the next due job, or wait until one is enqueued or due
+        """
+        db = await self._get_db()
+        now = time.time()
+        async with self._db_lock:
+            async with db.execute(
+                "SELECT id, url, dest_path, attempts FROM media_jobs WHERE platform = ? AND status = ? "
+                "AND next_try_at <= ? ORDER BY id LIMIT 1",
+                (self.platform, STATUS_PENDING, now),
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is not None:
+                await db.execute("UPDATE media_jobs SET status = ? WHERE id = ?", (STATUS_RUNNING, row[0]))
+                await db.commit()
+                return row
+            async with db.execute(
+                "SELECT MIN(next_try_at) FROM media_jobs WHERE platform = ? AND status = ?",
+                (self.platform, STATUS_PENDING),
+            ) as cursor:
+                next_try_at = (await cursor.fetchone())[0]
+            self._wakeup.clear()
+        timeout = max(0.0, next_try_at - now) if next_try_at is not None else None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return None
+
+    async def _run(self, job_id: int, url: str, dest_path: str, attempts: int):
+        try:
+            stored = await self._stored_object(url)
+            if stored is not None:
+                sha256, size, object_path = stored
+                self.linked += 1
+            else:
+                sha256, size, object_path = await self._download(job_id, url, dest_path)
+                self.downloaded += 1
+            await asyncio.to_thread(_link, object_path, dest_path)
+        except Exception as e:
+            await self._retry_or_fail(job_id, url, attempts + 1, e)
+            return
+        await self._finish(job_id, STATUS_DONE, sha256=sha256, size=size)
+        utils.logger.info(f"[MediaDownloadPool._run] save media {dest_path} success ...")
+
+    async def _download(self, job_id: int, url: str, dest_path: str) -> Tuple[str, int, str]:
+        """
+        Download a job into the object store
+        Returns:
+            (sha256, size, object path)
+        """
+        extension = os.path.splitext(dest_path)[1]
+        # Named by job, so a retry or the next run resumes the same .part file
+        tmp_path = os.path.join(self.store_dir, "tmp", f"{self.platform}_{job_id}{extension}")
+        os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+        if not await self._downloader(url, tmp_path):
+            raise RuntimeError(f"download of {url} failed")
+        sha256, size = await asyncio.to_thread(_hash_file, tmp_path)
+        object_path = self._object_path(sha256, extension)
+        await asyncio.to_thread(_move_object, tmp_path, object_path)
+        return sha256, size, object_path
+
+    async def _stored_object(self, url: str) -> Optional[Tuple[str, int, str]]:
+        """
+        The stored object of a URL downloaded before, if its file still exists
+        """
+        db = await self._get_db()
+        async with self._db_lock:
+            async with db.execute(
+                "SELECT sha256, size, dest_path FROM media_jobs WHERE platform = ? AND url = ? AND status = ? LIMIT 1",
+                (self.platform, url, STATUS_DONE),
+            ) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        sha256, size, done_path = row
+        object_path = self._object_path(sha256, os.path.splitext(done_path)[1])
+        return (sha256, size, object_path) if os.path.exists(object_path) else None
+
+    async def _retry_or_fail(self, job_id: int, url: str, attempts: int, error: Exception):
+        if attempts >= self.max_attempts:
+            self.failed += 1
+            utils.logger.error(f"[MediaDownloadPool._run] give up {url} after {attempts} attempts: {error}")
+            await self._finish(job_id, STATUS_FAILED, attempts=attempts, error=str(error))
+            return
+        delay = self.retry_base_sec * 2 ** (attempts - 1) * (1 + random.random() / 2)
+        utils.logger.warning(f"[MediaDownloadPool._run] {url} failed ({error}), retry in {delay:.1f}s")
+        db = await self._get_db()
+        async with self._db_lock:
+            await db.execute(
+                "UPDATE media_jobs SET status = ?, attempts = ?, next_try_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                (STATUS_PENDING, attempts, time.time() + delay, str(error), time.time(), job_id),
+            )
+            await db.commit()
+        self._wakeup.set()
+
+    async def _finish(self, job_id: int, status: str, sha256: Optional[str] = None, size: Optional[int] = None,
+                      attempts: Optional[int] = None, error: Optional[str] = None):
+        db = await self._get_db()
+        async with self._db_lock:
+            await db.execute(
+                "UPDATE media_jobs SET status = ?, sha256 = COALESCE(?, sha256), size = COALESCE(?, size), "
+                "attempts = COALESCE(?, attempts), error = ?, updated_at = ? WHERE id = ?",
+                (status, sha256, size, attempts, error, time.time(), job_id),
+            )
+            await db.commit()
+        self._unfinished -= 1
+        self._update_idle()
+
+    def _update_idle(self):
+        if self._unfinished > 0:
+            self._idle.clear()
+        else:
+            self._idle.set()
+
+    def _object_path(self, sha256: str, extension: str) -> str:
+        return os.path.join(self.store_dir, "objects", sha256[:2], f"{sha256}{extension}")
+
+    async def _get_db(self) -> aiosqlite.Connection:
+        if self._db is not None:
+            return self._db
+        async with self._db_lock:
+            if self._db is None:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(self._SCHEMA)
+                await db.execute("CREATE INDEX IF NOT EXISTS idx_media_jobs_url ON media_jobs (platform, url, status)")
+                await db.commit()
+                self._db = db
+        return self._db
+
+
+def _hash_file(path: str) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def _move_object(tmp_path: str, object_path: str):
+    """
+    Move a downloaded file into the object store, a duplicate of a stored object is dropped
+    """
+    if os.path.exists(object_path):
+        os.remove(tmp_path)
+        return
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    os.replace(tmp_path, object_path)
+
+
+def _link(object_path: str, dest_path: str):
+    """
+    Point dest_path at a stored object: a relative symlink, or a hard link / copy where
+    symlinks are not permitted (e.g. Windows without developer mode)
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.symlink(os.path.relpath(object_path, os.path.dirname(dest_path)), dest_path)
+    except OSError:
+        try:
+            os.link(object_path, dest_path)
+        except OSError:
+            shutil.copyfile(object_path, dest_path)
+
+
+async def start_media_download_pool(platform: str, downloader: MediaDownloader) -> Optional[MediaDownloadPool]:
+    """
+    Start the media download pool of a platform
+    Args:
+        platform: Platform name, e.g. xhs, dy, bili
+        downloader: Platform client method downloading a URL to a file
+
+    Returns:
+        The running MediaDownloadPool if media crawling and ENABLE_MEDIA_DOWNLOAD_POOL are on, else None
+    """
+    if not (config.ENABLE_GET_MEIDAS and config.ENABLE_MEDIA_DOWNLOAD_POOL):
+        return None
+    pool = MediaDownloadPool.get_instance(platform)
+    await pool.start(downloader)
+    return pool
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/media_downloader.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Streaming media download: the body is written to disk chunk by chunk instead of being
+held in memory, partial files are resumed with HTTP Range requests and large files can
+be fetched as parallel ranged segments
+"""
+
+import asyncio
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import httpx
+
+import config
+from tools import utils
+from tools.rate_limiter import TokenBucket
+
+PART_SUFFIX = ".part"
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)")
+
+
+# Shared by every download, created on first use from MEDIA_DOWNLOAD_MAX_KBPS
+_bandwidth_bucket: Optional[TokenBucket] = None
+
+
+class MediaDownloadError(Exception):
+    pass
+
+
+class _RangeNotSupported(MediaDownloadError):
+    pass
+
+
+async def stream_download(
+    client: httpx.AsyncClient,
+    url: str,
+    file_path: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    segments: int = 1,
+    total_size: Optional[int] = None,
+) -> int:
+    """
+    Download url to file_path. The body goes to "<file_path>.part" first and is renamed
+    to file_path once complete, so file_path never holds a truncated file. A .part file
+    left by an interrupted download is continued with a Range request.
+    Args:
+        client: httpx client used for the requests
+        url: Media URL
+        file_path: Destination file, its directory must exist
+        headers: Request headers
+        timeout: Request timeout
+        segments: Number of parallel ranged requests for files of at least MEDIA_SEGMENT_MIN_MB
+        total_size: File size if already known, saves a probe request when segments > 1
+
+    Returns:
+        Size of the downloaded file
+
+    Raises:
+        httpx.HTTPError, MediaDownloadError
+    """
+    part_path = file_path + PART_SUFFIX
+    if segments > 1:
+        total_size = total_size or await _probe_size(client, url, headers, timeout)
+        if total_size and total_size >= config.MEDIA_SEGMENT_MIN_MB * 1024 * 1024:
+            try:
+                await _download_segments(client, url, part_path, total_size, segments, headers, timeout)
+            except _RangeNotSupported:
+                utils.logger.info(f"[media_downloader.stream_download] {url} does not support ranges, download as one stream")
+                _remove_files(_segment_paths(part_path, segments))
+            else:
+                os.replace(part_path, file_path)
+                return total_size
+    size = await _download_range(client, url, part_path, 0, None, headers, timeout)
+    os.replace(part_path, file_path)
+    return size
+
+
+async def _download_range(
+    client: httpx.AsyncClient,
+    url: str,
+    path: str,
+    start: int,
+    end: Optional[int],
+    headers: Optional[Dict[str, str]],
+    timeout: Optional[float],
+) -> int:
+    """
+    Stream bytes start..end (inclusive, None for the rest of the file) of url into path,
+    continuing after what path already holds
+    Returns:
+        Size of path
+    """
+    offset = os.path.getsize(path) if config.ENABLE_MEDIA_RANGE_RESUME and os.path.exists(path) else 0
+    if end is not None and offset >= end - start + 1:
+        return offset
+    request_headers = dict(headers or {})
+    ranged = start + offset > 0 or end is not None
+    if ranged:
+        request_headers["Range"] = f"bytes={start + offset}-{'' if end is None else end}"
+
+    async with client.stream("GET", url, headers=request_headers, timeout=timeout) as response:
+        range_start, range_total = _parse_content_range(response)
+        if response.status_code == 416 and end is None and offset:
+            if range_total == offset:
+                return offset  # the partial file already holds the whole body
+            os.remove(path)
+            raise MediaDownloadError(f"partial file of {url} does not match the remote file, removed")
+        response.raise_for_status()
+        if ranged and (response.status_code != 206 or range_start != start + offset):
+            if end is not None:
+                raise _RangeNotSupported(url)
+            offset = 0  # the server sent the whole body, start over
+        async with aiofiles.open(path, "ab" if offset else "wb") as f:
+            async for chunk in response.aiter_bytes(config.MEDIA_DOWNLOAD_CHUNK_SIZE):
+                await _throttle(len(chunk))
+                await f.write(chunk)
+                offset += len(chunk)
+    return offset
+
+
+async def _probe_size(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Dict[str, str]],
+    timeout: Optional[float],
+) -> Optional[int]:
+    """
+    Size of the remote file from a one-byte ranged request, None when ranges are not supported
+    """
+    request_headers = dict(headers or {})
+    request_headers["Range"] = "bytes=0-0"
+    async with client.stream("GET", url, headers=request_headers, timeout=timeout) as response:
+        if response.status_code != 206:
+            return None
+        return _parse_content_range(response)[1]
+
+
+async def _download_segments(
+    client: httpx.AsyncClient,
+    url: str,
+    part_path: str,
+    total_size: int,
+    segments: int,
+    headers: Optional[Dict[str, str]],
+    timeout: Optional[float],
+):
+    """
+    Download total_size bytes as parallel ranges into "<part_path>.<n>" files, then join them into part_path
+    """
+    segment_size = -(-total_size // segments)
+    segment_paths = _segment_paths(part_path, segments)
+    tasks = [
+        asyncio.create_task(
+            _download_range(client, url, segment_path, start, min(start + segment_size, total_size) - 1, headers, timeout)
+        )
+        for start, segment_path in zip(range(0, total_size, segment_size), segment_paths)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    await asyncio.to_thread(_join_files, segment_paths[: len(tasks)], part_path)
+
+
+async def _throttle(size: int):
+    """
+    Hold the download back to MEDIA_DOWNLOAD_MAX_KBPS over all concurrent downloads
+    """
+    global _bandwidth_bucket
+    if config.MEDIA_DOWNLOAD_MAX_KBPS <= 0:
+        return
+    if _bandwidth_bucket is None:
+        rate = config.MEDIA_DOWNLOAD_MAX_KBPS * 1024
+        _bandwidth_bucket = TokenBucket(rate, int(rate))
+    await _bandwidth_bucket.acquire(size)
+
+
+def _segment_paths(part_path: str, segments: int) -> List[str]:
+    return [f"{part_path}.{n}" for n in range(segments)]
+
+
+def _join_files(paths: List[str], target: str):
+    with open(target, "wb") as out:
+        for path in paths:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out, config.MEDIA_DOWNLOAD_CHUNK_SIZE)
+    _remove_files(paths)
+
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _parse_content_range(response: httpx.Response) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (first byte, total size) of a Content-Range header, None for missing parts
+    """
+    match = _CONTENT_RANGE_RE.match(response.headers.get("content-range", ""))
+    if not match:
+        return None, None
+    start, total = match.groups()
+    return (int(start) if start else None), (int(total) if total != "*" else None)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/rate_limiter.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Token-bucket request pacing per platform and endpoint class, so crawl tasks do not have
+to sleep while holding their concurrency semaphore
+"""
+
+import asyncio
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+import config
+
+# Endpoint classes with their own bucket, URLs matching none of the patterns are "detail"
+ENDPOINT_SEARCH = "search"
+ENDPOINT_DETAIL = "detail"
+ENDPOINT_COMMENTS = "comments"
+ENDPOINT_MEDIA = "media"
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average and up to `burst` at once.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        """
+        Wait until enough tokens are available and take them. Requests larger than the
+        burst wait for a full bucket and leave it in debt, which delays the next waiters.
+        Args:
+            tokens: Number of tokens, e.g. bytes for a bandwidth bucket
+        """
+        if self.rate <= 0:
+            return
+        needed = min(tokens, self.burst)
+        async with self._lock:
+            self._refill()
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class RateLimiter:
+    """
+    Shared token buckets keyed by (platform, endpoint class), configured by RATE_LIMITS
+    and the per platform overrides in RATE_LIMITS_PER_PLATFORM. A limit of None paces the
+    endpoint class at one request per CRAWLER_MAX_SLEEP_SEC without bursts, the pace of
+    the sleep it replaces.
+    """
+
+    # Class-level bucket management
+    _buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+
+    @classmethod
+    def get_bucket(cls, endpoint: str, platform: Optional[str] = None) -> Optional[TokenBucket]:
+        """
+        Get or create the bucket of an endpoint class
+        Args:
+            endpoint: search | detail | comments | media
+            platform: Platform name, the running platform (config.PLATFORM) by default
+
+        Returns:
+            TokenBucket, None if the endpoint class is not limited
+        """
+        platform = platform or config.PLATFORM
+        key = (platform, endpoint)
+        if key not in cls._buckets:
+            limits = {**config.RATE_LIMITS, **config.RATE_LIMITS_PER_PLATFORM.get(platform, {})}
+            limit = limits.get(endpoint, limits.get(ENDPOINT_DETAIL))
+            if limit is None:
+                limit = (1 / config.CRAWLER_MAX_SLEEP_SEC if config.CRAWLER_MAX_SLEEP_SEC > 0 else 0, 1)
+            rate, burst = limit
+            cls._buckets[key] = TokenBucket(rate, burst) if rate > 0 else None
+        return cls._buckets[key]
+
+    @classmethod
+    async def acquire(cls, endpoint: str, platform: Optional[str] = None):
+        """
+        Wait for the endpoint class' next request slot, returns at once when ENABLE_RATE_LIMIT is off
+        """
+        if not config.ENABLE_RATE_LIMIT:
+            return
+        bucket = cls.get_bucket(endpoint, platform)
+        if bucket is not None:
+            await bucket.acquire()
+
+    @staticmethod
+    def classify(url: str) -> str:
+        """
+        Endpoint class of a request URL by RATE_LIMIT_ENDPOINT_PATTERNS
+        """
+        for endpoint, pattern in config.RATE_LIMIT_ENDPOINT_PATTERNS.items():
+            if re.search(pattern, url):
+                return endpoint
+        return ENDPOINT_DETAIL
+
+
+def get_crawl_interval() -> float:
+    """
+    Pause between the pages / items a crawl task fetches while holding its semaphore.
+    With ENABLE_RATE_LIMIT the limiter paces the requests themselves and tasks do not sleep.
+    """
+    return 0 if config.ENABLE_RATE_LIMIT else config.CRAWLER_MAX_SLEEP_SEC
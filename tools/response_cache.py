@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/response_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+
+
+"""
+Opt-in on-disk cache of HTTP responses, so re-running detail / creator crawls while
+iterating on parsers and stores does not fetch the same pages from the platforms again
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import aiosqlite
+import httpx
+
+import config
+from tools import utils
+
+
+class HttpResponseCache:
+    """
+    SQLite backed response cache with per-endpoint TTLs and an LRU size cap.
+
+    Only GET requests whose URL matches a pattern in RESPONSE_CACHE_TTL_RULES and that
+    answered 200 are stored, and only if the body contains the marker the endpoint has in
+    RESPONSE_CACHE_REQUIRED_MARKERS, so captcha and login pages served with 200 are never
+    cached. Entries are keyed on method, URL, the normalized query parameters (ignoring the
+    per-session signing parameters in RESPONSE_CACHE_IGNORE_PARAMS) and whether the request
+    carried cookies, so anonymous and logged-in pages do not answer for each other.
+    Bodies are zlib compressed; once the stored bodies exceed RESPONSE_CACHE_MAX_MB the
+    least recently read entries are evicted.
+    """
+
+    # Class-level instance management, one cache per database file
+    _instances: Dict[str, "HttpResponseCache"] = {}
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            content_type TEXT,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_rules: Dict[str, int],
+        max_bytes: int,
+        ignore_params: Optional[List[str]] = None,
+        required_markers: Optional[Dict[str, str]] = None,
+    ):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._rules: List[Tuple[Pattern, int]] = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules.items()]
+        self._markers: List[Tuple[Pattern, str]] = [
+            (re.compile(pattern), marker) for pattern, marker in (required_markers or {}).items()
+        ]
+        self._ignore_params = set(ignore_params or [])
+        self._db: Optional[aiosqlite.Connection] = None
+        self._open_lock = asyncio.Lock()
+        self._total_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(cls) -> "HttpResponseCache":
+        """
+        Get the cache configured in base_config, created on first use
+        Returns:
+            HttpResponseCache instance
+        """
+        db_path = os.path.abspath(config.RESPONSE_CACHE_PATH)
+        if db_path not in cls._instances:
+            cls._instances[db_path] = cls(
+                db_path,
+                config.RESPONSE_CACHE_TTL_RULES,
+                int(config.RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+                config.RESPONSE_CACHE_IGNORE_PARAMS,
+                config.RESPONSE_CACHE_REQUIRED_MARKERS,
+            )
+        return cls._instances[db_path]
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Close every cache database, should be called at shutdown
+        """
+        for cache in list(cls._instances.values()):
+            await cache.close()
+        cls._instances.clear()
+
+    def ttl_for(self, method: str, url: str) -> Optional[int]:
+        """
+        TTL of the first rule matching the URL
+        Args:
+            method: Request method, only GET is cacheable
+            url: Request URL
+
+        Returns:
+            TTL in seconds, None if the request must not be cached
+        """
+        if method.upper() != "GET":
+            return None
+        for pattern, ttl in self._rules:
+            if pattern.search(url):
+                return ttl
+        return None
+
+    def is_valid(self, url: str, response: httpx.Response) -> bool:
+        """
+        Whether a response is a real page worth caching: 200, a body, and the required
+        marker of the first RESPONSE_CACHE_REQUIRED_MARKERS rule matching the URL
+        """
+        if response.status_code != 200 or not response.content:
+            return False
+        for pattern, marker in self._markers:
+            if pattern.search(url):
+                return marker in response.text
+        return True
+
+    def make_key(self, method: str, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> str:
+        """
+        Cache key of a request: method, scheme, host and path plus the sorted query
+        parameters from both the URL and params, without the ignored signing parameters,
+        and whether the request sent a Cookie header
+        """
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if params:
+            query.extend((str(k), str(v)) for k, v in params.items())
+        query = sorted((k, v) for k, v in query if k not in self._ignore_params)
+        normalized = f"{method.upper()} {parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{urlencode(query)}"
+        if headers and any(name.lower() == "cookie" and value for name, value in headers.items()):
+            normalized += " cookie"
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    async def get(
+        self, method: str, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None
+    ) -> Optional[httpx.Response]:
+        """
+        Look up a cached response
+        Args:
+            method: Request method
+            url: Request URL
+            params: Query parameters passed next to the URL
+            headers: Request headers, only the presence of a Cookie header is part of the key
+
+        Returns:
+            The rebuilt httpx.Response, None on a miss or an expired entry
+        """
+        db = await self._get_db()
+        key = self.make_key(method, url, params, headers)
+        now = time.time()
+        async with db.execute(
+            "SELECT status, content_type, body, size, expires_at FROM responses WHERE key = ?", (key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        status, content_type, body, size, expires_at = row
+        if expires_at <= now:
+            await db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            await db.commit()
+            self._total_size -= size
+            self.misses += 1
+            return None
+        await db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        await db.commit()
+        self.hits += 1
+        headers = {"content-type": content_type} if content_type else {}
+        return httpx.Response(
+            status,
+            headers=headers,
+            content=zlib.decompress(body),
+            request=httpx.Request(method, url, params=params),
+        )
+
+    async def set(
+        self, method: str, url: str, params: Optional[Dict], response: httpx.Response, headers: Optional[Dict] = None
+    ) -> bool:
+        """
+        Store a response if its endpoint has a TTL rule and it is a valid page
+        Args:
+            method: Request method
+            url: Request URL
+            params: Query parameters passed next to the URL
+            response: The network response
+            headers: Request headers, only the presence of a Cookie header is part of the key
+
+        Returns:
+            Whether the response was stored
+        """
+        ttl = self.ttl_for(method, url)
+        if ttl is None or not self.is_valid(url, response):
+            return False
+        db = await self._get_db()
+        key = self.make_key(method, url, params, headers)
+        body = zlib.compress(response.content)
+        now = time.time()
+        async with db.execute("SELECT size FROM responses WHERE key = ?", (key,)) as cursor:
+            row = await cursor.fetchone()
+        await db.execute(
+            "INSERT OR REPLACE INTO responses (key, url, status, content_type, body, size, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, response.status_code, response.headers.get("content-type"), body, len(body), now + ttl, now),
+        )
+        self._total_size += len(body) - (row[0] if row else 0)
+        if self._total_size > self.max_bytes:
+            await self._evict(now)
+        await db.commit()
+        return True
+
+    async def delete(self, method: str, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
+        """
+        Drop a cached response, e.g. when its body turned out to be a verification page
+        """
+        db = await self._get_db()
+        key = self.make_key(method, url, params, headers)
+        async with db.execute("DELETE FROM responses WHERE key = ? RETURNING size", (key,)) as cursor:
+            row = await cursor.fetchone()
+        await db.commit()
+        if row:
+            self._total_size -= row[0]
+
+    async def close(self):
+        """
+        Close the database connection
+        """
+        if self._db is not None:
+            utils.logger.info(
+                f"[HttpResponseCache.close] {self.hits} hits, {self.misses} misses, {self._total_size} bytes stored"
+            )
+            await self._db.close()
+            self._db = None
+
+    async def _get_db(self) -> aiosqlite.Connection:
+        if self._db is not None:
+            return self._db
+        async with self._open_lock:
+            if self._db is None:
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(self._SCHEMA)
+                await db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+                await db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+                await db.commit()
+                async with db.execute("SELECT COALESCE(SUM(size), 0) FROM responses") as cursor:
+                    self._total_size = (await cursor.fetchone())[0]
+                self._db = db
+        return self._db
+
+    async def _evict(self, now: float):
+        """
+        Drop expired entries, then the least recently read ones until the size cap holds
+        """
+        db = self._db
+        await db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        async with db.execute("SELECT COALESCE(SUM(size), 0) FROM responses") as cursor:
+            self._total_size = (await cursor.fetchone())[0]
+        if self._total_size <= self.max_bytes:
+            return
+        evicted = 0
+        async with db.execute("SELECT key, size FROM responses ORDER BY last_access") as cursor:
+            rows = await cursor.fetchall()
+        for key, size in rows:
+            if self._total_size <= self.max_bytes:
+                break
+            await db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total_size -= size
+            evicted += 1
+        utils.logger.info(f"[HttpResponseCache._evict] Evicted {evicted} least recently used responses")
+
+
+def get_response_cache(method: str, url: str) -> Optional[HttpResponseCache]:
+    """
+    The response cache to use for a request
+    Args:
+        method: Request method
+        url: Request URL
+
+    Returns:
+        HttpResponseCache if ENABLE_RESPONSE_CACHE is on and the endpoint has a TTL rule, else None
+    """
+    if not config.ENABLE_RESPONSE_CACHE:
+        return None
+    cache = HttpResponseCache.get_instance()
+    return cache if cache.ttl_for(method, url) is not None else None
+
+
+async def invalidate_cached_response(method: str, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
+    """
+    Drop the cached response of a request whose page the caller could not parse, so the
+    next attempt fetches it from the platform again
+    Args:
+        method: Request method
+        url: Request URL
+        params: Query parameters passed next to the URL
+        headers: Request headers
+    """
+    cache = get_response_cache(method, url)
+    if cache is not None:
+        await cache.delete(method, url, params, headers)
+        utils.logger.info(f"[invalidate_cached_response] Dropped cached response of {url}")
@@ -29,3 +29,4 @@ crawler_type_var: ContextVar[str] = ContextVar("crawler_type", default="")
 comment_tasks_var: ContextVar[List[Task]] = ContextVar("comment_tasks", default=[])
 db_conn_pool_var: ContextVar[aiomysql.Pool] = ContextVar("db_conn_pool_var")
 source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
+proxy_sticky_key_var: ContextVar[str] = ContextVar("proxy_sticky_key", default="")